@@ -0,0 +1,5 @@
+from .collection_stats import CollectionStatsBenchmark
+from .parameterized_queries import ParameterizedQueryBenchmark
+from .search import SearchBenchmark
+
+__all__ = ['CollectionStatsBenchmark', 'ParameterizedQueryBenchmark', 'SearchBenchmark']
@@ -0,0 +1,50 @@
+#! /usr/bin/env python3
+
+from typing import Any
+
+from .utils import _get_topics, _get_topics_benchmark_arguments, _get_topics_benchmark_parser, _time_topics
+from ..connection import get_connection
+from ..search import RobertsonBM25
+
+
+class CollectionStatsBenchmark:
+    """
+    Class for measuring the per query latency of BM25 when the document count and average document length are
+    read from the collection_stats table, compared to computing them from the docs table in every query.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.arguments = self.get_arguments(kwargs)
+        self.db_connection = get_connection(self.arguments['database'])
+        if not self.db_connection.has_table('collection_stats'):
+            raise IOError('The database does not contain a collection_stats table.')
+
+    @staticmethod
+    def get_arguments(kwargs: Any) -> dict:
+        return _get_topics_benchmark_arguments(kwargs)
+
+    def time_queries(self, ranking_method: RobertsonBM25, topics: list) -> float:
+        cursor = self.db_connection.cursor
+        return _time_topics(lambda topic: cursor.execute(ranking_method.construct_query(topic)).fetchall(), topics,
+                            self.arguments['repetitions'])
+
+    def run(self) -> dict:
+        """
+        Returns the mean latency per query in milliseconds for both ways of obtaining the collection statistics.
+        """
+        topics = _get_topics(self.arguments['topics_file'])
+        k1, b, n = self.arguments['k1'], self.arguments['b'], self.arguments['n']
+        scan = self.time_queries(RobertsonBM25(k1, b, n, use_collection_stats=False), topics)
+        cached = self.time_queries(RobertsonBM25(k1, b, n, use_collection_stats=True), topics)
+        return {
+            'queries': len(topics),
+            'docs_scan_ms': scan * 1000,
+            'collection_stats_ms': cached * 1000,
+            'saved_ms': (scan - cached) * 1000
+        }
+
+
+if __name__ == '__main__':
+    results = CollectionStatsBenchmark(**vars(_get_topics_benchmark_parser().parse_args())).run()
+    for key, value in results.items():
+        print(f'{key}: {value}')
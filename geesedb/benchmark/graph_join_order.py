@@ -0,0 +1,186 @@
+#! /usr/bin/env python3
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from ..connection import get_connection
+from ..interpreter import Metadata, Translator
+
+_QUERIES = [
+    'MATCH (d:docs)-[]-(e:entities {entity: $entity}) RETURN d.collection_id',
+    'MATCH (a:authors)-[]-(:docs)-[]-(b:authors {author: $author}) RETURN DISTINCT a.author',
+    'MATCH (d:docs)-[]-(:entities)-[]-(d2:docs {collection_id: $doc}) RETURN DISTINCT d.collection_id',
+    'MATCH (e:entities)-[]-(:docs)-[]-(a:authors {author: $author}) RETURN e.entity',
+    'MATCH (d:docs {collection_id: $doc})-[]-(e:entities) RETURN e.entity'
+]
+_METADATA = {
+    'docs': {
+        'entities': [['entity_doc', 'collection_id', 'doc_id', 'entity', 'entity']],
+        'authors': [['doc_author', 'collection_id', 'doc', 'author', 'author']]
+    },
+    'entities': {
+        'docs': [['entity_doc', 'entity', 'entity', 'doc_id', 'collection_id']]
+    },
+    'authors': {
+        'docs': [['doc_author', 'author', 'author', 'doc', 'collection_id']]
+    }
+}
+
+
+class GraphJoinOrderBenchmark:
+    """
+    Class for measuring the latency of GQL queries when the joins follow the pattern, compared to the joins ordered
+    on the cardinality statistics of the node and edge tables. The queries are translated once and executed as
+    prepared statements, with repetitions different bindings of their parameters ($entity, $author and $doc) that
+    are sampled from the edge tables.
+
+    If the database does not contain a _meta table, a test graph of documents, authors and entities with Zipf
+    distributed edges is generated in it.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.arguments = self.get_arguments(kwargs)
+        self.db_connection = get_connection(self.arguments['database'])
+        if not self.db_connection.has_table('_meta'):
+            self.build_test_graph()
+
+    @staticmethod
+    def get_arguments(kwargs: Any) -> dict:
+        arguments = {
+            'database': ':memory:',
+            'queries_file': None,
+            'num_docs': 100000,
+            'num_authors': 10000,
+            'num_entities': 100000,
+            'authors_per_doc': 2,
+            'entities_per_doc': 10,
+            'repetitions': 10,
+            'seed': 0,
+            'output': None
+        }
+        for key, item in arguments.items():
+            if kwargs.get(key) is not None:
+                arguments[key] = kwargs.get(key)
+        if arguments['repetitions'] < 1:
+            raise IOError('at least one repetition is needed')
+        return arguments
+
+    def get_queries(self) -> List[str]:
+        if self.arguments['queries_file'] is None:
+            return _QUERIES
+        with open(self.arguments['queries_file']) as queries_file:
+            return [query.strip() for query in queries_file.readlines() if len(query.strip()) > 0]
+
+    def build_test_graph(self) -> None:
+        rng = np.random.default_rng(self.arguments['seed'])
+        cursor = self.db_connection.cursor
+
+        def zipf_sample(n: int, size: int) -> np.ndarray:
+            probabilities = 1 / np.arange(1, n + 1)
+            return rng.permutation(n)[rng.choice(n, size, p=probabilities / probabilities.sum())]
+
+        num_docs = self.arguments['num_docs']
+        cursor.execute("CREATE TABLE docs AS SELECT 'doc_' || i AS collection_id, i AS doc_id "
+                       "FROM range($n) AS t(i);", {'n': num_docs})
+        cursor.execute("CREATE TABLE authors AS SELECT 'author_' || i AS author FROM range($n) AS t(i);",
+                       {'n': self.arguments['num_authors']})
+        cursor.execute("CREATE TABLE entities AS SELECT 'entity_' || i AS entity FROM range($n) AS t(i);",
+                       {'n': self.arguments['num_entities']})
+        for table, column, prefix, n, per_doc in [
+            ('doc_author', 'author', 'author_', self.arguments['num_authors'], self.arguments['authors_per_doc']),
+            ('entity_doc', 'entity', 'entity_', self.arguments['num_entities'], self.arguments['entities_per_doc'])
+        ]:
+            docs = np.repeat(np.arange(num_docs), per_doc)
+            edges = np.unique(np.stack([docs, zipf_sample(n, len(docs))], axis=1), axis=0)
+            doc_column = 'doc' if table == 'doc_author' else 'doc_id'
+            cursor.execute(f"CREATE TABLE {table} AS "
+                           f"SELECT 'doc_' || doc AS {doc_column}, '{prefix}' || other AS {column} "
+                           f"FROM (SELECT UNNEST($docs) AS doc, UNNEST($others) AS other) ORDER BY random();",
+                           {'docs': edges[:, 0].tolist(), 'others': edges[:, 1].tolist()})
+        cursor.execute('CREATE TABLE _meta (metadata VARCHAR);')
+        cursor.execute('INSERT INTO _meta VALUES (?);', [json.dumps(_METADATA)])
+
+    def sample_parameters(self) -> List[Dict[str, str]]:
+        rng = np.random.default_rng(self.arguments['seed'])
+        cursor = self.db_connection.cursor
+        samples = {}
+        for name, table, column in [('entity', 'entity_doc', 'entity'), ('author', 'doc_author', 'author'),
+                                    ('doc', 'docs', 'collection_id')]:
+            cursor.execute(f'SELECT DISTINCT {column} FROM {table} ORDER BY {column};')
+            values = [value for value, in cursor.fetchall()]
+            samples[name] = [values[i] for i in rng.integers(0, len(values), self.arguments['repetitions'])]
+        return [{name: values[i] for name, values in samples.items()} for i in range(self.arguments['repetitions'])]
+
+    def time_query(self, query: str, bindings: List[Dict[str, str]], reorder_joins: bool) -> float:
+        prepared_query = Translator(self.arguments['database'], reorder_joins=reorder_joins).prepare(query)
+        bindings = [{key: item for key, item in parameters.items() if key in prepared_query.parameters}
+                    for parameters in bindings]
+        prepared_query.execute(bindings[0]).fetchall()
+        start = time.perf_counter()
+        for parameters in bindings:
+            prepared_query.execute(parameters).fetchall()
+        prepared_query.close()
+        return (time.perf_counter() - start) / len(bindings)
+
+    def run(self) -> dict:
+        """
+        Returns the mean latency in milliseconds of every query with the joins in pattern order and with reordered
+        joins, and writes the results as JSON to the output file if one is given.
+        """
+        Metadata(self.arguments['database']).clear_cache()
+        bindings = self.sample_parameters()
+        results = []
+        for query in self.get_queries():
+            pattern_order = self.time_query(query, bindings, False)
+            reordered = self.time_query(query, bindings, True)
+            results.append({
+                'query': query,
+                'pattern_order_ms': pattern_order * 1000,
+                'reordered_ms': reordered * 1000,
+                'speedup': pattern_order / reordered
+            })
+        report = {
+            'settings': {key: item for key, item in self.arguments.items() if key != 'output'},
+            'results': results,
+            'mean_speedup': float(np.exp(np.mean(np.log([result['speedup'] for result in results]))))
+        }
+        if self.arguments['output'] is not None:
+            with open(self.arguments['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+        return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d',
+                        '--database',
+                        metavar='[file]',
+                        help='Location of the database, a test graph is generated in it if it does not contain a '
+                             '_meta table. By default an in-memory test graph is used.')
+    parser.add_argument('-q',
+                        '--queries_file',
+                        metavar='[file]',
+                        help='File with one GQL query per line, that can use the parameters $entity, $author and '
+                             '$doc. By default a set of representative queries is used.')
+    parser.add_argument('--num_docs', type=int)
+    parser.add_argument('--num_authors', type=int)
+    parser.add_argument('--num_entities', type=int)
+    parser.add_argument('--authors_per_doc', type=int)
+    parser.add_argument('--entities_per_doc', type=int)
+    parser.add_argument('-r',
+                        '--repetitions',
+                        type=int,
+                        help='Number of different parameter bindings every query is executed with.')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('-o',
+                        '--output',
+                        metavar='[file]',
+                        help='JSON file the results are written to.')
+    args = parser.parse_args()
+    report = GraphJoinOrderBenchmark(**vars(args)).run()
+    if args.output is None:
+        print(json.dumps(report, indent=2))
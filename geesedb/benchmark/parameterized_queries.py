@@ -0,0 +1,56 @@
+#! /usr/bin/env python3
+
+from typing import Any, Callable, List
+
+from .utils import _get_topics, _get_topics_benchmark_arguments, _get_topics_benchmark_parser, _time_topics
+from ..connection import get_connection
+from ..search import RobertsonBM25
+
+
+class ParameterizedQueryBenchmark:
+    """
+    Class for measuring the per query latency of BM25 when the topic terms and parameters are bound as query
+    parameters, compared to inlining them as literals so every topic results in a different SQL text. The time
+    DuckDB spends on parsing and planning the query with literals is measured with EXPLAIN.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.arguments = self.get_arguments(kwargs)
+        self.db_connection = get_connection(self.arguments['database'])
+
+    @staticmethod
+    def get_arguments(kwargs: Any) -> dict:
+        return _get_topics_benchmark_arguments(kwargs)
+
+    def time_queries(self, execute: Callable[[str], Any], topics: List[str]) -> float:
+        return _time_topics(execute, topics, self.arguments['repetitions'])
+
+    def run(self) -> dict:
+        """
+        Returns the mean latency per query in milliseconds for literal and parameterized queries, and the mean time
+        spent on parsing and planning the literal queries.
+        """
+        topics = _get_topics(self.arguments['topics_file'])
+        ranking_method = RobertsonBM25(self.arguments['k1'], self.arguments['b'], self.arguments['n'],
+                                       use_collection_stats=self.db_connection.has_table('collection_stats'))
+        cursor = self.db_connection.cursor
+        query = ranking_method.construct_parameterized_query()
+        literal = self.time_queries(lambda topic: cursor.execute(ranking_method.construct_query(topic)).fetchall(),
+                                    topics)
+        parameterized = self.time_queries(
+            lambda topic: cursor.execute(query, ranking_method.get_parameters(topic)).fetchall(), topics)
+        planning = self.time_queries(
+            lambda topic: cursor.execute('EXPLAIN ' + ranking_method.construct_query(topic)).fetchall(), topics)
+        return {
+            'queries': len(topics),
+            'literal_ms': literal * 1000,
+            'parameterized_ms': parameterized * 1000,
+            'literal_planning_ms': planning * 1000,
+            'saved_ms': (literal - parameterized) * 1000
+        }
+
+
+if __name__ == '__main__':
+    results = ParameterizedQueryBenchmark(**vars(_get_topics_benchmark_parser().parse_args())).run()
+    for key, value in results.items():
+        print(f'{key}: {value}')
@@ -0,0 +1,341 @@
+#! /usr/bin/env python3
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from os import path
+from typing import Any, Dict, List, Tuple
+
+import duckdb
+import numpy as np
+
+from .utils import _time_topics
+from ..connection import close_connection, get_connection
+from ..index import FullTextFromCSV
+from ..resources import get_topics_backgroundlinking
+from ..search import Searcher
+from ..search.term_dictionary import TermDictionary
+
+_TOPICS_DIR = path.join(path.dirname(path.dirname(__file__)), 'resources', 'topics-and-qrels')
+_TOPIC_SETS = {
+    'robust04': 'topics.robust04.processed.txt',
+    'core17': 'topics.core17.processed.txt',
+    'core18': 'topics.core18.processed.txt',
+    'backgroundlinking18': 'topics.backgroundlinking18.processed.txt',
+    'backgroundlinking19': 'topics.backgroundlinking19.processed.txt'
+}
+
+
+class SearchBenchmark:
+    """
+    Class for measuring the search performance of the Searcher on the TREC topics in resources/topics-and-qrels,
+    for every combination of retrieval method and backend. The results can be written as JSON, so they can be
+    compared between releases.
+
+    If the database does not contain a docs table, a test index is generated in it: documents with Zipf distributed
+    terms drawn from the vocabulary of the topics, so every topic has matching postings. The background linking
+    topics are document ids, these documents are added to the test index and the topic is replaced by the
+    background_terms terms of the document with the highest tf-idf, as is usual for background linking.
+
+    For every topic set the following is reported:
+    - cold: the latency of the first search of every topic, on a new Searcher (and for a database file on a newly
+      opened database, so the buffer pool is empty), setup_ms is the time spent on creating the Searcher
+    - warm: the p50/p95/p99 and mean latency over repetitions searches of every topic, and the queries per second
+    - batch: the queries per second when all topics are searched at once with search_topics
+    - memory: the peak memory allocated from Python (tracemalloc, this includes NumPy arrays) while searching the
+      topics once, and the memory used by the DuckDB buffer manager afterwards
+
+    The term_lookup section compares resolving the query terms with the in memory TermDictionary to the lookup in
+    the term_dict table, over the topics of all topic sets.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.arguments = self.get_arguments(kwargs)
+        self.db_connection = get_connection(self.arguments['database'])
+        if not self.db_connection.has_table('docs'):
+            self.build_test_index()
+
+    @staticmethod
+    def get_arguments(kwargs: Any) -> dict:
+        arguments = {
+            'database': ':memory:',
+            'topic_sets': list(_TOPIC_SETS.keys()),
+            'retrieval_methods': ['BM25_robertson', 'BM25_impact'],
+            'backends': ['duckdb', 'numpy'],
+            'k1': 0.9,
+            'b': 0.4,
+            'n': 1000,
+            'return_type': 'numpy',
+            'repetitions': 3,
+            'num_docs': 10000,
+            'vocabulary_size': 20000,
+            'doc_length': 250,
+            'background_terms': 10,
+            'seed': 0,
+            'output': None
+        }
+        for key, item in arguments.items():
+            if kwargs.get(key) is not None:
+                arguments[key] = kwargs.get(key)
+        for topic_set in arguments['topic_sets']:
+            if topic_set not in _TOPIC_SETS:
+                raise IOError(f'unknown topic set {topic_set}')
+        if arguments['repetitions'] < 1:
+            raise IOError('at least one repetition is needed')
+        return arguments
+
+    @staticmethod
+    def get_topics(topic_set: str) -> List[Tuple[str, str]]:
+        return [(qid, topic) for qid, topic in get_topics_backgroundlinking(path.join(_TOPICS_DIR,
+                                                                                      _TOPIC_SETS[topic_set]))]
+
+    def get_configurations(self) -> List[Tuple[str, str]]:
+        """
+        Returns the (retrieval method, backend) pairs to run. BM25_impact is not supported by the numpy backend.
+        """
+        configurations = []
+        for retrieval_method in self.arguments['retrieval_methods']:
+            for backend in self.arguments['backends']:
+                if backend == 'numpy' and retrieval_method == 'BM25_impact':
+                    continue
+                configurations.append((retrieval_method, backend))
+        return configurations
+
+    def build_test_index(self) -> None:
+        rng = np.random.default_rng(self.arguments['seed'])
+        topic_terms = sorted({term for topic_set in self.arguments['topic_sets']
+                              if not topic_set.startswith('backgroundlinking')
+                              for _, topic in self.get_topics(topic_set) for term in topic.split(' ')})
+        vocabulary = topic_terms + [f'term{i}' for i in range(max(self.arguments['vocabulary_size'] -
+                                                                  len(topic_terms), 0))]
+        vocabulary = np.array(vocabulary, dtype=object)[rng.permutation(len(vocabulary))]
+        collection_ids = [qid_doc for topic_set in self.arguments['topic_sets']
+                          if topic_set.startswith('backgroundlinking')
+                          for _, qid_doc in self.get_topics(topic_set)]
+        collection_ids = list(dict.fromkeys(collection_ids))[:self.arguments['num_docs']]
+        collection_ids += [f'doc_{i}' for i in range(len(collection_ids), self.arguments['num_docs'])]
+
+        doc_lengths = rng.integers(1, 2 * self.arguments['doc_length'], len(collection_ids))
+        probabilities = 1 / np.arange(1, len(vocabulary) + 1)
+        tokens = rng.choice(len(vocabulary), int(doc_lengths.sum()), p=probabilities / probabilities.sum())
+        postings, tfs = np.unique(np.repeat(np.arange(len(collection_ids)), doc_lengths).astype(np.int64) *
+                                  len(vocabulary) + tokens, return_counts=True)
+        term_ids, doc_ids = postings % len(vocabulary), postings // len(vocabulary)
+        dfs = np.bincount(term_ids, minlength=len(vocabulary))
+
+        with tempfile.TemporaryDirectory() as directory:
+            files = {name: path.join(directory, name + '.csv') for name in ['docs', 'term_dict', 'term_doc']}
+            with open(files['docs'], 'w') as docs_file:
+                docs_file.writelines(f'{collection_id}|{doc_id}|{doc_length}\n' for doc_id, (collection_id, doc_length)
+                                     in enumerate(zip(collection_ids, doc_lengths.tolist())))
+            with open(files['term_dict'], 'w') as term_dict_file:
+                term_dict_file.writelines(f'{term_id}|{string}|{df}\n' for term_id, (string, df)
+                                          in enumerate(zip(vocabulary.tolist(), dfs.tolist())) if df > 0)
+            with open(files['term_doc'], 'w') as term_doc_file:
+                term_doc_file.writelines(f'{term_id}|{doc_id}|{tf}\n' for term_id, doc_id, tf
+                                         in zip(term_ids.tolist(), doc_ids.tolist(), tfs.tolist()))
+            loader = FullTextFromCSV(database=self.arguments['database'],
+                                     use_existing_db=path.isfile(self.arguments['database']),
+                                     docs_file=files['docs'],
+                                     term_dict_file=files['term_dict'],
+                                     term_doc_file=files['term_doc'])
+            loader.create_tables()
+            loader.fill_tables()
+
+    def get_background_linking_query(self, collection_id: str) -> str:
+        cursor = self.db_connection.cursor
+        cursor.execute('SELECT term_dict.string '
+                       'FROM docs '
+                       'JOIN term_doc ON term_doc.doc_id = docs.doc_id '
+                       'JOIN term_dict ON term_dict.term_id = term_doc.term_id '
+                       'WHERE docs.collection_id = $collection_id '
+                       'ORDER BY term_doc.tf * LOG((SELECT COUNT(*) FROM docs) / term_dict.df) DESC, '
+                       'term_dict.string '
+                       'LIMIT $background_terms;',
+                       {'collection_id': collection_id, 'background_terms': self.arguments['background_terms']})
+        return ' '.join(string for string, in cursor.fetchall())
+
+    def load_topics(self) -> Dict[str, List[Tuple[str, str]]]:
+        topic_sets = {}
+        for topic_set in self.arguments['topic_sets']:
+            topics = self.get_topics(topic_set)
+            if topic_set.startswith('backgroundlinking'):
+                topics = [(qid, self.get_background_linking_query(collection_id)) for qid, collection_id in topics]
+            topic_sets[topic_set] = [(qid, topic) for qid, topic in topics if topic != '']
+        return topic_sets
+
+    @staticmethod
+    def get_latency_metrics(latencies: List[float]) -> dict:
+        latencies = np.array(latencies) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+        return {
+            'mean_ms': float(latencies.mean()),
+            'p50_ms': p50,
+            'p95_ms': p95,
+            'p99_ms': p99,
+            'qps': float(1000 / latencies.mean())
+        }
+
+    @staticmethod
+    def time_topics(searcher: Searcher, topics: List[Tuple[str, str]]) -> List[float]:
+        latencies = []
+        for _, topic in topics:
+            start = time.perf_counter()
+            searcher.search_topic(topic)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    def get_duckdb_memory(self) -> Any:
+        try:
+            self.db_connection.cursor.execute('SELECT SUM(memory_usage_bytes) FROM duckdb_memory();')
+            return int(self.db_connection.cursor.fetchone()[0])
+        except duckdb.Error:
+            return None
+
+    def run_configuration(self, retrieval_method: str, backend: str,
+                          topic_sets: Dict[str, List[Tuple[str, str]]]) -> List[dict]:
+        if path.isfile(self.arguments['database']):
+            close_connection(self.arguments['database'])
+            self.db_connection = get_connection(self.arguments['database'])
+        start = time.perf_counter()
+        searcher = Searcher(database=self.arguments['database'], retrieval_method=retrieval_method, backend=backend,
+                            k1=self.arguments['k1'], b=self.arguments['b'], n=self.arguments['n'],
+                            return_type=self.arguments['return_type'])
+        setup = time.perf_counter() - start
+        results = []
+        for topic_set, topics in topic_sets.items():
+            cold = self.time_topics(searcher, topics)
+            warm = []
+            batch = []
+            for _ in range(self.arguments['repetitions']):
+                warm += self.time_topics(searcher, topics)
+                start = time.perf_counter()
+                searcher.search_topics(topics)
+                batch.append(time.perf_counter() - start)
+            tracemalloc.start()
+            self.time_topics(searcher, topics)
+            peak_python_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append({
+                'topic_set': topic_set,
+                'retrieval_method': retrieval_method,
+                'backend': backend,
+                'queries': len(topics),
+                'setup_ms': setup * 1000,
+                'cold': self.get_latency_metrics(cold),
+                'warm': self.get_latency_metrics(warm),
+                'batch_qps': float(len(topics) / np.median(batch)),
+                'peak_python_memory_bytes': peak_python_memory,
+                'duckdb_memory_bytes': self.get_duckdb_memory()
+            })
+        return results
+
+    def time_term_lookup(self, topic_sets: Dict[str, List[Tuple[str, str]]]) -> dict:
+        """
+        Returns the memory used by the TermDictionary (and by a fixed width array of the terms for comparison), the
+        time to load it, and the mean time to resolve the terms of a topic in memory and with a SQL query.
+        """
+        topics = [topic for topics in topic_sets.values() for _, topic in topics]
+        start = time.perf_counter()
+        term_dictionary = TermDictionary(self.db_connection)
+        load = time.perf_counter() - start
+        max_length = int(np.diff(term_dictionary.offsets.astype(np.int64)).max()) if len(term_dictionary) > 0 else 0
+        cursor = self.db_connection.cursor
+        in_memory = _time_topics(lambda topic: term_dictionary.lookup(topic.split(' ')), topics,
+                                 self.arguments['repetitions'])
+        sql = _time_topics(lambda topic: cursor.execute('SELECT term_id, df FROM term_dict '
+                                                        'WHERE list_contains($terms, string);',
+                                                        {'terms': topic.split(' ')}).fetchall(),
+                           topics, self.arguments['repetitions'])
+        return {
+            'terms': len(term_dictionary),
+            'memory_bytes': term_dictionary.get_memory_usage(),
+            'fixed_width_memory_bytes': len(term_dictionary) * max_length + term_dictionary.term_ids.nbytes +
+            term_dictionary.dfs.nbytes,
+            'load_ms': load * 1000,
+            'in_memory_mean_ms': in_memory * 1000,
+            'sql_mean_ms': sql * 1000
+        }
+
+    def run(self) -> dict:
+        """
+        Returns the environment of the benchmark and its results per topic set, retrieval method and backend, and
+        writes them as JSON to the output file if one is given.
+        """
+        topic_sets = self.load_topics()
+        results = []
+        for retrieval_method, backend in self.get_configurations():
+            results += self.run_configuration(retrieval_method, backend, topic_sets)
+        self.db_connection.cursor.execute('SELECT COUNT(*) FROM docs;')
+        report = {
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'duckdb': duckdb.__version__,
+                'numpy': np.__version__
+            },
+            'settings': {key: item for key, item in self.arguments.items() if key != 'output'},
+            'indexed_docs': self.db_connection.cursor.fetchone()[0],
+            'results': results,
+            'term_lookup': self.time_term_lookup(topic_sets)
+        }
+        if self.arguments['output'] is not None:
+            with open(self.arguments['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+        return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d',
+                        '--database',
+                        metavar='[file]',
+                        help='Location of the database, a test index is generated in it if it does not contain a '
+                             'docs table. By default an in-memory test index is used.')
+    parser.add_argument('-t',
+                        '--topic_sets',
+                        nargs='+',
+                        choices=list(_TOPIC_SETS.keys()),
+                        help='The bundled topic sets to run, by default all of them.')
+    parser.add_argument('-m',
+                        '--retrieval_methods',
+                        nargs='+',
+                        choices=['BM25_robertson', 'BM25_impact'])
+    parser.add_argument('--backends',
+                        nargs='+',
+                        choices=['duckdb', 'numpy'])
+    parser.add_argument('-k1', type=float)
+    parser.add_argument('-b', type=float)
+    parser.add_argument('-n', type=int)
+    parser.add_argument('--return_type',
+                        choices=['numpy', 'data_frame', 'list', 'arrow'])
+    parser.add_argument('-r',
+                        '--repetitions',
+                        type=int,
+                        help='Number of times every topic is searched warm.')
+    parser.add_argument('--num_docs',
+                        type=int,
+                        help='Number of documents in the generated test index.')
+    parser.add_argument('--vocabulary_size',
+                        type=int,
+                        help='Number of terms in the generated test index.')
+    parser.add_argument('--doc_length',
+                        type=int,
+                        help='Average document length in the generated test index.')
+    parser.add_argument('--background_terms',
+                        type=int,
+                        help='Number of terms in the queries for the background linking topics.')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('-o',
+                        '--output',
+                        metavar='[file]',
+                        help='JSON file the results are written to.')
+    args = parser.parse_args()
+    report = SearchBenchmark(**vars(args)).run()
+    if args.output is None:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,69 @@
+import argparse
+import time
+from typing import Any, Callable, List
+
+from ..resources import get_topics_backgroundlinking
+
+
+def _get_topics_benchmark_arguments(kwargs: Any) -> dict:
+    """
+    Returns the arguments of a benchmark that searches the topics of a topics file on a database.
+    """
+    arguments = {
+        'database': None,
+        'topics_file': None,
+        'k1': 0.9,
+        'b': 0.4,
+        'n': 1000,
+        'repetitions': 3
+    }
+    for key, item in arguments.items():
+        if kwargs.get(key) is not None:
+            arguments[key] = kwargs.get(key)
+    if arguments['database'] is None:
+        raise IOError('database path needs to be provided')
+    if arguments['topics_file'] is None:
+        raise IOError('topics file needs to be provided')
+    if arguments['repetitions'] < 1:
+        raise IOError('at least one repetition is needed')
+    return arguments
+
+
+def _get_topics(topics_file: str) -> List[str]:
+    return [topic for _, topic in get_topics_backgroundlinking(topics_file)]
+
+
+def _time_topics(execute: Callable[[str], Any], topics: List[str], repetitions: int) -> float:
+    """
+    Returns the mean time in seconds of execute per topic. Every topic is executed once before the timing starts,
+    so all variants are measured with warm caches.
+    """
+    for topic in topics:
+        execute(topic)
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for topic in topics:
+            execute(topic)
+    return (time.perf_counter() - start) / (repetitions * len(topics))
+
+
+def _get_topics_benchmark_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d',
+                        '--database',
+                        required=True,
+                        metavar='[file]',
+                        help='Location of the database.')
+    parser.add_argument('-t',
+                        '--topics_file',
+                        required=True,
+                        metavar='[file]',
+                        help='File with one topic per line formatted as id:topic.')
+    parser.add_argument('-k1', type=float)
+    parser.add_argument('-b', type=float)
+    parser.add_argument('-n', type=int)
+    parser.add_argument('-r',
+                        '--repetitions',
+                        type=int,
+                        help='Number of times every topic is searched.')
+    return parser
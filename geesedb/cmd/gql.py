@@ -12,15 +12,16 @@ class GQL(cmd.Cmd):
 
     def __init__(self, **kwargs: Any) -> None:
         self.arguments = self.get_arguments(kwargs)
-        self.db_connection = get_connection(self.arguments['database'])
-        self.translator = Translator(self.arguments['database'])
+        self.db_connection = get_connection(self.arguments['database'], self.arguments['read_only'])
+        self.translator = Translator(self.arguments['database'], self.arguments['read_only'])
         self.cursor = self.db_connection.cursor
         super(GQL, self).__init__()
 
     @staticmethod
     def get_arguments(kwargs: Any) -> dict:
         arguments = {
-            'database': None
+            'database': None,
+            'read_only': False
         }
         for key, item in arguments.items():
             if kwargs.get(key) is not None:
@@ -56,4 +57,7 @@ if __name__ == '__main__':
                         required=True,
                         metavar='[file]',
                         help='Location of the database.')
+    parser.add_argument('--read_only',
+                        action='store_true',
+                        help='Open the database in read-only mode.')
     GQL(**vars(parser.parse_args())).cmdloop()
@@ -1,3 +1,5 @@
-from .connection import get_connection, close_connection
+from .connection import ConnectionPool, DBConnection, get_connection, get_database_cache, release_connection, \
+    close_connection
 
-__all__ = ['get_connection', 'close_connection']
+__all__ = ['ConnectionPool', 'DBConnection', 'get_connection', 'get_database_cache', 'release_connection',
+           'close_connection']
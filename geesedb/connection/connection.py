@@ -1,24 +1,146 @@
+import threading
+from os import path
+from typing import Dict, Union
+
 import duckdb
 
-_db_connection = None
 
+class DBConnection(object):
+    """
+    The DuckDB connections a single thread uses for a database. Both the connection and the cursor are cursors of
+    the database connection kept by the ConnectionPool, so they share the database, but each has its own
+    transaction and result set.
+    """
 
-def get_connection(database):
-    global _db_connection
-    if not _db_connection:
-        _db_connection = DBConnection(database)
-    return _db_connection
+    def __init__(self, database: Union[str, duckdb.DuckDBPyConnection], read_only: bool = False) -> None:
+        if isinstance(database, duckdb.DuckDBPyConnection):
+            self.connection = database.cursor()
+        else:
+            self.connection = duckdb.connect(database, read_only=read_only)
+        self.cursor = self.connection.cursor()
+        self.read_only = read_only
 
+    def has_table(self, table_name: str) -> bool:
+        self.cursor.execute('SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?;', [table_name])
+        return self.cursor.fetchone()[0] > 0
 
-def close_connection():
-    global _db_connection
-    if _db_connection:
-        _db_connection.connection.close()
-    _db_connection = None
+    def get_index_version(self) -> int:
+        """
+        Returns the version number of the index, the loaders and the FullTextUpdater increment it on every change.
+        """
+        try:
+            self.cursor.execute('SELECT MAX(version) FROM index_version;')
+        except duckdb.CatalogException:
+            return 0
+        return self.cursor.fetchone()[0] or 0
 
+    def close(self) -> None:
+        self.cursor.close()
+        self.connection.close()
 
-class DBConnection(object):
 
-    def __init__(self, database: str) -> None:
-        self.connection = duckdb.connect(database)
-        self.cursor = self.connection.cursor()
+class _PooledDatabase(object):
+    """
+    The DBConnections of the threads are kept in thread local storage, so the connection of a thread is closed
+    when the thread exits, e.g. when the workers of a thread pool are shut down.
+    """
+
+    def __init__(self, database: str, read_only: bool) -> None:
+        self.read_only = read_only
+        self.connection = duckdb.connect(database, read_only=read_only)
+        self.thread_connections = threading.local()
+        self.cache = {}
+
+
+class ConnectionPool(object):
+    """
+    Keeps one DuckDB connection per opened database, and hands out a DBConnection per thread per database. Queries
+    from different threads therefore run on their own cursors, while all of them use the same database instance.
+
+    A database file can be opened in read-only mode, which allows other processes to open it read-only as well.
+    DuckDB does not allow one process to open the same file both read-only and read-write.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.databases: Dict[str, _PooledDatabase] = {}
+
+    @staticmethod
+    def get_key(database: str) -> str:
+        if database == ':memory:' or database.startswith(':memory:'):
+            return database
+        return path.abspath(database)
+
+    def get_connection(self, database: str, read_only: bool = False) -> DBConnection:
+        key = self.get_key(database)
+        with self.lock:
+            pooled_database = self.databases.get(key)
+            if pooled_database is None:
+                pooled_database = _PooledDatabase(database, read_only)
+                self.databases[key] = pooled_database
+            elif read_only and not pooled_database.read_only:
+                raise IOError(f'database {database} is already opened in read-write mode')
+            elif not read_only and pooled_database.read_only:
+                raise IOError(f'database {database} is already opened in read-only mode')
+            db_connection = getattr(pooled_database.thread_connections, 'db_connection', None)
+            if db_connection is None:
+                db_connection = DBConnection(pooled_database.connection, pooled_database.read_only)
+                pooled_database.thread_connections.db_connection = db_connection
+            return db_connection
+
+    def get_cache(self, database: str) -> dict:
+        """
+        Returns the cache of an opened database, a dict shared by all threads for data derived from the database
+        (e.g. the graph metadata). It is dropped when the database is closed.
+        """
+        with self.lock:
+            pooled_database = self.databases.get(self.get_key(database))
+            if pooled_database is None:
+                raise IOError(f'database {database} is not opened')
+            return pooled_database.cache
+
+    def release_connection(self, database: str) -> None:
+        """
+        Closes the DBConnection of the calling thread, the database itself stays open for the other threads.
+        """
+        with self.lock:
+            pooled_database = self.databases.get(self.get_key(database))
+            if pooled_database is None:
+                return
+            db_connection = getattr(pooled_database.thread_connections, 'db_connection', None)
+            if db_connection is not None:
+                del pooled_database.thread_connections.db_connection
+                db_connection.close()
+
+    def close(self, database: str = None) -> None:
+        """
+        Closes a database and the DBConnections of all threads using it, or every database if none is given.
+        """
+        with self.lock:
+            if database is None:
+                keys = list(self.databases.keys())
+            else:
+                keys = [self.get_key(database)]
+            for key in keys:
+                pooled_database = self.databases.pop(key, None)
+                if pooled_database is not None:
+                    pooled_database.connection.close()
+
+
+_connection_pool = ConnectionPool()
+
+
+def get_connection(database: str, read_only: bool = False) -> DBConnection:
+    return _connection_pool.get_connection(database, read_only)
+
+
+def get_database_cache(database: str) -> dict:
+    return _connection_pool.get_cache(database)
+
+
+def release_connection(database: str) -> None:
+    _connection_pool.release_connection(database)
+
+
+def close_connection(database: str = None) -> None:
+    _connection_pool.close(database)
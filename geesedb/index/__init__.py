@@ -1,6 +1,11 @@
+from .adjacency_from_meta import AdjacencyFromMeta
 from .authors_from_csv import AuthorsFromCSV
 from .entities_from_csv import EntitiesFromCSV
 from .fulltext_from_ciff import FullTextFromCiff
 from .fulltext_from_csv import FullTextFromCSV
+from .fulltext_from_parquet import FullTextFromParquet
+from .fulltext_updater import FullTextUpdater
+from .impacts_from_term_doc import ImpactsFromTermDoc
 
-__all__ = ['FullTextFromCSV', 'AuthorsFromCSV', 'FullTextFromCiff', 'EntitiesFromCSV']
+__all__ = ['FullTextFromCSV', 'AuthorsFromCSV', 'FullTextFromCiff', 'EntitiesFromCSV', 'FullTextFromParquet',
+           'FullTextUpdater', 'ImpactsFromTermDoc', 'AdjacencyFromMeta']
@@ -0,0 +1,168 @@
+#! /usr/bin/env python3
+
+import argparse
+import json
+import os
+from os import path
+from typing import Any, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..connection import get_connection
+
+
+class AdjacencyFromMeta:
+    """
+    Class for materializing the edge tables described in _meta as compressed sparse row (CSR) adjacency structures,
+    so neighbours are found by slicing arrays instead of joining the whole edge table.
+
+    The distinct values of each of the two key columns of an edge table get dense ids, in sorted order, stored in
+    the {edge_table}_{column}_vertices table (id, value). For both directions the edges are sorted on the ids of the
+    source column, the neighbours of vertex i are neighbors[offsets[i]:offsets[i + 1]], sorted on id. The offsets
+    and neighbors arrays are stored in the {edge_table}_{column}_offsets (id, position) and
+    {edge_table}_{column}_neighbors (position, neighbor) tables, or with storage='numpy' as
+    {edge_table}.{column}.offsets.npy and {edge_table}.{column}.neighbors.npy files in directory, that can be
+    memory-mapped. The adjacency_meta table keeps the storage and the index version of every edge table, so
+    outdated structures can be detected.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.arguments = self.get_arguments(kwargs)
+        self.db_connection = get_connection(self.arguments['database'])
+        self.connection = self.db_connection.connection
+
+    @staticmethod
+    def get_arguments(kwargs: Any) -> dict:
+        arguments = {
+            'database': None,
+            'storage': 'duckdb',
+            'directory': None,
+            'edge_tables': None
+        }
+        for key, item in arguments.items():
+            if kwargs.get(key) is not None:
+                arguments[key] = kwargs.get(key)
+        if arguments['database'] is None:
+            raise IOError('database path needs to be provided')
+        if arguments['storage'] not in {'duckdb', 'numpy'}:
+            raise IOError('storage should be duckdb or numpy')
+        if arguments['storage'] == 'numpy' and arguments['directory'] is None:
+            raise IOError('a directory needs to be provided for the numpy storage')
+        return arguments
+
+    def get_edges(self) -> List[Tuple[str, str, str]]:
+        """
+        Returns the (edge table, column, column) triples of the edge tables in _meta, every table once.
+        """
+        self.connection.execute('SELECT metadata FROM _meta;')
+        metadata = json.loads(self.connection.fetchone()[0])
+        edges = []
+        for from_node, to_nodes in metadata.items():
+            for to_node, join_info in to_nodes.items():
+                for join_table, _, join_table_fnk, join_table_tnk, _ in join_info:
+                    edge = (join_table, *sorted([join_table_fnk, join_table_tnk]))
+                    if edge not in edges and (self.arguments['edge_tables'] is None or
+                                              join_table in self.arguments['edge_tables']):
+                        edges.append(edge)
+        return edges
+
+    @staticmethod
+    def get_adjacency_meta(connection: Any, edge_table: str) -> Union[dict, None]:
+        """
+        Returns the columns, storage and index version of the adjacency of an edge table, or None if there is none.
+        """
+        connection.execute("SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'adjacency_meta';")
+        if connection.fetchone()[0] == 0:
+            return None
+        connection.execute('SELECT column_a, column_b, storage, directory, version FROM adjacency_meta '
+                           'WHERE edge_table = ?;', [edge_table])
+        row = connection.fetchone()
+        if row is None:
+            return None
+        return dict(zip(['column_a', 'column_b', 'storage', 'directory', 'version'], row))
+
+    @staticmethod
+    def get_csr(source_ids: np.ndarray, target_ids: np.ndarray, n_sources: int) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.lexsort((target_ids, source_ids))
+        offsets = np.zeros(n_sources + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source_ids, minlength=n_sources), out=offsets[1:])
+        return offsets, target_ids[order]
+
+    def store_csr(self, edge_table: str, column: str, offsets: np.ndarray, neighbors: np.ndarray) -> None:
+        if self.arguments['storage'] == 'numpy':
+            np.save(path.join(self.arguments['directory'], f'{edge_table}.{column}.offsets.npy'), offsets)
+            np.save(path.join(self.arguments['directory'], f'{edge_table}.{column}.neighbors.npy'), neighbors)
+            return
+        self.connection.register('csr_offsets', pd.DataFrame({'id': np.arange(len(offsets)), 'position': offsets}))
+        self.connection.register('csr_neighbors', pd.DataFrame({'position': np.arange(len(neighbors)),
+                                                                'neighbor': neighbors}))
+        self.connection.execute(f'CREATE OR REPLACE TABLE {edge_table}_{column}_offsets AS '
+                                f'SELECT id, position FROM csr_offsets ORDER BY id;')
+        self.connection.execute(f'CREATE OR REPLACE TABLE {edge_table}_{column}_neighbors AS '
+                                f'SELECT position, neighbor FROM csr_neighbors ORDER BY position;')
+        self.connection.unregister('csr_offsets')
+        self.connection.unregister('csr_neighbors')
+
+    def create_adjacency(self) -> None:
+        directory = None
+        if self.arguments['storage'] == 'numpy':
+            directory = path.abspath(self.arguments['directory'])
+            os.makedirs(directory, exist_ok=True)
+        version = self.db_connection.get_index_version()
+        self.connection.execute('CREATE TABLE IF NOT EXISTS adjacency_meta (edge_table VARCHAR, column_a VARCHAR, '
+                                'column_b VARCHAR, storage VARCHAR, directory VARCHAR, version BIGINT);')
+        for edge_table, column_a, column_b in self.get_edges():
+            self.connection.begin()
+            try:
+                for column in [column_a, column_b]:
+                    self.connection.execute(f'CREATE OR REPLACE TABLE {edge_table}_{column}_vertices AS '
+                                            f'SELECT (ROW_NUMBER() OVER (ORDER BY {column}) - 1) AS id, '
+                                            f'{column} AS value '
+                                            f'FROM (SELECT DISTINCT {column} FROM {edge_table} '
+                                            f'WHERE {column} IS NOT NULL) '
+                                            f'ORDER BY id;')
+                self.connection.execute(f'SELECT a.id AS id_a, b.id AS id_b '
+                                        f'FROM {edge_table} AS edges '
+                                        f'JOIN {edge_table}_{column_a}_vertices AS a ON edges.{column_a} = a.value '
+                                        f'JOIN {edge_table}_{column_b}_vertices AS b ON edges.{column_b} = b.value;')
+                edges = self.connection.fetchnumpy()
+                n = {}
+                for column in [column_a, column_b]:
+                    self.connection.execute(f'SELECT COUNT(*) FROM {edge_table}_{column}_vertices;')
+                    n[column] = self.connection.fetchone()[0]
+                dtype = np.int32 if max(n.values(), default=0) < np.iinfo(np.int32).max else np.int64
+                ids_a = np.asarray(edges['id_a'], dtype=dtype)
+                ids_b = np.asarray(edges['id_b'], dtype=dtype)
+                self.store_csr(edge_table, column_a, *self.get_csr(ids_a, ids_b, n[column_a]))
+                self.store_csr(edge_table, column_b, *self.get_csr(ids_b, ids_a, n[column_b]))
+                self.connection.execute('DELETE FROM adjacency_meta WHERE edge_table = ?;', [edge_table])
+                self.connection.execute('INSERT INTO adjacency_meta VALUES (?, ?, ?, ?, ?, ?);',
+                                        [edge_table, column_a, column_b, self.arguments['storage'], directory,
+                                         version])
+                self.connection.commit()
+            except Exception:
+                self.connection.rollback()
+                raise
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d',
+                        '--database',
+                        required=True,
+                        metavar='[file]',
+                        help='Location of the database.')
+    parser.add_argument('-s',
+                        '--storage',
+                        choices=['duckdb', 'numpy'],
+                        help='Store the arrays in DuckDB tables or in NumPy files.')
+    parser.add_argument('--directory',
+                        metavar='[directory]',
+                        help='Directory for the NumPy files.')
+    parser.add_argument('-e',
+                        '--edge_tables',
+                        nargs='+',
+                        metavar='[string]',
+                        help='The edge tables to materialize, by default all edge tables in _meta.')
+    AdjacencyFromMeta(**vars(parser.parse_args())).create_adjacency()
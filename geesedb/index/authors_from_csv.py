@@ -2,7 +2,7 @@ import argparse
 import os
 from typing import Any
 
-from .utils import _create_table, _fill_empty_table_with_csv
+from .utils import _bump_index_version, _create_table, _fill_empty_table_with_csv
 from ..connection import get_connection
 
 
@@ -30,6 +30,7 @@ class AuthorsFromCSV:
                           self._COLUMN_TYPES)
         _fill_empty_table_with_csv(self.connection, self.arguments['table_name'], self.arguments['doc_author_file'],
                                    self.arguments['delimiter'])
+        _bump_index_version(self.connection)
 
     @staticmethod
     def get_arguments(kwargs: Any) -> dict:
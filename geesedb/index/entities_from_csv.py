@@ -4,7 +4,7 @@ import argparse
 import os
 from typing import Any
 
-from .utils import _fill_empty_table_with_csv, _create_table
+from .utils import _fill_empty_table_with_csv, _create_table, _bump_index_version
 from ..connection import get_connection
 
 
@@ -34,6 +34,7 @@ class EntitiesFromCSV:
                           self._COLUMN_TYPES)
         _fill_empty_table_with_csv(self.connection, self.arguments['table_name'], self.arguments['entity_doc_file'],
                                    self.arguments['delimiter'])
+        _bump_index_version(self.connection)
 
     @staticmethod
     def get_arguments(kwargs: Any) -> dict:
@@ -1,13 +1,19 @@
 #! /usr/bin/env python3
 
 import argparse
-import gzip
 import os
+import tempfile
 import duckdb
-from typing import Any, List, Union, Tuple
-from ciff_toolkit.read import CiffReader
+import numpy as np
+import pandas as pd
+from typing import Any, Iterable, List, Union, Tuple
+from ciff_toolkit.ciff_pb2 import DocRecord, PostingsList
+from tqdm import tqdm
 
+from .utils import _bump_index_version, _update_collection_stats
 from ..connection import get_connection
+from ..utils.ciff.reader import CiffStreamReader
+from ..utils.ciff.shards import map_postings_lists_shards, parse_postings_lists
 
 
 class FullTextFromCiff:
@@ -52,7 +58,11 @@ class FullTextFromCiff:
             'columns_names_docs': ['collection_id', 'doc_id', 'len'],
             'columns_names_term_dict': ['term_id', 'df', 'string'],
             'columns_names_term_doc': ['term_id', 'doc_id', 'tf'],
-            'protobuf_file': None
+            'protobuf_file': None,
+            'batch_size': 100000,
+            'workers': 1,
+            'shard_size': 10000,
+            'verbose': False
         }
         for key, item in arguments.items():
             if kwargs.get(key) is not None:
@@ -102,43 +112,151 @@ class FullTextFromCiff:
                 raise IOError('Too many bytes when decoding.')
 
     def fill_tables(self) -> None:
-        if self.arguments['protobuf_file'].endswith('.gz'):
-            with gzip.open(self.arguments['protobuf_file'], 'rb') as f:
-                data = f.read()
-        else:
-            with open(self.arguments['protobuf_file'], 'rb') as f:
-                data = f.read()
-
-        with CiffReader(self.arguments['protobuf_file']) as reader:
-            for term_id, postings_list in enumerate(reader.read_postings_lists()):
-                self.connection.begin()
-                q = f'INSERT INTO {self.arguments["table_names"][1]} ' \
-                    f'({",".join(self.arguments["columns_names_term_dict"])}) ' \
-                    f"VALUES ({term_id},{postings_list.df},'{postings_list.term}')"
-                try:
-                    self.cursor.execute(q)
-                except RuntimeError:
-                    print(q)
-
-                docid = 0
-                for posting in postings_list.postings:
-                    docid += posting.docid
-                    q = f'INSERT INTO {self.arguments["table_names"][2]} ' \
-                        f'({",".join(self.arguments["columns_names_term_doc"])}) ' \
-                        f'VALUES ({term_id},{docid},{posting.tf})'
-                    self.cursor.execute(q)
-                self.connection.commit()
-
-            self.connection.begin()
-            for n, doc_record in enumerate(reader.read_documents()):
-                if n % 1000 == 0:
-                    self.connection.commit()
-                    self.connection.begin()
-                q = f'INSERT INTO {self.arguments["table_names"][0]} ' \
-                    f'({",".join(self.arguments["columns_names_docs"])}) ' \
-                    f"VALUES ('{doc_record.collection_docid}',{doc_record.docid},{doc_record.doclength})"
-                self.cursor.execute(q)
+        """
+        The postings, the documents, the collection stats and the index version are written in a single
+        transaction, so a failed load leaves the tables as they were.
+        """
+        disable_tqdm = not self.arguments['verbose']
+        self.connection.begin()
+        try:
+            with CiffStreamReader(self.arguments['protobuf_file']) as reader:
+                with tqdm(desc=self.arguments['table_names'][2], unit=' rows', unit_scale=True,
+                          disable=disable_tqdm) as progress:
+                    if self.arguments['workers'] > 1:
+                        self.fill_term_tables_parallel(reader, progress)
+                    else:
+                        self.fill_term_tables(reader.read_postings_lists(), progress)
+                with tqdm(desc=self.arguments['table_names'][0], unit=' rows', unit_scale=True,
+                          disable=disable_tqdm) as progress:
+                    self.fill_docs_table(reader.read_documents(), progress)
+            _update_collection_stats(self.connection, self.arguments['table_names'][0],
+                                     self.arguments['columns_names_docs'][2], self.arguments['table_names'][1])
+            _bump_index_version(self.connection)
             self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+    def fill_term_tables(self, postings_lists: Iterable[PostingsList], progress: tqdm) -> None:
+        """
+        Decodes the postings lists into column buffers, which are appended to the term_dict and term_doc
+        tables once they hold at least batch_size rows.
+        """
+        batch_size = self.arguments['batch_size']
+        term_dict_buffer = ([], [], [])
+        term_doc_buffer = ([], [], [])
+        n_postings = 0
+        for term_id, postings_list in enumerate(postings_lists):
+            term_dict_buffer[0].append(term_id)
+            term_dict_buffer[1].append(postings_list.df)
+            term_dict_buffer[2].append(postings_list.term)
+            if len(term_dict_buffer[0]) >= batch_size:
+                self.append_term_dict(term_dict_buffer)
+                term_dict_buffer = ([], [], [])
+
+            for column, values in zip(term_doc_buffer, self.decode_postings(term_id, postings_list)):
+                column.append(values)
+            n_postings += len(postings_list.postings)
+            if n_postings >= batch_size:
+                self.append_term_doc(term_doc_buffer)
+                progress.update(n_postings)
+                term_doc_buffer = ([], [], [])
+                n_postings = 0
+
+        if len(term_dict_buffer[0]) > 0:
+            self.append_term_dict(term_dict_buffer)
+        if n_postings > 0:
+            self.append_term_doc(term_doc_buffer)
+            progress.update(n_postings)
+
+    def fill_term_tables_parallel(self, reader: CiffStreamReader, progress: tqdm) -> None:
+        """
+        Every shard of terms is decoded by a worker process into its own part file, the part files are appended
+        to the term_dict and term_doc tables in term order.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            shards = map_postings_lists_shards(reader, _decode_shard, self.arguments['workers'],
+                                               self.arguments['shard_size'], directory)
+            for part in shards:
+                with np.load(part) as shard:
+                    self.append_term_dict((shard['term_ids'], shard['dfs'], shard['strings']))
+                    self.append_term_doc(([shard['term_doc_term_ids']], [shard['doc_ids']], [shard['tfs']]))
+                    progress.update(len(shard['doc_ids']))
+                os.remove(part)
+
+    @staticmethod
+    def decode_postings(term_id: int, postings_list: PostingsList) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        postings = np.array([(posting.docid, posting.tf) for posting in postings_list.postings],
+                            dtype=np.int64).reshape(-1, 2)
+        return (np.full(len(postings), term_id, dtype=np.int32),
+                np.cumsum(postings[:, 0]).astype(np.int32),
+                postings[:, 1].astype(np.int32))
+
+    def fill_docs_table(self, doc_records: Iterable[DocRecord], progress: tqdm) -> None:
+        batch_size = self.arguments['batch_size']
+        docs_buffer = ([], [], [])
+        for doc_record in doc_records:
+            docs_buffer[0].append(doc_record.collection_docid)
+            docs_buffer[1].append(doc_record.docid)
+            docs_buffer[2].append(doc_record.doclength)
+            if len(docs_buffer[0]) >= batch_size:
+                self.append_docs(docs_buffer)
+                progress.update(len(docs_buffer[0]))
+                docs_buffer = ([], [], [])
+        if len(docs_buffer[0]) > 0:
+            self.append_docs(docs_buffer)
+            progress.update(len(docs_buffer[0]))
+
+    def append_term_dict(self, buffer: Tuple[list, list, list]) -> None:
+        term_ids, dfs, strings = buffer
+        self.append_chunk(self.arguments['table_names'][1], self.arguments['columns_names_term_dict'], [
+            np.array(term_ids, dtype=np.int32),
+            np.array(dfs, dtype=np.int32),
+            np.array(strings, dtype=object)
+        ])
+
+    def append_term_doc(self, buffer: Tuple[list, list, list]) -> None:
+        self.append_chunk(self.arguments['table_names'][2], self.arguments['columns_names_term_doc'],
+                          [np.concatenate(column) for column in buffer])
+
+    def append_docs(self, buffer: Tuple[list, list, list]) -> None:
+        collection_ids, doc_ids, lengths = buffer
+        self.append_chunk(self.arguments['table_names'][0], self.arguments['columns_names_docs'], [
+            np.array(collection_ids, dtype=object),
+            np.array(doc_ids, dtype=np.int32),
+            np.array(lengths, dtype=np.int32)
+        ])
+
+    def append_chunk(self, table_name: str, column_names: List[str], columns: List[np.ndarray]) -> None:
+        """
+        Appends a chunk of columns to a table in a single statement on the connection of the load transaction, the
+        columns are expected in the order of the column names.
+        """
+        chunk = pd.DataFrame(dict(zip(column_names, columns)), copy=False)
+        self.connection.register('ciff_chunk', chunk)
+        self.connection.execute(f'INSERT INTO {table_name} ({", ".join(column_names)}) '
+                                f'SELECT {", ".join(column_names)} FROM ciff_chunk;')
+        self.connection.unregister('ciff_chunk')
+
+
+def _decode_shard(shard_id: int, first_term_id: int, serialized: list, directory: str) -> str:
+    term_dict_columns = ([], [], [])
+    term_doc_columns = ([], [], [])
+    for term_id, postings_list in enumerate(parse_postings_lists(serialized), first_term_id):
+        term_dict_columns[0].append(term_id)
+        term_dict_columns[1].append(postings_list.df)
+        term_dict_columns[2].append(postings_list.term)
+        for column, values in zip(term_doc_columns, FullTextFromCiff.decode_postings(term_id, postings_list)):
+            column.append(values)
+    part = os.path.join(directory, f'shard_{shard_id}.npz')
+    np.savez(part,
+             term_ids=np.array(term_dict_columns[0], dtype=np.int32),
+             dfs=np.array(term_dict_columns[1], dtype=np.int32),
+             strings=np.array(term_dict_columns[2], dtype=str),
+             term_doc_term_ids=np.concatenate(term_doc_columns[0]),
+             doc_ids=np.concatenate(term_doc_columns[1]),
+             tfs=np.concatenate(term_doc_columns[2]))
+    return part
 
 
 if __name__ == '__main__':
@@ -185,4 +303,20 @@ if __name__ == '__main__':
                         metavar='[string]',
                         nargs=3,
                         help='Column names for the term-docs table (docs in old dog paper).')
+    parser.add_argument('-b',
+                        '--batch_size',
+                        type=int,
+                        help='Number of rows that are decoded before they are appended to a table at once.')
+    parser.add_argument('-w',
+                        '--workers',
+                        type=int,
+                        help='Number of processes that decode the postings lists in parallel.')
+    parser.add_argument('-ss',
+                        '--shard_size',
+                        type=int,
+                        help='Number of consecutive terms that are decoded by a worker at once.')
+    parser.add_argument('-v',
+                        '--verbose',
+                        action='store_true',
+                        help='Show the loading progress in rows per second.')
     FullTextFromCiff(**vars(parser.parse_args()))
@@ -4,7 +4,7 @@ import argparse
 import os
 from typing import Any
 
-from .utils import _fill_empty_table_with_csv, _create_table
+from .utils import _fill_empty_table_with_csv, _create_table, _update_collection_stats, _bump_index_version
 from ..connection import get_connection
 
 
@@ -77,9 +77,16 @@ class FullTextFromCSV:
             self.arguments['term_doc_file']
         ]
         self.connection.begin()
-        for table_name, file_name in zip(self.arguments['table_names'], file_names):
-            _fill_empty_table_with_csv(self.connection, table_name, file_name, self.arguments['delimiter'])
-        self.connection.commit()
+        try:
+            for table_name, file_name in zip(self.arguments['table_names'], file_names):
+                _fill_empty_table_with_csv(self.connection, table_name, file_name, self.arguments['delimiter'])
+            _update_collection_stats(self.connection, self.arguments['table_names'][0],
+                                     self.arguments['columns_names_docs'][2], self.arguments['table_names'][1])
+            _bump_index_version(self.connection)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
 
 
 if __name__ == '__main__':
@@ -0,0 +1,215 @@
+#! /usr/bin/env python3
+
+import argparse
+from typing import Any, List
+
+import numpy as np
+import pandas as pd
+
+from .utils import _bump_index_version, _update_collection_stats
+from ..connection import get_connection
+
+
+class FullTextUpdater:
+    """
+    Class for updating the tables of the old dog paper in place, without rebuilding the index:
+    - https://dl.acm.org/doi/10.1145/2600428.2609460
+
+    Every update runs in a single transaction, so searchers never see documents without their postings or
+    document frequencies that do not match the term_doc table.
+
+    Deleted documents are only recorded as tombstones in the deleted_docs table, which the retrieval models filter
+    out while scoring. Compacting the index removes their rows and corrects the document frequencies and the
+    collection statistics.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.arguments = self.get_arguments(kwargs)
+        db_connection = get_connection(self.arguments['database'])
+        self.connection = db_connection.connection
+
+    @staticmethod
+    def get_arguments(kwargs: Any) -> dict:
+        arguments = {
+            'database': None,
+            'table_names': ['docs', 'term_dict', 'term_doc'],
+            'deleted_docs_table': 'deleted_docs'
+        }
+        for key, item in arguments.items():
+            if kwargs.get(key) is not None:
+                arguments[key] = kwargs.get(key)
+        if arguments['database'] is None:
+            raise IOError('database path needs to be provided')
+        return arguments
+
+    def append_documents(self, docs: pd.DataFrame, postings: pd.DataFrame) -> pd.DataFrame:
+        """
+        Appends a batch of documents to the index.
+
+        docs should contain the columns collection_id and len, and postings the columns collection_id, string and
+        tf. New documents get doc ids following the highest doc id in the index, terms that are not in the term
+        dictionary get new term ids, and the df of every term in the batch is incremented. The docs with their
+        assigned doc ids are returned.
+        """
+        docs_table, term_dict_table, term_doc_table = self.arguments['table_names']
+        self.connection.begin()
+        try:
+            self.connection.execute(f'SELECT COALESCE(MAX(doc_id) + 1, 0) FROM {docs_table};')
+            first_doc_id = self.connection.fetchone()[0]
+            new_docs = pd.DataFrame({
+                'collection_id': docs['collection_id'].to_numpy(),
+                'doc_id': np.arange(first_doc_id, first_doc_id + len(docs), dtype=np.int64),
+                'len': docs['len'].to_numpy()
+            })
+            self.connection.register('new_docs', new_docs)
+            self.connection.register('new_postings', postings)
+
+            self.connection.execute(f'SELECT COUNT(*) FROM new_docs JOIN {docs_table} '
+                                    f'ON new_docs.collection_id = {docs_table}.collection_id;')
+            if self.connection.fetchone()[0] > 0:
+                raise IOError('Some of the documents are already in the index.')
+            self.connection.execute('SELECT COUNT(*) FROM new_postings ANTI JOIN new_docs '
+                                    'ON new_postings.collection_id = new_docs.collection_id;')
+            if self.connection.fetchone()[0] > 0:
+                raise IOError('There are postings for documents that are not in the batch.')
+
+            self.connection.execute(f'INSERT INTO {docs_table} (collection_id, doc_id, len) '
+                                    'SELECT collection_id, doc_id, len FROM new_docs;')
+            self.connection.execute(f"""
+                INSERT INTO {term_dict_table} (term_id, string, df)
+                SELECT (SELECT COALESCE(MAX(term_id) + 1, 0) FROM {term_dict_table})
+                           + ROW_NUMBER() OVER (ORDER BY new_terms.string) - 1,
+                       new_terms.string, 0
+                FROM (SELECT DISTINCT string FROM new_postings) AS new_terms
+                ANTI JOIN {term_dict_table} ON new_terms.string = {term_dict_table}.string;
+            """)
+            self.connection.execute(f"""
+                INSERT INTO {term_doc_table} (term_id, doc_id, tf)
+                SELECT {term_dict_table}.term_id, new_docs.doc_id, SUM(new_postings.tf)
+                FROM new_postings
+                JOIN new_docs ON new_postings.collection_id = new_docs.collection_id
+                JOIN {term_dict_table} ON new_postings.string = {term_dict_table}.string
+                GROUP BY {term_dict_table}.term_id, new_docs.doc_id;
+            """)
+            self.connection.execute(f"""
+                UPDATE {term_dict_table} SET df = {term_dict_table}.df + new_dfs.df
+                FROM (
+                    SELECT {term_dict_table}.term_id, COUNT(DISTINCT new_postings.collection_id) AS df
+                    FROM new_postings
+                    JOIN {term_dict_table} ON new_postings.string = {term_dict_table}.string
+                    GROUP BY {term_dict_table}.term_id
+                ) AS new_dfs
+                WHERE {term_dict_table}.term_id = new_dfs.term_id;
+            """)
+            _update_collection_stats(self.connection, docs_table, 'len', term_dict_table)
+            _bump_index_version(self.connection)
+            self.connection.unregister('new_docs')
+            self.connection.unregister('new_postings')
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return new_docs
+
+    def delete_documents(self, collection_ids: List[str]) -> int:
+        """
+        Marks the documents with the given collection ids as deleted, returns the number of newly deleted documents.
+        """
+        docs_table = self.arguments['table_names'][0]
+        deleted_docs_table = self.arguments['deleted_docs_table']
+        self.connection.begin()
+        try:
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS {deleted_docs_table} (doc_id INT);')
+            self.connection.register('deleted_collection_ids', pd.DataFrame({'collection_id': collection_ids}))
+            self.connection.execute(f"""
+                INSERT INTO {deleted_docs_table} (doc_id)
+                SELECT DISTINCT {docs_table}.doc_id
+                FROM {docs_table}
+                JOIN deleted_collection_ids ON {docs_table}.collection_id = deleted_collection_ids.collection_id
+                ANTI JOIN {deleted_docs_table} ON {docs_table}.doc_id = {deleted_docs_table}.doc_id;
+            """)
+            n_deleted = self.connection.fetchone()[0]
+            self.connection.unregister('deleted_collection_ids')
+            _bump_index_version(self.connection)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return n_deleted
+
+    def compact(self) -> None:
+        """
+        Removes the postings and docs rows of all deleted documents, and decrements the df of their terms.
+        """
+        docs_table, term_dict_table, term_doc_table = self.arguments['table_names']
+        deleted_docs_table = self.arguments['deleted_docs_table']
+        self.connection.begin()
+        try:
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS {deleted_docs_table} (doc_id INT);')
+            self.connection.execute(f"""
+                UPDATE {term_dict_table} SET df = {term_dict_table}.df - deleted_dfs.df
+                FROM (
+                    SELECT {term_doc_table}.term_id, COUNT(*) AS df
+                    FROM {term_doc_table}
+                    SEMI JOIN {deleted_docs_table} ON {term_doc_table}.doc_id = {deleted_docs_table}.doc_id
+                    GROUP BY {term_doc_table}.term_id
+                ) AS deleted_dfs
+                WHERE {term_dict_table}.term_id = deleted_dfs.term_id;
+            """)
+            for table in [term_doc_table, docs_table]:
+                self.connection.execute(f'DELETE FROM {table} '
+                                        f'WHERE doc_id IN (SELECT doc_id FROM {deleted_docs_table});')
+            self.connection.execute(f'DELETE FROM {deleted_docs_table};')
+            _update_collection_stats(self.connection, docs_table, 'len', term_dict_table)
+            _bump_index_version(self.connection)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d',
+                        '--database',
+                        required=True,
+                        metavar='[file]',
+                        help='Location of the database.')
+    parser.add_argument('-t',
+                        '--table_names',
+                        metavar='[string]',
+                        nargs=3,
+                        help='Names of the docs, term dictionary and term-docs tables.')
+    parser.add_argument('-e',
+                        '--delimiter',
+                        default='|',
+                        help='Delimiter that separates the columns in the csv files.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    append_parser = subparsers.add_parser('append', help='Append new documents to the index.')
+    append_parser.add_argument('-di',
+                               '--docs_file',
+                               required=True,
+                               metavar='[file]',
+                               help='CSV file with the collection_id and len of every new document.')
+    append_parser.add_argument('-pi',
+                               '--postings_file',
+                               required=True,
+                               metavar='[file]',
+                               help='CSV file with the collection_id, string and tf of every new posting.')
+    delete_parser = subparsers.add_parser('delete', help='Mark documents as deleted.')
+    delete_parser.add_argument('collection_ids',
+                               nargs='+',
+                               help='Collection ids of the documents that are deleted.')
+    subparsers.add_parser('compact', help='Remove the postings of deleted documents from the index.')
+    args = parser.parse_args()
+    updater = FullTextUpdater(database=args.database, table_names=args.table_names)
+    if args.command == 'append':
+        updater.append_documents(
+            pd.read_csv(args.docs_file, sep=args.delimiter, names=['collection_id', 'len'], keep_default_na=False),
+            pd.read_csv(args.postings_file, sep=args.delimiter, names=['collection_id', 'string', 'tf'],
+                        keep_default_na=False)
+        )
+    elif args.command == 'delete':
+        updater.delete_documents(args.collection_ids)
+    else:
+        updater.compact()
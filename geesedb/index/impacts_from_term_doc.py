@@ -0,0 +1,111 @@
+#! /usr/bin/env python3
+
+import argparse
+from typing import Any, Union
+
+from .utils import _bm25_postings_query
+from ..connection import get_connection
+
+
+class ImpactsFromTermDoc:
+    """
+    Class for materializing the BM25 score of every posting for fixed k1 and b values, so search only has to
+    sum the impacts of the query terms. The formula is the same as in RobertsonBM25.
+
+    Impacts are stored as floats, or quantized to signed 8 or 16 bit integers that have to be multiplied with the
+    scale in the term_doc_impact_meta table. The meta table also records the parameters and collection statistics
+    the impacts were computed with, so stale impacts can be detected.
+    """
+    _QUANTIZED_TYPES = {
+        8: 'TINYINT',
+        16: 'SMALLINT'
+    }
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.arguments = self.get_arguments(kwargs)
+        db_connection = get_connection(self.arguments['database'])
+        self.connection = db_connection.connection
+
+    @staticmethod
+    def get_arguments(kwargs: Any) -> dict:
+        arguments = {
+            'database': None,
+            'k1': 0.9,
+            'b': 0.4,
+            'bits': None
+        }
+        for key, item in arguments.items():
+            if kwargs.get(key) is not None:
+                arguments[key] = kwargs.get(key)
+        if arguments['database'] is None:
+            raise IOError('database path needs to be provided')
+        if arguments['bits'] is not None and arguments['bits'] not in ImpactsFromTermDoc._QUANTIZED_TYPES:
+            raise IOError('impacts can only be quantized to 8 or 16 bits')
+        return arguments
+
+    @staticmethod
+    def get_impact_meta(connection: Any) -> Union[dict, None]:
+        """
+        Returns the parameters and statistics the current impacts were computed with, or None if there are none.
+        """
+        connection.execute("SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'term_doc_impact_meta';")
+        if connection.fetchone()[0] == 0:
+            return None
+        connection.execute('SELECT k1, b, bits, scale, num_docs, avg_len FROM term_doc_impact_meta;')
+        row = connection.fetchone()
+        if row is None:
+            return None
+        return dict(zip(['k1', 'b', 'bits', 'scale', 'num_docs', 'avg_len'], row))
+
+    def create_impacts(self) -> None:
+        k1, b, bits = self.arguments['k1'], self.arguments['b'], self.arguments['bits']
+        self.connection.begin()
+        try:
+            self.connection.execute('SELECT COUNT(*), AVG(len) FROM docs;')
+            num_docs, avg_len = self.connection.fetchone()
+            self.connection.execute('CREATE OR REPLACE TEMPORARY TABLE bm25_impacts AS ' +
+                                    _bm25_postings_query(k1, b, num_docs, avg_len))
+            if bits is None:
+                scale = 1.0
+                impact = 'CAST(score AS FLOAT)'
+            else:
+                self.connection.execute('SELECT MAX(ABS(score)) FROM bm25_impacts;')
+                max_impact = self.connection.fetchone()[0] or 1.0
+                scale = max_impact / (2 ** (bits - 1) - 1)
+                impact = f'CAST(ROUND(score / {scale}) AS {self._QUANTIZED_TYPES[bits]})'
+            self.connection.execute(f"""
+                CREATE OR REPLACE TABLE term_doc_impact AS
+                SELECT term_id, doc_id, {impact} AS impact
+                FROM bm25_impacts
+                ORDER BY term_id, doc_id;
+            """)
+            self.connection.execute('DROP TABLE bm25_impacts;')
+            self.connection.execute('CREATE OR REPLACE TABLE term_doc_impact_meta '
+                                    '(k1 DOUBLE, b DOUBLE, bits INT, scale DOUBLE, num_docs BIGINT, avg_len DOUBLE);')
+            self.connection.execute('INSERT INTO term_doc_impact_meta VALUES (?, ?, ?, ?, ?, ?);',
+                                    [k1, b, bits, scale, num_docs, avg_len])
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d',
+                        '--database',
+                        required=True,
+                        metavar='[file]',
+                        help='Location of the database.')
+    parser.add_argument('-k1',
+                        type=float,
+                        help='The k1 parameter of BM25.')
+    parser.add_argument('-b',
+                        type=float,
+                        help='The b parameter of BM25.')
+    parser.add_argument('-q',
+                        '--bits',
+                        type=int,
+                        choices=[8, 16],
+                        help='Quantize the impacts to this number of bits.')
+    ImpactsFromTermDoc(**vars(parser.parse_args())).create_impacts()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, List
 
 import duckdb
 from duckdb import DuckDBPyConnection
@@ -19,10 +19,70 @@ def _create_table(connection: DuckDBPyConnection, table_name: str, column_names:
 
 def _fill_empty_table_with_csv(connection: DuckDBPyConnection, table_name: str, file_name: str,
                                delimiter: str = "|") -> None:
-    cursor = connection.cursor()
-    cursor.execute(f'SELECT COUNT(*) FROM {table_name};')
-    if cursor.fetchone()[0] > 0:
-        connection.rollback()
+    """
+    The statements run on the given connection, so they are part of its current transaction, which the caller
+    rolls back when the table is not empty.
+    """
+    connection.execute(f'SELECT COUNT(*) FROM {table_name};')
+    if connection.fetchone()[0] > 0:
         raise IOError('The tables are not empty.')
     query = f"COPY {table_name} FROM '{file_name}' WITH DELIMITER '{delimiter}';"
-    cursor.execute(query)
+    connection.execute(query)
+
+
+def _fill_empty_table_with_arrow(connection: DuckDBPyConnection, table_name: str, column_names: List[str],
+                                 arrow_object: Any) -> None:
+    """
+    The statements run on the given connection, so they are part of its current transaction, which the caller
+    rolls back when the table is not empty.
+    """
+    connection.execute(f'SELECT COUNT(*) FROM {table_name};')
+    if connection.fetchone()[0] > 0:
+        raise IOError('The tables are not empty.')
+    connection.register('arrow_object', arrow_object)
+    connection.execute(f'INSERT INTO {table_name} ({", ".join(column_names)}) '
+                       f'SELECT {", ".join(column_names)} FROM arrow_object;')
+    connection.unregister('arrow_object')
+
+
+def _update_collection_stats(connection: DuckDBPyConnection, docs_table: str = 'docs', len_column: str = 'len',
+                             term_dict_table: str = 'term_dict') -> None:
+    """
+    (Re)computes the collection statistics of a docs table, and stores them in the collection_stats table with the
+    name of the docs table as field. The statements run on the given connection, so they are part of its
+    current transaction.
+    """
+    connection.execute('CREATE TABLE IF NOT EXISTS collection_stats '
+                       '(field STRING, num_docs BIGINT, total_terms BIGINT, avg_len DOUBLE, num_terms BIGINT);')
+    connection.execute(f"DELETE FROM collection_stats WHERE field = '{docs_table}';")
+    connection.execute(f"""
+        INSERT INTO collection_stats (field, num_docs, total_terms, avg_len, num_terms)
+        SELECT '{docs_table}', COUNT(*), COALESCE(SUM({len_column}), 0), AVG({len_column}),
+               (SELECT COUNT(*) FROM {term_dict_table})
+        FROM {docs_table};
+    """)
+
+
+def _bump_index_version(connection: DuckDBPyConnection) -> None:
+    """
+    Increments the version number of the index in the index_version table, which is used to invalidate cached
+    search results. The statements run on the given connection, so they are part of its current transaction.
+    """
+    connection.execute('CREATE TABLE IF NOT EXISTS index_version (version BIGINT);')
+    connection.execute('INSERT INTO index_version SELECT 0 WHERE NOT EXISTS (SELECT * FROM index_version);')
+    connection.execute('UPDATE index_version SET version = version + 1;')
+
+
+def _bm25_postings_query(k1: float, b: float, num_docs: int, avg_len: float) -> str:
+    """
+    Returns a query for the term_id, doc_id and BM25 score of every posting, the formula is the same as the one
+    used by RobertsonBM25.
+    """
+    return f"""
+        SELECT term_doc.term_id, term_doc.doc_id,
+               LOG(({num_docs}-term_dict.df+0.5)/(term_dict.df+0.5))*term_doc.tf
+               /(term_doc.tf+{k1}*(1-{b}+{b}*docs.len/{avg_len})) AS score
+        FROM term_doc
+        JOIN term_dict ON term_doc.term_id = term_dict.term_id
+        JOIN docs ON term_doc.doc_id = docs.doc_id
+    """
@@ -1,5 +1,6 @@
 from .metadata import Metadata
 from .parser import Parser
+from .prepared_query import PreparedQuery
 from .translate import Translator
 
-__all__ = ['Parser', 'Translator', 'Metadata']
+__all__ = ['Parser', 'Translator', 'Metadata', 'PreparedQuery']
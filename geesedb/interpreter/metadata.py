@@ -1,22 +1,40 @@
 import json
 
-from ..connection import get_connection
+from ..connection import get_connection, get_database_cache
 
 
 class Metadata:
+    """
+    The metadata is read from the _meta table once per database and cached, the cached copy is shared by all
+    Metadata objects of the database and should not be modified. update_metadata replaces the cached copy and drops
+    the cached GQL translations and statistics, if _meta is changed in another way clear_cache has to be called.
+    """
 
-    def __init__(self, database):
-        self.connection = get_connection(database).connection
+    def __init__(self, database, read_only=False):
+        self.connection = get_connection(database, read_only).connection
+        self.cache = get_database_cache(database)
 
     # first list is default if nothing is specified (should be extended)
     # list is ordered as [edge_name, node1_id, edge_node1_id, edge_node2_id, node2_id2
     def get_metadata(self):
-        self.connection.execute("SELECT metadata FROM _meta")
-        metadata = json.loads(self.connection.fetchone()[0])
+        metadata = self.cache.get('metadata')
+        if metadata is None:
+            self.connection.execute("SELECT metadata FROM _meta")
+            metadata = json.loads(self.connection.fetchone()[0])
+            self.cache['metadata'] = metadata
         return metadata
 
     def update_metadata(self, data):
-        self.connection.execute(f"UPDATE _meta SET metadata='{json.dumps(data)}'")
+        metadata = json.dumps(data)
+        self.connection.execute("UPDATE _meta SET metadata = ?", [metadata])
+        self.cache['metadata'] = json.loads(metadata)
+        self.cache.pop('translations', None)
+        self.cache.pop('statistics', None)
+
+    def clear_cache(self):
+        self.cache.pop('metadata', None)
+        self.cache.pop('translations', None)
+        self.cache.pop('statistics', None)
 
     def get_default_join_info(self, node1, node2):
         return self.get_metadata()[node1][node2][0]
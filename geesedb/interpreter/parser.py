@@ -1,19 +1,86 @@
+import re
+import threading
+from collections import OrderedDict
+
 import pycypher
 from .metadata import Metadata
+from .prepared_query import PreparedQuery
+from .statistics import Statistics
+from ..connection import get_connection, get_database_cache
 
 class Parser:
+    """
+    Translations are kept in a LRU cache of cache_size queries, that is shared by all parsers of the database (the
+    size is set by the first one) and cleared when the metadata is updated.
+
+    With reorder_joins the joins of a pattern are ordered on the estimated cardinalities of the node and edge
+    tables, otherwise (the default) they follow the pattern and DuckDB orders them. Reordered translations are
+    cached per index version, so the joins are ordered again after the index has changed.
+    """
+
+    def __init__(self, database, read_only=False, cache_size=1024, reorder_joins=False):
+        get_connection(database, read_only)
+        self.database = database
+        self.read_only = read_only
+        self.cache_size = cache_size
+        self.reorder_joins = reorder_joins
 
-    def __init__(self, database):
-        self.parseCypher = _ParseCypher(database)
+    def get_translations(self):
+        database_cache = get_database_cache(self.database)
+        translations = database_cache.get('translations')
+        if translations is None:
+            translations = database_cache.setdefault('translations', _TranslationCache(self.cache_size))
+        return translations
 
     def parse(self, cypher_query):
-        node = pycypher.parse(cypher_query)
-        return self.parseCypher.process_node(node)
+        translations = self.get_translations()
+        key = (cypher_query, self.reorder_joins)
+        if self.reorder_joins:
+            key += (get_connection(self.database, self.read_only).get_index_version(),)
+        sql_query = translations.get(key)
+        if sql_query is None:
+            node = pycypher.parse(cypher_query)
+            sql_query = _ParseCypher(self.database, self.read_only, self.reorder_joins).process_node(node)
+            translations.put(key, sql_query)
+        return sql_query
+
+    # Cypher parameters ($name) are kept as DuckDB parameters, so a query template is translated once and the
+    # prepared statement is executed with different bindings.
+    def prepare(self, cypher_query, cursor=None):
+        if cursor is None:
+            cursor = get_connection(self.database, self.read_only).cursor
+        return PreparedQuery(self.parse(cypher_query), cursor)
+
+
+class _TranslationCache:
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            sql_query = self.entries.get(key)
+            if sql_query is not None:
+                self.entries.move_to_end(key)
+            return sql_query
+
+    def put(self, key, sql_query):
+        with self.lock:
+            self.entries[key] = sql_query
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
 
 class _ParseCypher:
 
-    def __init__(self, database):
+    def __init__(self, database, read_only=False, reorder_joins=False):
         self.database = database
+        self.read_only = read_only
+        self.reorder_joins = reorder_joins
+        # common table expressions of all single queries, they are put in front of the whole (union) query
+        self.ctes = list()
 
     def process_node(self, node):
         errors = node['errors']
@@ -50,9 +117,12 @@ class _ParseCypher:
                 if len(out) > 0:
                     out += ' '
                 if r['children']['name'] == 'SingleQuery':
-                    out += _ParseSingleQuery(self.database).process_node(r['children'])
+                    out += _ParseSingleQuery(self.database, self.read_only, self.ctes, self.reorder_joins) \
+                        .process_node(r['children'])
                 else:
                     out += self.process_node(r['children'])
+            if len(self.ctes) > 0:
+                out = 'WITH RECURSIVE ' + ', '.join(self.ctes) + ' ' + out
             return out
 
         elif name == 'Union':
@@ -60,98 +130,265 @@ class _ParseCypher:
             for r in result[:-1]:
                 union += r['node']['text']
             union = union.strip()
-            return union + ' ' + _ParseSingleQuery(self.database).process_node(result[-1]['children'])
+            return union + ' ' + \
+                _ParseSingleQuery(self.database, self.read_only, self.ctes, self.reorder_joins) \
+                .process_node(result[-1]['children'])
 
         else:
             raise RuntimeError(f'Queries that make use of >>{name}<< are not supported (yet).')
 
 class _ParseSingleQuery:
 
-    def __init__(self, database):
+    def __init__(self, database, read_only=False, ctes=None, reorder_joins=False):
         self.output_params = {
             "Order": '',
             "Skip": '',
             "Limit": ''
         }
         self.additional_wheres = list()
-        self.metadata = Metadata(database)
-
-    def build_select_statement(self, pattern):
-        output = ''
-
-        # First the start node
-        s_node = pattern['NodePattern'][0]
-        try:
-            s_variable = s_node['Variable']
-        except KeyError:
-            s_variable = 'start_node'
-
+        self.property_wheres = dict()
+        self.where_conjuncts = list()
+        self.anchors = list()
+        self.ctes = list() if ctes is None else ctes
+        self.metadata = Metadata(database, read_only)
+        self.statistics = Statistics(database, read_only)
+        self.reorder_joins = reorder_joins
+
+    def build_variable_length_join(self, p_label, p_variable, to_node_type, to_node_variable, relationship,
+                                   rel_variable, prefix=None):
+        """
+        Variable length relationships (-[*min..max]-) walk back and forth over a single join table, so the path ends on
+        p_label after an even number of hops and on the other node type after an odd number. The walk is a recursive
+        CTE over (start, node, depth) rows combined with UNION, so the frontier is deduplicated on every hop, and it
+        stops at the maximum depth. The relationship variable has one row per reachable start and end node, with the
+        shortest depth in the range. This is reachability: unlike Cypher, a walk may use the same edge more than
+        once, so e.g. a node reaches itself in two hops through any of its edges.
+
+        The base case only selects the start nodes that match the part of the pattern before the relationship
+        (prefix, the FROM clause and variables joined so far), with its property conditions and the conditions of
+        the WHERE clause on these variables, so only those start nodes are expanded. Conditions on the end node
+        are applied after the walk.
+        """
+        min_hops, max_hops = relationship['RangeLiteral']
+        if max_hops is None:
+            raise RuntimeError('Variable length relationships need an upper bound, e.g. -[*1..3]-')
+        if 'Properties' in relationship:
+            raise RuntimeError('Properties on variable length relationships are not supported (yet).')
+        metadata = self.metadata.get_metadata()[p_label]
+        if to_node_type == p_label:
+            meta = [m for other_label in metadata for m in metadata[other_label]]
+        elif to_node_type in metadata:
+            meta = metadata[to_node_type]
+        else:
+            raise RuntimeError(f'Variable length relationships between {p_label} and {to_node_type} need to use a '
+                               f'single join table')
+        if 'RelationshipTypes' in relationship:
+            meta = [m for m in meta if m[0] == relationship['RelationshipTypes'][0]]
+        elif to_node_type == p_label and len(meta) > 1:
+            raise RuntimeError(f'The relationship type is needed for variable length relationships between '
+                               f'{p_label} nodes')
+        if not meta:
+            raise RuntimeError(f"There are no edges between these node types known: {p_label} and {to_node_type}")
+        join_table, from_node_jk, join_table_fnk, join_table_tnk, to_node_jk = meta[0]
+        if to_node_type == p_label:
+            to_node_jk = from_node_jk
+        parity = 0 if to_node_type == p_label else 1
+
+        n = len(self.ctes)
+        hops, paths, ends = f'Xhops{n}X', f'Xpaths{n}X', f'Xends{n}X'
+        if prefix is None:
+            prefix = (f'{p_label} AS {p_variable}', [p_variable])
+        self.ctes.append(f'{hops} AS ('
+                         f'SELECT {join_table_fnk} AS src, {join_table_tnk} AS dst, 0 AS side FROM {join_table} '
+                         f'UNION ALL '
+                         f'SELECT {join_table_tnk} AS src, {join_table_fnk} AS dst, 1 AS side FROM {join_table})')
+        anchor = {
+            'cte': len(self.ctes),
+            'hops': hops,
+            'paths': paths,
+            'max_hops': max_hops,
+            'start_key': f'{p_variable}.{from_node_jk}',
+            'from': prefix[0],
+            'variables': set(prefix[1]),
+            'conditions': [where for variable in prefix[1] for where in self.property_wheres.get(variable, [])]
+        }
+        self.anchors.append(anchor)
+        self.ctes.append(self.get_paths_cte(anchor))
+        self.ctes.append(f'{ends} AS ('
+                         f'SELECT start_key, node_key, MIN(depth) AS depth FROM {paths} '
+                         f'WHERE depth >= {min_hops} AND depth % 2 = {parity} '
+                         f'GROUP BY start_key, node_key)')
+        return f' JOIN {ends} AS {rel_variable} ON {p_variable}.{from_node_jk} = {rel_variable}.start_key' + \
+               f' JOIN {to_node_type} AS {to_node_variable}' + \
+               f' ON {rel_variable}.node_key = {to_node_variable}.{to_node_jk}'
+
+    @staticmethod
+    def get_paths_cte(anchor):
+        paths, hops = anchor['paths'], anchor['hops']
+        where = ' WHERE ' + ' AND '.join(anchor['conditions']) if anchor['conditions'] else ''
+        return f'{paths}(start_key, node_key, depth) AS (' \
+               f'SELECT DISTINCT {anchor["start_key"]}, {anchor["start_key"]}, 0 FROM {anchor["from"]}{where} ' \
+               f'UNION ' \
+               f'SELECT {paths}.start_key, {hops}.dst, {paths}.depth + 1 ' \
+               f'FROM {paths} JOIN {hops} ON {hops}.src = {paths}.node_key ' \
+               f'AND {hops}.side = {paths}.depth % 2 ' \
+               f'WHERE {paths}.depth < {anchor["max_hops"]})'
+
+    def push_down_where(self):
+        """
+        Adds the conjuncts of the WHERE clause that only use variables of the pattern before a variable length
+        relationship to the base case of its walk.
+        """
+        for anchor in self.anchors:
+            pushed = False
+            for conjunct in self.where_conjuncts:
+                variables = set(re.findall(r'\b([A-Za-z_]\w*)\s*\.', re.sub(r"'(?:[^']|'')*'", '', conjunct)))
+                if variables and variables <= anchor['variables'] and f'({conjunct})' not in anchor['conditions']:
+                    anchor['conditions'].append(f'({conjunct})')
+                    pushed = True
+            if pushed:
+                self.ctes[anchor['cte']] = self.get_paths_cte(anchor)
+
+    def get_conjuncts(self, node):
+        """
+        Returns the translated conjuncts of a WHERE expression, or the whole expression if it is no conjunction.
+        """
+        children = [r['children'] for r in node['result'] if r['node'] != r['children']]
+        if node['name'] in {'Expression', 'OrExpression', 'XorExpression'} and len(children) == 1:
+            return self.get_conjuncts(children[0])
+        if node['name'] == 'AndExpression':
+            return [self.process_node(child) for child in children]
+        return [self.process_node(node)]
+
+    def get_property_condition(self, variable, key, value):
+        return f"""{variable}.{key} = {value.replace('"', "'")}"""
+
+    def add_property_where(self, variable, key, value):
+        where = self.get_property_condition(variable, key, value)
+        self.additional_wheres.append(where)
+        self.property_wheres.setdefault(variable, []).append(where)
+
+    def get_join_info(self, from_label, to_label, relationship):
         try:
-            s_label = s_node['NodeLabels']
+            meta = self.metadata.get_all_join_info(from_label, to_label)
         except KeyError:
+            # only the other direction is in the metadata
+            meta = [[m[0], m[4], m[3], m[2], m[1]]
+                    for m in self.metadata.get_metadata().get(to_label, {}).get(from_label, [])]
+        if 'RelationshipTypes' in relationship:
+            meta = [m for m in meta if m[0] == relationship['RelationshipTypes'][0]]
+        if not meta:
+            raise RuntimeError(f"There are no edges between these node types known: {from_label} and {to_label}")
+        return meta[0]
+
+    def get_pattern_elements(self, pattern):
+        """
+        Returns the nodes and relationships of the pattern, relationship i connects node i and node i + 1.
+        """
+        s_node = pattern['NodePattern'][0]
+        if 'NodeLabels' not in s_node:
             raise RuntimeError('The type of a node needs to be know for know')
-
-        try:
-            s_properties = s_node['Properties']
-            for key, value in s_properties.items():
-                self.additional_wheres.append(f"""{s_variable}.{key} = {value.replace('"', "'")}""")
-        except KeyError:
-            pass
-
-        output += f'{s_label} AS {s_variable}'
-
-        # Then the chain
-        try:
-            chain = pattern['PatternElementChain']
-        except KeyError:
-            return output
-
-        p_label = s_label
-        p_variable = s_variable
-        for i, chain_part in enumerate(chain):
+        nodes = [{'variable': s_node.get('Variable', 'start_node'), 'label': s_node['NodeLabels'],
+                  'properties': s_node.get('Properties', {})}]
+        relationships = []
+        for i, chain_part in enumerate(pattern.get('PatternElementChain', [])):
             to_node = chain_part['node']
-            try:
-                to_node_variable = to_node['Variable']
-            except KeyError:
-                to_node_variable = f'Xtn{i}X'
-            try:
-                to_node_type = to_node['NodeLabels']
-            except KeyError:
+            if 'NodeLabels' not in to_node:
                 raise RuntimeError("The node type needs to be known for now.")
-            try:
-                to_node_properties = to_node['Properties']
-                for key, value in to_node_properties.items():
-                    self.additional_wheres.append(f"""{to_node_variable}.{key} = {value.replace('"', "'")}""")
-            except KeyError:
-                pass
-
+            nodes.append({'variable': to_node.get('Variable', f'Xtn{i}X'), 'label': to_node['NodeLabels'],
+                          'properties': to_node.get('Properties', {})})
             relationship = chain_part['relationship']
-            try:
-                rel_variable = relationship['Variable']
-            except KeyError:
-                rel_variable = f'Xrel{i}X'
-            try:
-                rel_type = relationship['RelationshipTypes'][0]
-            except KeyError:
-                rel_type = self.metadata.get_default_join_info(p_label, to_node_type)[0]
-            try:
-                rel_properties = relationship['Properties']
-                for key, value in rel_properties.items():
-                    self.additional_wheres.append(f"""{rel_variable}.{key} = {value.replace('"', "'")}""")
-            except KeyError:
-                pass
-            meta = self.metadata.get_all_join_info(p_label, to_node_type)
-            if not meta:
-                raise RuntimeError(f"There are no edges between these node types known: {p_label} and {to_node_type}")
-            meta = meta[0] # TODO unless join table is specified
-            join_table, from_node_jk, join_table_fnk, join_table_tnk, to_node_jk = meta
-
-            # Add relationship join and then the node join
-            join = f' JOIN {join_table} AS {rel_variable} ON {p_variable}.{from_node_jk} = {rel_variable}.{join_table_fnk}' + \
-                   f' JOIN {to_node_type} AS {to_node_variable} ON {rel_variable}.{join_table_tnk} = {to_node_variable}.{to_node_jk}'
-            output += join
-            p_variable = to_node_variable
-            p_label = to_node_type
+            relationships.append({**relationship, 'Variable': relationship.get('Variable', f'Xrel{i}X')})
+        return nodes, relationships
+
+    def build_join(self, p_node, relationship, to_node, edge_conditions=(), node_conditions=(), prefix=None):
+        if 'RangeLiteral' in relationship:
+            return self.build_variable_length_join(p_node['label'], p_node['variable'], to_node['label'],
+                                                   to_node['variable'], relationship, relationship['Variable'],
+                                                   prefix)
+        join_table, from_node_jk, join_table_fnk, join_table_tnk, to_node_jk = \
+            self.get_join_info(p_node['label'], to_node['label'], relationship)
+        rel_variable = relationship['Variable']
+        to_node_variable = to_node['variable']
+        edge_on = ' AND '.join([f'{p_node["variable"]}.{from_node_jk} = {rel_variable}.{join_table_fnk}',
+                                *edge_conditions])
+        node_on = ' AND '.join([f'{rel_variable}.{join_table_tnk} = {to_node_variable}.{to_node_jk}',
+                                *node_conditions])
+        return f' JOIN {join_table} AS {rel_variable} ON {edge_on}' + \
+               f' JOIN {to_node["label"]} AS {to_node_variable} ON {node_on}'
+
+    def build_select_statement(self, pattern):
+        nodes, relationships = self.get_pattern_elements(pattern)
+        if self.reorder_joins and len(nodes) > 1 and not any('RangeLiteral' in r for r in relationships):
+            return self.build_ordered_select_statement(nodes, relationships)
+
+        # The joins follow the pattern, with the property conditions in the WHERE clause
+        for node in nodes:
+            for key, value in node['properties'].items():
+                self.add_property_where(node['variable'], key, value)
+        for relationship in relationships:
+            for key, value in relationship.get('Properties', {}).items():
+                self.add_property_where(relationship['Variable'], key, value)
+        output = f'{nodes[0]["label"]} AS {nodes[0]["variable"]}'
+        variables = [nodes[0]['variable']]
+        for i, relationship in enumerate(relationships):
+            output += self.build_join(nodes[i], relationship, nodes[i + 1], prefix=(output, list(variables)))
+            variables += [relationship['Variable'], nodes[i + 1]['variable']]
+        return output
+
+    def estimate_node_cardinality(self, node):
+        return self.statistics.get_count(node['label']) * \
+               self.statistics.get_selectivity(node['label'], node['properties'].keys())
+
+    def estimate_expansion(self, cardinality, p_node, relationship, to_node):
+        """
+        Returns the estimated number of rows after joining the relationship and to_node to a result of the given
+        cardinality that contains p_node.
+        """
+        join_table, _, join_table_fnk, _, to_node_jk = self.get_join_info(p_node['label'], to_node['label'],
+                                                                          relationship)
+        return cardinality * \
+            self.statistics.get_fanout(join_table, join_table_fnk) * \
+            self.statistics.get_selectivity(join_table, relationship.get('Properties', {}).keys()) * \
+            self.statistics.get_fanout(to_node['label'], to_node_jk) * \
+            self.statistics.get_selectivity(to_node['label'], to_node['properties'].keys())
+
+    def build_ordered_select_statement(self, nodes, relationships):
+        """
+        Starts the joins at the node with the lowest estimated cardinality, and then repeatedly adds the neighbour
+        (on either side of the joined part of the chain) that gives the smallest estimated intermediate result. The
+        property conditions are put in the ON clauses, those of the start node in the first join, so the selective
+        conditions are applied as early as possible.
+        """
+        cardinalities = [self.estimate_node_cardinality(node) for node in nodes]
+        start = min(range(len(nodes)), key=lambda i: cardinalities[i])
+        cardinality = cardinalities[start]
+        first, last = start, start
+        order = []
+        while first > 0 or last < len(nodes) - 1:
+            candidates = []
+            if first > 0:
+                candidates.append((self.estimate_expansion(cardinality, nodes[first], relationships[first - 1],
+                                                           nodes[first - 1]), first, first - 1))
+            if last < len(nodes) - 1:
+                candidates.append((self.estimate_expansion(cardinality, nodes[last], relationships[last],
+                                                           nodes[last + 1]), last, last + 1))
+            cardinality, p, j = min(candidates)
+            order.append((p, j))
+            first, last = min(first, j), max(last, j)
+
+        def get_conditions(variable, properties):
+            return [self.get_property_condition(variable, key, value) for key, value in properties.items()]
+
+        output = f'{nodes[start]["label"]} AS {nodes[start]["variable"]}'
+        for i, (p, j) in enumerate(order):
+            relationship = relationships[min(p, j)]
+            edge_conditions = get_conditions(relationship['Variable'], relationship.get('Properties', {}))
+            if i == 0:
+                edge_conditions = get_conditions(nodes[start]['variable'], nodes[start]['properties']) + \
+                                  edge_conditions
+            output += self.build_join(nodes[p], relationship, nodes[j], edge_conditions,
+                                      get_conditions(nodes[j]['variable'], nodes[j]['properties']))
         return output
 
     def process_node(self, node):
@@ -204,6 +441,7 @@ class _ParseSingleQuery:
                         where = self.process_node(r['children'])
                 except StopIteration:
                     break
+            self.push_down_where()
             match_statement = f'FROM {pattern}'
             if len(where) == 0 and len(self.additional_wheres) > 0:
                 where = ' WHERE ' + ' AND '.join(self.additional_wheres)
@@ -338,6 +576,15 @@ class _ParseSingleQuery:
         elif name == 'RelTypeName':
             return self.process_node(result[0]['children'])
 
+        elif name == 'RangeLiteral':
+            # *, *n, *n.., *..m or *n..m, without an upper bound for *n.. and *
+            range_literal = ''.join([r['node']['text'] for r in result]).replace(' ', '')[1:]
+            if '..' not in range_literal:
+                hops = int(range_literal) if range_literal else None
+                return (1, None) if hops is None else (hops, hops)
+            min_hops, max_hops = range_literal.split('..')
+            return int(min_hops) if min_hops else 1, int(max_hops) if max_hops else None
+
         elif name == 'Where':
             where_statement = ' '
             for r in result:
@@ -345,6 +592,7 @@ class _ParseSingleQuery:
                     where_statement += r['node']['text']
                 else:
                     where_statement += self.process_node(r['children'])
+                    self.where_conjuncts += self.get_conjuncts(r['children'])
             return where_statement
 
         elif name == 'Return':
@@ -517,6 +765,9 @@ class _ParseSingleQuery:
         elif name == 'Variable':
             return self.process_node(result[0]['children'])
 
+        elif name == 'Parameter':
+            return ''.join([r['node']['text'] for r in result]).strip()
+
         elif name == 'SymbolicName':
             return ''.join([r['node']['text'] for r in result]).strip()
 
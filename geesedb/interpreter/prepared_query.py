@@ -0,0 +1,76 @@
+import itertools
+import math
+import re
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+
+_prepared_query_ids = itertools.count()
+
+
+class PreparedQuery:
+    """
+    A translated query with Cypher parameters ($name), prepared once on a DuckDB cursor with PREPARE. Executing it
+    only binds the parameters to the prepared plan, the query is not translated, parsed or planned again.
+
+    Prepared statements belong to the cursor they are prepared on, so a PreparedQuery should only be executed by
+    the thread that owns the cursor.
+    """
+
+    def __init__(self, sql_query, cursor):
+        self.sql_query = sql_query
+        self.cursor = cursor
+        self.parameters = self.get_parameter_names(sql_query)
+        self.name = f'gql_prepared_{next(_prepared_query_ids)}'
+        self.cursor.execute(f'PREPARE {self.name} AS {sql_query}')
+
+    @staticmethod
+    def get_parameter_names(sql_query):
+        names = [match.group(1) for match in re.finditer(r"'(?:[^']|'')*'|\$(\w+)", sql_query) if match.group(1)]
+        return list(dict.fromkeys(names))
+
+    @staticmethod
+    def to_literal(value):
+        if value is None:
+            return 'NULL'
+        elif isinstance(value, (bool, np.bool_)):
+            return 'TRUE' if value else 'FALSE'
+        elif isinstance(value, str):
+            return "'{}'".format(value.replace("'", "''"))
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            return '[{}]'.format(', '.join(PreparedQuery.to_literal(item) for item in value))
+        elif isinstance(value, (int, np.integer)):
+            return str(int(value))
+        elif isinstance(value, (float, np.floating)):
+            if not math.isfinite(value):
+                return f"'{float(value)}'::DOUBLE"
+            return repr(float(value))
+        elif isinstance(value, Decimal) and value.is_finite():
+            return str(value)
+        elif isinstance(value, datetime):
+            timestamp_type = 'TIMESTAMP' if value.tzinfo is None else 'TIMESTAMPTZ'
+            return f"{timestamp_type} '{value.isoformat(sep=' ')}'"
+        elif isinstance(value, date):
+            return f"DATE '{value.isoformat()}'"
+        raise TypeError(f'Parameters of type {type(value).__name__} are not supported')
+
+    def execute(self, parameters=None, **kwargs):
+        """
+        Executes the query with the parameters given as a dict or as keyword arguments, and returns the cursor to
+        fetch the results from.
+        """
+        parameters = {**(parameters or {}), **kwargs}
+        unknown = set(parameters) - set(self.parameters)
+        if unknown:
+            raise RuntimeError(f'The query has no parameters named {", ".join(sorted(unknown))}')
+        missing = set(self.parameters) - set(parameters)
+        if missing:
+            raise RuntimeError(f'No values are given for the parameters {", ".join(sorted(missing))}')
+        if len(parameters) == 0:
+            return self.cursor.execute(f'EXECUTE {self.name}')
+        bindings = ', '.join(f'{key} := {self.to_literal(value)}' for key, value in parameters.items())
+        return self.cursor.execute(f'EXECUTE {self.name}({bindings})')
+
+    def close(self):
+        self.cursor.execute(f'DEALLOCATE {self.name}')
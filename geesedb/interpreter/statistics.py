@@ -0,0 +1,53 @@
+from ..connection import get_connection, get_database_cache
+
+
+class Statistics:
+    """
+    Cardinality statistics of the node and edge tables, used for ordering the joins of graph patterns. The number
+    of rows of a table and the (approximate) number of distinct values of a column are computed the first time they
+    are needed, and are cached per database for the current index version. Metadata.update_metadata and
+    Metadata.clear_cache drop them as well.
+    """
+
+    def __init__(self, database, read_only=False):
+        self.db_connection = get_connection(database, read_only)
+        self.cache = get_database_cache(database)
+
+    def get_statistics(self):
+        version = self.db_connection.get_index_version()
+        statistics = self.cache.get('statistics')
+        if statistics is None or statistics['version'] != version:
+            statistics = {'version': version, 'counts': {}, 'distinct': {}}
+            self.cache['statistics'] = statistics
+        return statistics
+
+    def get_count(self, table):
+        counts = self.get_statistics()['counts']
+        if table not in counts:
+            cursor = self.db_connection.connection
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            counts[table] = cursor.fetchone()[0]
+        return counts[table]
+
+    def get_distinct(self, table, column):
+        distinct = self.get_statistics()['distinct']
+        if (table, column) not in distinct:
+            cursor = self.db_connection.connection
+            cursor.execute(f'SELECT approx_count_distinct({column}) FROM {table}')
+            distinct[(table, column)] = max(cursor.fetchone()[0] or 0, 1)
+        return distinct[(table, column)]
+
+    def get_selectivity(self, table, columns):
+        """
+        Returns the estimated fraction of the rows of the table that match an equality condition on every column.
+        """
+        selectivity = 1.0
+        for column in columns:
+            selectivity /= self.get_distinct(table, column)
+        return selectivity
+
+    def get_fanout(self, table, column):
+        """
+        Returns the average number of rows of the table per distinct value of the column.
+        """
+        return self.get_count(table) / self.get_distinct(table, column)
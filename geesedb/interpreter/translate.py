@@ -4,8 +4,11 @@ from .parser import Parser
 # So this class is a wrapper for that one.
 class Translator:
 
-    def __init__(self, database):
-        self.parser = Parser(database)
+    def __init__(self, database, read_only=False, cache_size=1024, reorder_joins=False):
+        self.parser = Parser(database, read_only, cache_size, reorder_joins)
 
     def translate(self, query):
         return self.parser.parse(query)
+
+    def prepare(self, query, cursor=None):
+        return self.parser.prepare(query, cursor)
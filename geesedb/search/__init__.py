@@ -1,4 +1,7 @@
+from .retrieval_models.bag_of_words.disjunctive.bm25_impact import BM25Impact
 from .retrieval_models.bag_of_words.disjunctive.robertson_bm25 import RobertsonBM25
 from .searcher import Searcher
+from .async_searcher import AsyncSearcher
+from .adjacency import Adjacency
 
-__all__ = ['RobertsonBM25', 'Searcher']
+__all__ = ['BM25Impact', 'RobertsonBM25', 'Searcher', 'AsyncSearcher', 'Adjacency']
@@ -0,0 +1,86 @@
+from os import path
+from typing import Any
+
+import numpy as np
+
+from ..connection.connection import DBConnection
+from ..index import AdjacencyFromMeta
+
+
+class Adjacency:
+    """
+    In memory copy of the CSR adjacency of an edge table built by AdjacencyFromMeta, in both directions. Arrays
+    stored as NumPy files are memory-mapped instead of read. The neighbours of a set of vertices are gathered by
+    slicing the neighbors arrays, values are translated to vertex ids with a binary search over the sorted vertex
+    values.
+
+    This is an experimental API for traversal from Python, the Cypher translator does not use it.
+    """
+
+    def __init__(self, db_connection: DBConnection, edge_table: str) -> None:
+        cursor = db_connection.cursor
+        meta = AdjacencyFromMeta.get_adjacency_meta(cursor, edge_table)
+        if meta is None:
+            raise IOError(f'there is no adjacency for {edge_table}, it can be built with AdjacencyFromMeta')
+        if meta['version'] != db_connection.get_index_version():
+            raise IOError(f'the adjacency of {edge_table} is outdated, it can be rebuilt with AdjacencyFromMeta')
+        self.edge_table = edge_table
+        self.columns = [meta['column_a'], meta['column_b']]
+        self.vertices = {}
+        self.offsets = {}
+        self.neighbors = {}
+        for column in self.columns:
+            cursor.execute(f'SELECT value FROM {edge_table}_{column}_vertices ORDER BY id;')
+            self.vertices[column] = cursor.fetchnumpy()['value']
+            if meta['storage'] == 'numpy':
+                file_name = path.join(meta['directory'], f'{edge_table}.{column}')
+                self.offsets[column] = np.load(file_name + '.offsets.npy', mmap_mode='r')
+                self.neighbors[column] = np.load(file_name + '.neighbors.npy', mmap_mode='r')
+            else:
+                cursor.execute(f'SELECT position FROM {edge_table}_{column}_offsets ORDER BY id;')
+                self.offsets[column] = np.asarray(cursor.fetchnumpy()['position'], dtype=np.int64)
+                cursor.execute(f'SELECT neighbor FROM {edge_table}_{column}_neighbors ORDER BY position;')
+                self.neighbors[column] = cursor.fetchnumpy()['neighbor']
+
+    def get_other_column(self, column: str) -> str:
+        if column not in self.columns:
+            raise IOError(f'{self.edge_table} has no column {column}')
+        return self.columns[1] if column == self.columns[0] else self.columns[0]
+
+    def get_ids(self, column: str, values: Any) -> np.ndarray:
+        """
+        Returns the vertex ids of the values of the column, values that are not in the edge table are dropped.
+        """
+        vertices = self.vertices[column]
+        values = np.asarray(values, dtype=vertices.dtype)
+        if len(vertices) == 0 or len(values) == 0:
+            return np.empty(0, dtype=np.int64)
+        positions = np.searchsorted(vertices, values)
+        found = positions < len(vertices)
+        found[found] = vertices[positions[found]] == values[found]
+        return positions[found]
+
+    def expand_ids(self, column: str, ids: np.ndarray) -> np.ndarray:
+        """
+        Returns the ids of the neighbours (in the other column) of the vertex ids of the column, with repetitions
+        if vertices share neighbours.
+        """
+        offsets = self.offsets[column]
+        ids = np.asarray(ids, dtype=np.int64)
+        starts = offsets[ids]
+        lengths = offsets[ids + 1] - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.asarray(self.neighbors[column][positions])
+
+    def expand(self, column: str, values: Any, unique: bool = True) -> np.ndarray:
+        """
+        Returns the values of the other column that share an edge with the values of the column, sorted and without
+        duplicates if unique.
+        """
+        neighbor_ids = self.expand_ids(column, self.get_ids(column, values))
+        if unique:
+            neighbor_ids = np.unique(neighbor_ids)
+        return self.vertices[self.get_other_column(column)][neighbor_ids]
+
+    def get_degrees(self, column: str) -> np.ndarray:
+        return np.diff(self.offsets[column])
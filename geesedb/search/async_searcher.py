@@ -0,0 +1,87 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .searcher import Searcher
+
+
+class AsyncSearcher:
+    """
+    asyncio interface to a Searcher. Queries run on a bounded pool of worker threads, each with its own DuckDB
+    cursor, so the event loop is never blocked. At most workers queries run at the same time, the others wait for
+    a free cursor without occupying a thread.
+
+    When a search is cancelled or exceeds its timeout the running DuckDB query is interrupted, and the cursor is
+    handed back to the pool once the query has stopped. Searches on the in-memory backends cannot be interrupted
+    and run to completion before the cancellation is propagated.
+
+    All other keyword arguments are passed on to the Searcher.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.arguments = self.get_arguments(kwargs)
+        self.searcher = Searcher(**{key: item for key, item in kwargs.items() if key not in self.arguments})
+        self.executor = ThreadPoolExecutor(self.arguments['workers'])
+        self.cursors = asyncio.Queue()
+        for _ in range(self.arguments['workers']):
+            self.cursors.put_nowait(self.searcher.db_connection.connection.cursor())
+
+    @staticmethod
+    def get_arguments(kwargs: Any) -> dict:
+        arguments = {
+            'workers': 4,
+            'timeout': None
+        }
+        for key, item in arguments.items():
+            if kwargs.get(key) is not None:
+                arguments[key] = kwargs.get(key)
+        if arguments['workers'] < 1:
+            raise IOError('at least one worker is needed')
+        return arguments
+
+    async def __aenter__(self) -> 'AsyncSearcher':
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        while not self.cursors.empty():
+            self.cursors.get_nowait().close()
+
+    def search_with_cursor(self, cursor: Any, topic: str) -> Union[list, pd.DataFrame, np.array]:
+        return self.searcher.search_topic_with_cursor(cursor, topic)
+
+    async def search(self, topic: str, timeout: float = None) -> Union[list, pd.DataFrame, np.array]:
+        """
+        Searches a topic, raises asyncio.TimeoutError if it takes longer than timeout seconds (by default the
+        timeout of the AsyncSearcher). The time spent waiting for a free cursor counts towards the timeout.
+        """
+        if timeout is None:
+            timeout = self.arguments['timeout']
+        return await asyncio.wait_for(self._search(topic), timeout)
+
+    async def _search(self, topic: str) -> Union[list, pd.DataFrame, np.array]:
+        cursor = await self.cursors.get()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, self.search_with_cursor, cursor, topic)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                cursor.interrupt()
+                await asyncio.gather(future, return_exceptions=True)
+                raise
+        finally:
+            self.cursors.put_nowait(cursor)
+
+    async def search_many(self, topics: Sequence[str],
+                          timeout: float = None) -> List[Union[list, pd.DataFrame, np.array]]:
+        """
+        Searches the topics concurrently and returns the results in the order of the topics, the timeout applies
+        to every topic separately.
+        """
+        return await asyncio.gather(*[self.search(topic, timeout) for topic in topics])
@@ -0,0 +1,87 @@
+from typing import Tuple
+
+import numpy as np
+
+from .term_dictionary import TermDictionary
+from ..connection.connection import DBConnection
+
+
+class CSRIndex:
+    """
+    In memory copy of the term_doc table in compressed sparse row format: the postings of term t are
+    doc_ids[term_offsets[t]:term_offsets[t + 1]] and tfs[term_offsets[t]:term_offsets[t + 1]], sorted on doc id.
+    Document lengths and collection ids are stored in arrays indexed by doc id.
+
+    Scoring happens with vectorized NumPy operations, avoiding the SQL planning and join overhead for short
+    queries. Postings of documents that are marked as deleted are dropped when the index is loaded.
+    """
+
+    def __init__(self, db_connection: DBConnection) -> None:
+        cursor = db_connection.cursor
+        self.term_dictionary = TermDictionary(db_connection)
+        term_ids = self.term_dictionary.term_ids
+        n_terms = int(term_ids.max()) + 1 if len(term_ids) > 0 else 0
+        self.dfs = np.zeros(n_terms, dtype=np.int64)
+        self.dfs[term_ids] = self.term_dictionary.dfs
+
+        cursor.execute('SELECT doc_id, collection_id, len FROM docs;')
+        docs = cursor.fetchnumpy()
+        n_docs = int(docs['doc_id'].max()) + 1 if len(docs['doc_id']) > 0 else 0
+        self.num_docs = len(docs['doc_id'])
+        self.avg_len = float(np.mean(docs['len'])) if self.num_docs > 0 else 0.0
+        self.doc_lens = np.zeros(n_docs, dtype=np.float64)
+        self.doc_lens[docs['doc_id']] = docs['len']
+        self.collection_ids = np.empty(n_docs, dtype=object)
+        self.collection_ids[docs['doc_id']] = docs['collection_id']
+
+        if db_connection.has_table('deleted_docs'):
+            cursor.execute('SELECT term_id, doc_id, tf FROM term_doc ANTI JOIN deleted_docs '
+                           'ON term_doc.doc_id = deleted_docs.doc_id ORDER BY term_id, doc_id;')
+        else:
+            cursor.execute('SELECT term_id, doc_id, tf FROM term_doc ORDER BY term_id, doc_id;')
+        term_doc = cursor.fetchnumpy()
+        self.doc_ids = np.asarray(term_doc['doc_id'], dtype=np.int32)
+        self.tfs = np.asarray(term_doc['tf'], dtype=np.float64)
+        self.term_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_doc['term_id'], minlength=n_terms), out=self.term_offsets[1:])
+
+    def get_query_term_ids(self, topic: str) -> np.ndarray:
+        return self.term_dictionary.lookup(topic.split(' '))[0]
+
+    def get_postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        return self.doc_ids[start:end], self.tfs[start:end]
+
+    def bm25_term_scores(self, term_id: int, k1: float, b: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the doc ids of the postings of a term and their BM25 scores, computed as in RobertsonBM25.
+        """
+        doc_ids, tfs = self.get_postings(term_id)
+        df = self.dfs[term_id]
+        idf = np.log10((self.num_docs - df + 0.5) / (df + 0.5))
+        return doc_ids, idf * tfs / (tfs + k1 * (1 - b + b * self.doc_lens[doc_ids] / self.avg_len))
+
+    def search_bm25(self, topic: str, k1: float, b: float, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the collection ids and scores of the top n documents for the topic, ordered on descending score.
+        """
+        term_scores = [self.bm25_term_scores(term_id, k1, b) for term_id in self.get_query_term_ids(topic)]
+        if len(term_scores) == 0:
+            return np.empty(0, dtype=object), np.empty(0, dtype=np.float64)
+        doc_ids = np.concatenate([d for d, _ in term_scores])
+        scores = np.concatenate([s for _, s in term_scores])
+        if len(term_scores) > 1:
+            doc_ids, inverse = np.unique(doc_ids, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores)
+        return self.top_n(doc_ids, scores, n)
+
+    def top_n(self, doc_ids: np.ndarray, scores: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the collection ids and scores of the n highest scoring documents, ties are broken on doc id.
+        """
+        if len(scores) > n:
+            kth_score = -np.partition(-scores, n - 1)[n - 1]
+            top = scores >= kth_score
+            doc_ids, scores = doc_ids[top], scores[top]
+        order = np.lexsort((doc_ids, -scores))[:n]
+        return self.collection_ids[doc_ids[order]], scores[order]
@@ -0,0 +1,107 @@
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Tuple, Union
+
+import numpy as np
+
+
+class ResultCache:
+    """
+    LRU cache of ranked lists, stored as arrays of collection ids and scores. Keys consist of the normalized terms
+    of a topic (sorted and deduplicated, as the bag of words retrieval models ignore term order and repetitions)
+    and the parameters of the retrieval method.
+
+    Every entry is stored with the index version it was computed for, entries of an older version are dropped on
+    lookup. The least recently used entries are evicted when there are more than max_entries entries, or when the
+    estimated size of the entries exceeds max_bytes. If a file is given the cache is loaded from it, and save()
+    writes the cache to it. A cache file should only be used for a single index.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = None, file: str = None) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.file = file
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        if file is not None and os.path.exists(file):
+            self.load()
+
+    @staticmethod
+    def get_key(topic: str, *parameters: Any) -> tuple:
+        return (tuple(sorted(set(topic.split(' ')))),) + parameters
+
+    @staticmethod
+    def get_entry_size(collection_ids: np.ndarray, scores: np.ndarray) -> int:
+        return collection_ids.nbytes + scores.nbytes + sum(sys.getsizeof(c) for c in collection_ids.tolist())
+
+    def get(self, key: tuple, version: int) -> Union[Tuple[np.ndarray, np.ndarray], None]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] != version:
+                self.remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: tuple, version: int, collection_ids: np.ndarray, scores: np.ndarray) -> None:
+        size = self.get_entry_size(collection_ids, scores)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        collection_ids.setflags(write=False)
+        scores.setflags(write=False)
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = (version, collection_ids, scores, size)
+            self.n_bytes += size
+            while len(self.entries) > self.max_entries or \
+                    (self.max_bytes is not None and self.n_bytes > self.max_bytes):
+                self.remove(next(iter(self.entries)))
+
+    def remove(self, key: tuple) -> None:
+        self.n_bytes -= self.entries.pop(key)[3]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.n_bytes = 0
+
+    def get_metrics(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.n_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups > 0 else 0.0
+            }
+
+    def save(self) -> None:
+        if self.file is None:
+            raise IOError('no cache file was given')
+        with self.lock:
+            entries = list(self.entries.items())
+        with open(self.file + '.tmp', 'wb') as cache_file:
+            pickle.dump(entries, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(self.file + '.tmp', self.file)
+
+    def load(self) -> None:
+        with open(self.file, 'rb') as cache_file:
+            entries = pickle.load(cache_file)
+        with self.lock:
+            self.entries = OrderedDict(entries)
+            self.n_bytes = sum(entry[3] for entry in self.entries.values())
+            while len(self.entries) > self.max_entries or \
+                    (self.max_bytes is not None and self.n_bytes > self.max_bytes):
+                self.remove(next(iter(self.entries)))
@@ -6,5 +6,11 @@ class Aggregate:
     def get_aggregator(self) -> str:
         raise NotImplementedError("You should implement this method in your retrieval model class.")
 
-    def get_create_ranked_list(self, n: int) -> str:
+    def get_create_ranked_list(self, n: str) -> str:
+        raise NotImplementedError("You should implement this method in your retrieval model class.")
+
+    def get_batch_aggregator(self) -> str:
+        raise NotImplementedError("You should implement this method in your retrieval model class.")
+
+    def get_batch_create_ranked_list(self, n: str) -> str:
         raise NotImplementedError("You should implement this method in your retrieval model class.")
@@ -1,32 +1,87 @@
 from .aggregate import Aggregate
 from ..generic_text_retrieval_model import GenericTextRetrievalModel
+from ...term_dictionary import TermDictionary
 
 
 class BagOfWordsRetrievalModel(GenericTextRetrievalModel, Aggregate):
-    def __init__(self) -> None:
-        GenericTextRetrievalModel.__init__(self)
+    def __init__(self, exclude_deleted: bool = False, use_collection_stats: bool = False,
+                 term_dictionary: TermDictionary = None) -> None:
+        GenericTextRetrievalModel.__init__(self, term_dictionary)
         Aggregate.__init__(self)
+        self.exclude_deleted = exclude_deleted
+        self.use_collection_stats = use_collection_stats
 
-    def construct_query(self, topic: str) -> str:
-        super_query = super().construct_query(topic)
+    def construct_parameterized_query(self) -> str:
+        super_query = super().construct_parameterized_query()
         return super_query + ", qterms AS (" \
                              "SELECT term_doc.term_id, term_doc.doc_id, term_doc.tf, qtermids.df " \
                              "FROM term_doc " \
                              "JOIN qtermids " \
                              "ON term_doc.term_id = qtermids.term_id" \
+                             f"{self.get_deleted_filter()}" \
                              ") "
 
+    def construct_batch_query(self, topics_table: str) -> str:
+        super_query = super().construct_batch_query(topics_table)
+        return super_query + ", qterms AS (" \
+                             "SELECT qtermids.qid, term_doc.term_id, term_doc.doc_id, term_doc.tf, qtermids.df " \
+                             "FROM term_doc " \
+                             "JOIN qtermids " \
+                             "ON term_doc.term_id = qtermids.term_id" \
+                             f"{self.get_deleted_filter()}" \
+                             ") "
+
+    def get_deleted_filter(self, postings_table: str = 'term_doc') -> str:
+        if not self.exclude_deleted:
+            return ""
+        return " ANTI JOIN deleted_docs " \
+               f"ON {postings_table}.doc_id = deleted_docs.doc_id"
+
+    def get_num_docs(self) -> str:
+        if self.use_collection_stats:
+            return "(SELECT num_docs FROM collection_stats WHERE field = 'docs')"
+        return "(SELECT count(*) from docs)"
+
+    def get_avg_doc_len(self) -> str:
+        if self.use_collection_stats:
+            return "(SELECT avg_len FROM collection_stats WHERE field = 'docs')"
+        return "(SELECT AVG(len) from docs)"
+
     def get_retrieval_model(self) -> str:
         return super().get_retrieval_model()
 
     def get_aggregator(self) -> str:
         return ", scores AS (" \
-               "SELECT subscores.collection_id, SUM(subscores.subscore) AS score " \
+               "SELECT subscores.doc_id, SUM(subscores.subscore) AS score " \
                "FROM subscores " \
-               "GROUP BY subscores.collection_id) "
+               "GROUP BY subscores.doc_id) "
 
-    def get_create_ranked_list(self, n: int) -> str:
-        return "SELECT scores.collection_id, scores.score " \
+    def get_create_ranked_list(self, n: str) -> str:
+        """
+        Scores are aggregated per doc_id, the collection ids are only looked up for the top n documents.
+        """
+        return "SELECT docs.collection_id, top_scores.score " \
+               "FROM (SELECT scores.doc_id, scores.score " \
                "FROM scores " \
                "ORDER BY scores.score DESC " \
-               f"LIMIT {n}"
+               f"LIMIT {n}) AS top_scores " \
+               "JOIN docs " \
+               "ON top_scores.doc_id = docs.doc_id " \
+               "ORDER BY top_scores.score DESC"
+
+    def get_batch_aggregator(self) -> str:
+        return ", scores AS (" \
+               "SELECT subscores.qid, subscores.doc_id, SUM(subscores.subscore) AS score " \
+               "FROM subscores " \
+               "GROUP BY subscores.qid, subscores.doc_id) "
+
+    def get_batch_create_ranked_list(self, n: str) -> str:
+        return "SELECT top_scores.qid, docs.collection_id, top_scores.score " \
+               "FROM (SELECT ranked_scores.qid, ranked_scores.doc_id, ranked_scores.score, ranked_scores.rank " \
+               "FROM (SELECT scores.qid, scores.doc_id, scores.score, " \
+               "ROW_NUMBER() OVER (PARTITION BY scores.qid ORDER BY scores.score DESC) AS rank " \
+               "FROM scores) AS ranked_scores " \
+               f"WHERE ranked_scores.rank <= {n}) AS top_scores " \
+               "JOIN docs " \
+               "ON top_scores.doc_id = docs.doc_id " \
+               "ORDER BY top_scores.qid, top_scores.rank"
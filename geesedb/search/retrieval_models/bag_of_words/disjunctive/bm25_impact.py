@@ -0,0 +1,54 @@
+from .disjunctive_retieval_model import DisjunctiveRetrievalModel
+from ...generic_text_retrieval_model import GenericTextRetrievalModel
+from ....term_dictionary import TermDictionary
+
+
+class BM25Impact(DisjunctiveRetrievalModel):
+    """
+    BM25 on the impacts that are materialized by ImpactsFromTermDoc, the score of a document is the sum of the
+    impacts of the query terms.
+    """
+    def __init__(self, n: int = 1000, scale: float = 1.0, exclude_deleted: bool = False,
+                 term_dictionary: TermDictionary = None) -> None:
+        DisjunctiveRetrievalModel.__init__(self, exclude_deleted, term_dictionary=term_dictionary)
+        self.n = n
+        self.scale = scale
+
+    def construct_parameterized_query(self) -> str:
+        return GenericTextRetrievalModel.construct_parameterized_query(self) + \
+               ", qterms AS (" \
+               "SELECT term_doc_impact.doc_id, term_doc_impact.impact " \
+               "FROM term_doc_impact " \
+               "JOIN qtermids " \
+               "ON term_doc_impact.term_id = qtermids.term_id" \
+               f"{self.get_deleted_filter('term_doc_impact')}" \
+               ")" + \
+               self.get_aggregator() + \
+               self.get_create_ranked_list('$n')
+
+    def construct_batch_query(self, topics_table: str) -> str:
+        return GenericTextRetrievalModel.construct_batch_query(self, topics_table) + \
+               ", qterms AS (" \
+               "SELECT qtermids.qid, term_doc_impact.doc_id, term_doc_impact.impact " \
+               "FROM term_doc_impact " \
+               "JOIN qtermids " \
+               "ON term_doc_impact.term_id = qtermids.term_id" \
+               f"{self.get_deleted_filter('term_doc_impact')}" \
+               ")" + \
+               self.get_batch_aggregator() + \
+               self.get_batch_create_ranked_list('$n')
+
+    def get_model_parameters(self) -> dict:
+        return {'n': int(self.n), 'scale': float(self.scale)}
+
+    def get_aggregator(self) -> str:
+        return ", scores AS (" \
+               "SELECT qterms.doc_id, SUM(qterms.impact) * $scale AS score " \
+               "FROM qterms " \
+               "GROUP BY qterms.doc_id) "
+
+    def get_batch_aggregator(self) -> str:
+        return ", scores AS (" \
+               "SELECT qterms.qid, qterms.doc_id, SUM(qterms.impact) * $scale AS score " \
+               "FROM qterms " \
+               "GROUP BY qterms.qid, qterms.doc_id) "
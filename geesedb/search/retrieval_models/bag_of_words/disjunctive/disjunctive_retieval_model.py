@@ -1,22 +1,31 @@
 from ..bow_retrieval_model import BagOfWordsRetrievalModel
+from ....term_dictionary import TermDictionary
 
 
 class DisjunctiveRetrievalModel(BagOfWordsRetrievalModel):
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, exclude_deleted: bool = False, use_collection_stats: bool = False,
+                 term_dictionary: TermDictionary = None) -> None:
+        super().__init__(exclude_deleted, use_collection_stats, term_dictionary)
 
     def get_aggregator(self) -> str:
         return super().get_aggregator()
 
-    def construct_query(self, topic: str) -> str:
-        return super().construct_query(topic) + \
+    def construct_parameterized_query(self) -> str:
+        return super().construct_parameterized_query() + \
                ", condocs AS (" \
                "SELECT qterms.doc_id " \
                "FROM qterms " \
                "GROUP BY qterms.doc_id)"
 
-    def get_create_ranked_list(self, n: int) -> str:
+    def construct_batch_query(self, topics_table: str) -> str:
+        return super().construct_batch_query(topics_table) + \
+               ", condocs AS (" \
+               "SELECT qterms.qid, qterms.doc_id " \
+               "FROM qterms " \
+               "GROUP BY qterms.qid, qterms.doc_id)"
+
+    def get_create_ranked_list(self, n: str) -> str:
         return super().get_create_ranked_list(n)
 
     def get_retrieval_model(self) -> str:
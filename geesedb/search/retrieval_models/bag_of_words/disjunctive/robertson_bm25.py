@@ -1,28 +1,52 @@
 from .disjunctive_retieval_model import DisjunctiveRetrievalModel
+from ....term_dictionary import TermDictionary
 
 
 class RobertsonBM25(DisjunctiveRetrievalModel):
-    def __init__(self, k1: float = 0.9, b: float = 0.4, n: int = 1000) -> None:
-        DisjunctiveRetrievalModel.__init__(self)
+    def __init__(self, k1: float = 0.9, b: float = 0.4, n: int = 1000, exclude_deleted: bool = False,
+                 use_collection_stats: bool = False, term_dictionary: TermDictionary = None) -> None:
+        DisjunctiveRetrievalModel.__init__(self, exclude_deleted, use_collection_stats, term_dictionary)
         self.k1 = k1
         self.b = b
         self.n = n
 
-    def construct_query(self, topic: str) -> str:
-        return DisjunctiveRetrievalModel.construct_query(self, topic) + \
+    def construct_parameterized_query(self) -> str:
+        return DisjunctiveRetrievalModel.construct_parameterized_query(self) + \
                self.get_retrieval_model() + \
                DisjunctiveRetrievalModel.get_aggregator(self) + \
-               DisjunctiveRetrievalModel.get_create_ranked_list(self, self.n)
+               DisjunctiveRetrievalModel.get_create_ranked_list(self, '$n')
+
+    def construct_batch_query(self, topics_table: str) -> str:
+        return DisjunctiveRetrievalModel.construct_batch_query(self, topics_table) + \
+               self.get_batch_retrieval_model() + \
+               DisjunctiveRetrievalModel.get_batch_aggregator(self) + \
+               DisjunctiveRetrievalModel.get_batch_create_ranked_list(self, '$n')
+
+    def get_model_parameters(self) -> dict:
+        return {'k1': float(self.k1), 'b': float(self.b), 'n': int(self.n)}
+
+    def get_subscore(self) -> str:
+        return f"(LOG(({self.get_num_docs()}-df+0.5)/(df+0.5))*tf" \
+               "/" \
+               f"(tf+$k1*(1-$b+$b*len/{self.get_avg_doc_len()}))" \
+               ") AS subscore "
 
     def get_retrieval_model(self) -> str:
         return ", subscores AS (" \
-               "SELECT docs.collection_id, " \
-               f"(LOG(((SELECT count(*) from docs)-df+0.5)/(df+0.5))*tf" \
-               "/" \
-               f"(tf+{self.k1}*(1-{self.b}+{self.b}*len/(SELECT AVG(len) from docs)))" \
-               ") AS subscore " \
+               "SELECT qterms.doc_id, " \
+               f"{self.get_subscore()}" \
                "FROM qterms " \
                "JOIN condocs " \
                "ON qterms.doc_id = condocs.doc_id " \
                "JOIN docs " \
                "ON qterms.doc_id = docs.doc_id)"
+
+    def get_batch_retrieval_model(self) -> str:
+        return ", subscores AS (" \
+               "SELECT qterms.qid, qterms.doc_id, " \
+               f"{self.get_subscore()}" \
+               "FROM qterms " \
+               "JOIN condocs " \
+               "ON qterms.qid = condocs.qid AND qterms.doc_id = condocs.doc_id " \
+               "JOIN docs " \
+               "ON qterms.doc_id = docs.doc_id)"
@@ -1,14 +1,78 @@
+import re
+from typing import Any
+
+import numpy as np
+
+from ..term_dictionary import TermDictionary
+
+
 class GenericTextRetrievalModel:
+    """
+    Retrieval models construct a single parameterized query, in which the query terms are bound to $terms and the
+    parameters of the model (e.g. $k1, $b and $n) to their own named parameters. The query text is the same for
+    every topic, so topics are never spliced into the SQL.
+
+    If a TermDictionary is given the query terms are resolved in memory, and their term ids and document frequencies
+    are bound to $term_ids and $dfs instead, so the term_dict table is not scanned.
+    """
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, term_dictionary: TermDictionary = None) -> None:
+        self.term_dictionary = term_dictionary
 
     def construct_query(self, topic: str) -> str:
+        """
+        Returns the query for the topic with all parameters inlined as literals.
+        """
+        return self.bind_parameters(self.construct_parameterized_query(), self.get_parameters(topic))
+
+    def construct_parameterized_query(self) -> str:
+        if self.term_dictionary is not None:
+            return "WITH qtermids AS (" \
+                   "SELECT UNNEST($term_ids) AS term_id, UNNEST($dfs) AS df" \
+                   ")"
         return "WITH qtermids AS (" \
                "SELECT term_dict.term_id, term_dict.df " \
                "FROM term_dict " \
-               "WHERE term_dict.string IN ('{}')" \
-               ")".format("', '".join(topic.split(' ')))
+               "WHERE list_contains($terms, term_dict.string)" \
+               ")"
+
+    def construct_batch_query(self, topics_table: str) -> str:
+        return "WITH qtermids AS (" \
+               "SELECT DISTINCT topics.qid, term_dict.term_id, term_dict.df " \
+               f"FROM {topics_table} AS topics " \
+               "JOIN term_dict " \
+               "ON term_dict.string = topics.string" \
+               ")"
+
+    def get_parameters(self, topic: str) -> dict:
+        if self.term_dictionary is not None:
+            term_ids, dfs = self.term_dictionary.lookup(topic.split(' '))
+            return {'term_ids': term_ids.tolist(), 'dfs': dfs.tolist(), **self.get_model_parameters()}
+        return {'terms': topic.split(' '), **self.get_model_parameters()}
+
+    def get_model_parameters(self) -> dict:
+        return {}
+
+    @staticmethod
+    def to_literal(value: Any) -> str:
+        if isinstance(value, str):
+            return "'{}'".format(value.replace("'", "''"))
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            return '[{}]'.format(', '.join(GenericTextRetrievalModel.to_literal(item) for item in value))
+        elif isinstance(value, (bool, np.bool_)):
+            return 'TRUE' if value else 'FALSE'
+        elif isinstance(value, (int, np.integer)):
+            return str(int(value))
+        elif isinstance(value, (float, np.floating)):
+            if not np.isfinite(value):
+                return f"'{float(value)}'::DOUBLE"
+            return repr(float(value))
+        raise TypeError(f'cannot inline a value of type {type(value).__name__} in a query')
+
+    @staticmethod
+    def bind_parameters(query: str, parameters: dict) -> str:
+        return re.sub(r'\$(\w+)', lambda match: GenericTextRetrievalModel.to_literal(parameters[match.group(1)]),
+                      query)
 
     def get_retrieval_model(self) -> str:
         raise NotImplementedError("You should implement this method in your retrieval model class.")
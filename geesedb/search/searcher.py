@@ -1,24 +1,42 @@
 #! /usr/bin/env python3
 
 import argparse
-from typing import Any, Callable, Union
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 
 from ..connection import get_connection
-from ..search import RobertsonBM25
+from ..index import ImpactsFromTermDoc
+from ..search import BM25Impact, RobertsonBM25
+from .csr_index import CSRIndex
+from .result_cache import ResultCache
+from .term_dictionary import TermDictionary
 
 
 class Searcher:
 
     def __init__(self, **kwargs: Any) -> None:
         self.arguments = self.get_arguments(kwargs)
-        self.db_connection = get_connection(self.arguments['database'])
+        self.db_connection = get_connection(self.arguments['database'], self.arguments['read_only'])
         self.ranking_method = None
         self.fetch = self.set_return_type()
-        if self.arguments['retrieval_method'] == 'BM25_robertson':
-            self.ranking_method = RobertsonBM25(self.arguments['k1'], self.arguments['b'], self.arguments['n'])
+        self.csr_index = None
+        self.term_dictionary = None
+        self.refresh_lock = threading.Lock()
+        self.load_in_memory_indexes()
+        self.set_ranking_method()
+        self.index_version = self.db_connection.get_index_version()
+        self.index_checked = time.monotonic()
+        self.result_cache = None
+        if self.arguments['cache_size'] is not None or self.arguments['cache_file'] is not None:
+            self.result_cache = ResultCache(self.arguments['cache_size'] or 1024, self.arguments['cache_max_bytes'],
+                                            self.arguments['cache_file'])
 
     @staticmethod
     def get_arguments(kwargs: Any) -> dict:
@@ -28,38 +46,301 @@ class Searcher:
             'k1': 0.9,
             'b': 0.4,
             'n': 1000,
-            'return_type': 'tuple'
+            'impact_bits': None,
+            'return_type': 'tuple',
+            'backend': 'duckdb',
+            'read_only': False,
+            'cache_size': None,
+            'cache_max_bytes': None,
+            'cache_file': None,
+            'in_memory_term_dict': False,
+            'index_check_interval': 1.0
         }
         for key, item in arguments.items():
             if kwargs.get(key) is not None:
                 arguments[key] = kwargs.get(key)
         if arguments['database'] is None:
             raise IOError('database path needs to be provided')
+        if arguments['backend'] == 'numpy' and arguments['retrieval_method'] == 'BM25_impact':
+            raise IOError('the numpy backend does not support BM25_impact')
         return arguments
 
-    def set_return_type(self) -> Callable[[], Union[list, pd.DataFrame, np.array]]:
+    def set_return_type(self, cursor: Any = None) -> Callable[[], Union[list, pd.DataFrame, np.array, pa.Table]]:
+        if cursor is None:
+            cursor = self.db_connection.cursor
         if self.arguments['return_type'] == 'list':
-            fetch = self.db_connection.cursor.fetchall
+            fetch = cursor.fetchall
         elif self.arguments['return_type'] == 'numpy':
-            fetch = self.db_connection.cursor.fetchnumpy
+            fetch = cursor.fetchnumpy
+        elif self.arguments['return_type'] == 'arrow':
+            fetch = getattr(cursor, 'to_arrow_table', None) or cursor.fetch_arrow_table
         else:
-            fetch = self.db_connection.cursor.fetchdf
+            fetch = cursor.fetchdf
         return fetch
 
+    def set_ranking_method(self) -> None:
+        exclude_deleted = self.db_connection.has_table('deleted_docs')
+        if self.arguments['retrieval_method'] == 'BM25_robertson':
+            self.ranking_method = RobertsonBM25(self.arguments['k1'], self.arguments['b'], self.arguments['n'],
+                                                exclude_deleted, self.db_connection.has_table('collection_stats'),
+                                                self.term_dictionary)
+        elif self.arguments['retrieval_method'] == 'BM25_impact':
+            scale = self.load_impacts()
+            self.ranking_method = BM25Impact(self.arguments['n'], scale, exclude_deleted, self.term_dictionary)
+
+    def load_in_memory_indexes(self) -> None:
+        if self.arguments['backend'] == 'numpy':
+            self.csr_index = CSRIndex(self.db_connection)
+            self.term_dictionary = self.csr_index.term_dictionary
+        elif self.arguments['in_memory_term_dict']:
+            self.term_dictionary = TermDictionary(self.db_connection)
+
+    def load_impacts(self) -> float:
+        """
+        Rebuilds the BM25 impacts if there are none, or if they were computed for other parameters or collection
+        statistics. Returns the scale of the impacts. It runs again when the index version changes (e.g. after
+        appending documents), see check_index_version.
+        """
+        cursor = self.db_connection.cursor
+        meta = ImpactsFromTermDoc.get_impact_meta(cursor)
+        cursor.execute('SELECT COUNT(*), AVG(len) FROM docs;')
+        num_docs, avg_len = cursor.fetchone()
+        if meta is None or (meta['k1'], meta['b'], meta['bits'], meta['num_docs'], meta['avg_len']) != \
+                (self.arguments['k1'], self.arguments['b'], self.arguments['impact_bits'], num_docs, avg_len):
+            ImpactsFromTermDoc(database=self.arguments['database'], k1=self.arguments['k1'], b=self.arguments['b'],
+                               bits=self.arguments['impact_bits']).create_impacts()
+            meta = ImpactsFromTermDoc.get_impact_meta(cursor)
+        return meta['scale']
+
+    def refresh(self) -> None:
+        """
+        Reloads the in memory index and the ranking method after the index has changed.
+        """
+        self.index_version = self.db_connection.get_index_version()
+        self.index_checked = time.monotonic()
+        self.load_in_memory_indexes()
+        self.set_ranking_method()
+
+    def check_index_version(self, force: bool = False) -> int:
+        """
+        Returns the version of the index. The version is read from the database (with the DBConnection of the calling
+        thread) at most once every index_check_interval seconds, or always with force, so single searches do not
+        pay a round-trip for it. If the index has changed since the Searcher was refreshed, the deleted documents,
+        in memory indexes and materialized scores are reloaded (or rebuilt) first.
+        """
+        now = time.monotonic()
+        if not force and now - self.index_checked < self.arguments['index_check_interval']:
+            return self.index_version
+        self.index_checked = now
+        version = get_connection(self.arguments['database'], self.arguments['read_only']).get_index_version()
+        if version != self.index_version:
+            with self.refresh_lock:
+                if version != self.index_version:
+                    self.refresh()
+        return version
+
     def set_k1(self, k1: float):
         self.arguments['k1'] = k1
+        self.set_ranking_method()
 
     def set_b(self, b: float):
         self.arguments['b'] = b
+        self.set_ranking_method()
+
+    def set_n(self, n: int):
+        self.arguments['n'] = n
+        self.set_ranking_method()
+
+    def format_results(self, collection_ids: np.ndarray, scores: np.ndarray,
+                       qids: np.ndarray = None) -> Union[list, pd.DataFrame, dict, pa.Table]:
+        columns = {'collection_id': collection_ids, 'score': scores}
+        if qids is not None:
+            columns = {'qid': qids, **columns}
+        if self.arguments['return_type'] == 'list':
+            return list(zip(*[column.tolist() for column in columns.values()]))
+        elif self.arguments['return_type'] == 'numpy':
+            return columns
+        elif self.arguments['return_type'] == 'arrow':
+            return self.to_arrow(collection_ids, scores, qids)
+        else:
+            return pd.DataFrame(columns)
+
+    @staticmethod
+    def to_arrow(collection_ids: np.ndarray, scores: np.ndarray, qids: np.ndarray = None) -> pa.Table:
+        columns = {'collection_id': pa.array(collection_ids, pa.string()), 'score': pa.array(scores, pa.float64())}
+        if qids is not None:
+            columns = {'qid': pa.array(qids, pa.string()), **columns}
+        return pa.table(columns)
 
-    def set_n(self, k1: float):
-        self.arguments['n'] = k1
+    @staticmethod
+    def fetch_record_batches(cursor: Any, batch_size: int) -> pa.RecordBatchReader:
+        if hasattr(cursor, 'to_arrow_reader'):
+            return cursor.to_arrow_reader(batch_size)
+        return cursor.fetch_record_batch(batch_size)
+
+    def search_topics(self, topics: Sequence[Sequence[str]]) -> Union[list, pd.DataFrame, np.array, pa.Table]:
+        """
+        Searches a batch of (qid, topic) pairs, like the ones returned by get_topics_backgroundlinking. The terms of
+        all topics are loaded in a temporary table and scored with a single query, that keeps the top n documents
+        of every topic. The results have a qid column and are ordered on qid and descending score. The index version
+        is checked once per batch.
+        """
+        self.check_index_version(force=True)
+        if self.csr_index is not None:
+            return self.format_results(*self.search_topics_in_memory(topics))
+        cursor = self.db_connection.cursor
+        try:
+            self.execute_topics(cursor, topics)
+            return self.fetch()
+        finally:
+            cursor.execute('DROP TABLE IF EXISTS search_topics;')
+
+    def execute_topics(self, cursor: Any, topics: Sequence[Sequence[str]]) -> None:
+        topic_terms = pd.DataFrame([(str(qid), term) for qid, topic in topics for term in topic.split(' ')],
+                                   columns=['qid', 'string'], dtype=str)
+        cursor.register('topic_terms', topic_terms)
+        cursor.execute('CREATE OR REPLACE TEMPORARY TABLE search_topics AS SELECT qid, string FROM topic_terms;')
+        cursor.unregister('topic_terms')
+        cursor.execute(self.ranking_method.construct_batch_query('search_topics'),
+                       self.ranking_method.get_model_parameters())
+
+    def search_topics_in_memory(self, topics: Sequence[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the collection ids, scores and qids of the top n documents of every topic.
+        """
+        qids, collection_ids, scores = [], [], []
+        for qid, topic in sorted(topics, key=lambda qid_topic: str(qid_topic[0])):
+            topic_collection_ids, topic_scores = self.search_topic_in_memory(topic)
+            qids.append(np.full(len(topic_scores), str(qid), dtype=object))
+            collection_ids.append(topic_collection_ids)
+            scores.append(topic_scores)
+        if len(qids) == 0:
+            return np.empty(0, dtype=object), np.empty(0, dtype=np.float64), np.empty(0, dtype=object)
+        return np.concatenate(collection_ids), np.concatenate(scores), np.concatenate(qids)
 
-    def search_topic(self, topic: str) -> Union[list, pd.DataFrame, np.array]:
-        query = self.ranking_method.construct_query(topic)
-        self.db_connection.cursor.execute(query)
+    def search_topic_in_memory(self, topic: str) -> Tuple[np.ndarray, np.ndarray]:
+        return self.csr_index.search_bm25(topic, self.arguments['k1'], self.arguments['b'], self.arguments['n'])
+
+    def search_topic(self, topic: str) -> Union[list, pd.DataFrame, np.array, pa.Table]:
+        version = self.check_index_version()
+        if self.result_cache is not None:
+            return self.format_results(*self.search_topic_cached(topic, version=version))
+        if self.csr_index is not None:
+            return self.format_results(*self.search_topic_in_memory(topic))
+        self.execute_topic(self.db_connection.cursor, topic)
         return self.fetch()
 
+    def search_topic_with_cursor(self, cursor: Any, topic: str,
+                                 version: int = None) -> Union[list, pd.DataFrame, np.array, pa.Table]:
+        """
+        Searches the topic like search_topic, with the same result cache and index version check, but runs the query
+        on the given cursor so worker threads can search at the same time. The version check is skipped when the
+        version was already checked for a batch of topics.
+        """
+        if version is None:
+            version = self.check_index_version()
+        if self.result_cache is not None:
+            return self.format_results(*self.search_topic_cached(topic, version=version, cursor=cursor))
+        if self.csr_index is not None:
+            return self.format_results(*self.search_topic_in_memory(topic))
+        self.execute_topic(cursor, topic)
+        return self.set_return_type(cursor)()
+
+    def search_topic_batches(self, topic: str, batch_size: int = 100000) -> Iterator[pa.RecordBatch]:
+        """
+        Yields the results for the topic as Arrow record batches of at most batch_size rows. The query runs on its own
+        cursor, so the results are streamed from DuckDB instead of materialized at once.
+        """
+        self.check_index_version()
+        if self.csr_index is not None:
+            yield from self.to_arrow(*self.search_topic_in_memory(topic)).to_batches(batch_size)
+            return
+        cursor = self.db_connection.connection.cursor()
+        try:
+            self.execute_topic(cursor, topic)
+            yield from self.fetch_record_batches(cursor, batch_size)
+        finally:
+            cursor.close()
+
+    def search_topics_batches(self, topics: Sequence[Sequence[str]],
+                              batch_size: int = 100000) -> Iterator[pa.RecordBatch]:
+        """
+        Yields the results of search_topics as Arrow record batches of at most batch_size rows.
+        """
+        self.check_index_version(force=True)
+        if self.csr_index is not None:
+            yield from self.to_arrow(*self.search_topics_in_memory(topics)).to_batches(batch_size)
+            return
+        cursor = self.db_connection.connection.cursor()
+        try:
+            self.execute_topics(cursor, topics)
+            yield from self.fetch_record_batches(cursor, batch_size)
+        finally:
+            cursor.close()
+
+    def execute_topic(self, cursor: Any, topic: str) -> None:
+        """
+        Executes the query of the ranking method on the cursor, with the topic terms and the parameters of the
+        ranking method bound to the query parameters.
+        """
+        cursor.execute(self.ranking_method.construct_parameterized_query(), self.ranking_method.get_parameters(topic))
+
+    def search_topic_cached(self, topic: str, version: int = None,
+                            cursor: Any = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the collection ids and scores for the topic from the result cache, or searches and caches them if
+        they are not cached for the current version of the index. The query runs on the given cursor, by default on
+        the cursor of the Searcher.
+        """
+        key = self.result_cache.get_key(topic, self.arguments['retrieval_method'], self.arguments['k1'],
+                                        self.arguments['b'], self.arguments['n'], self.arguments['impact_bits'])
+        if version is None:
+            version = self.check_index_version()
+        results = self.result_cache.get(key, version)
+        if results is None:
+            if self.csr_index is not None:
+                results = self.search_topic_in_memory(topic)
+            else:
+                if cursor is None:
+                    cursor = self.db_connection.cursor
+                self.execute_topic(cursor, topic)
+                columns = cursor.fetchnumpy()
+                results = np.asarray(columns['collection_id'], dtype=object), np.asarray(columns['score'])
+            self.result_cache.put(key, version, *results)
+        return results
+
+    def search_topics_parallel(self, topics: Sequence[str], workers: int = None,
+                               threads: int = None) -> list:
+        """
+        Searches the topics on a pool of worker threads, each with its own DuckDB cursor, and returns the results
+        in the order of the topics. The searches use the result cache of search_topic, the index version is checked
+        once for all topics.
+
+        DuckDB runs every query on its own pool of threads, which is set with threads while the topics are
+        searched. Short queries hardly benefit from intra-query parallelism, so with many workers use few threads
+        (e.g. workers equal to the number of cores and threads=1). By default all cores are used for workers and
+        the threads setting is left unchanged.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        version = self.check_index_version(force=True)
+
+        def search(topic: str) -> Union[list, pd.DataFrame, np.array, pa.Table]:
+            cursor = get_connection(self.arguments['database'], self.arguments['read_only']).cursor
+            return self.search_topic_with_cursor(cursor, topic, version)
+
+        cursor = self.db_connection.cursor
+        cursor.execute("SELECT current_setting('threads');")
+        previous_threads = cursor.fetchone()[0]
+        if threads is not None:
+            cursor.execute(f'SET threads = {int(threads)};')
+        try:
+            with ThreadPoolExecutor(workers) as executor:
+                return list(executor.map(search, topics))
+        finally:
+            if threads is not None:
+                cursor.execute(f'SET threads = {previous_threads};')
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
@@ -69,13 +350,38 @@ if __name__ == '__main__':
                         help='Name of the database / index')
     parser.add_argument('-r',
                         '--retrieval_method',
-                        choices=['BM25_robertson'],
-                        help="Use the Robertson's BM25 ranking function")
+                        choices=['BM25_robertson', 'BM25_impact'],
+                        help="Use the Robertson's BM25 ranking function, or sum its materialized impacts")
     parser.add_argument('-k1')
     parser.add_argument('-b')
     parser.add_argument('-n')
+    parser.add_argument('-q',
+                        '--impact_bits',
+                        type=int,
+                        choices=[8, 16],
+                        help='Quantize the materialized impacts to this number of bits')
     parser.add_argument('-t',
                         '--return_type',
-                        choices=['numpy', 'data_frame', 'list']
+                        choices=['numpy', 'data_frame', 'list', 'arrow']
                         )
+    parser.add_argument('--backend',
+                        choices=['duckdb', 'numpy'],
+                        help='Score with SQL queries in DuckDB, or with NumPy on an in memory copy of the index')
+    parser.add_argument('--cache_size',
+                        type=int,
+                        help='Cache the results of this number of topics')
+    parser.add_argument('--cache_max_bytes',
+                        type=int,
+                        help='Maximum estimated size of the cached results')
+    parser.add_argument('--cache_file',
+                        help='File the cached results are loaded from and saved to')
+    parser.add_argument('--in_memory_term_dict',
+                        action='store_true',
+                        help='Resolve query terms with an in memory copy of the term dictionary')
+    parser.add_argument('--index_check_interval',
+                        type=float,
+                        help='Minimum number of seconds between two checks whether the index has changed')
+    parser.add_argument('--read_only',
+                        action='store_true',
+                        help='Open the database in read-only mode')
     Searcher(**vars(parser.parse_args()))
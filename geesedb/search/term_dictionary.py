@@ -0,0 +1,65 @@
+from typing import Tuple
+
+import numpy as np
+
+from ..connection.connection import DBConnection
+
+
+class TermDictionary:
+    """
+    In memory copy of the term_dict table for resolving query terms without scanning the table. The UTF-8 encoded
+    terms are sorted and concatenated in a single byte buffer, term i is buffer[offsets[i]:offsets[i + 1]], so no
+    term is padded to the length of the longest one. The term ids and document frequencies are stored in arrays in
+    the same order, and terms are looked up with a binary search over the buffer.
+    """
+
+    def __init__(self, db_connection: DBConnection) -> None:
+        cursor = db_connection.cursor
+        cursor.execute('SELECT term_id, string, df FROM term_dict;')
+        term_dict = cursor.fetchnumpy()
+        strings = [string.encode('utf-8') for string in term_dict['string'].tolist()]
+        order = sorted(range(len(strings)), key=strings.__getitem__)
+        strings = [strings[i] for i in order]
+        self.buffer = b''.join(strings)
+        offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, strings), dtype=np.int64, count=len(strings)), out=offsets[1:])
+        self.offsets = offsets.astype(np.uint32) if len(self.buffer) < 2 ** 32 else offsets
+        order = np.array(order, dtype=np.int64)
+        self.term_ids = np.asarray(term_dict['term_id'], dtype=np.int64)[order]
+        self.dfs = np.asarray(term_dict['df'], dtype=np.int64)[order]
+
+    def __len__(self) -> int:
+        return len(self.term_ids)
+
+    def get_memory_usage(self) -> int:
+        """
+        Returns the number of bytes used by the buffer and the arrays of the dictionary.
+        """
+        return len(self.buffer) + self.offsets.nbytes + self.term_ids.nbytes + self.dfs.nbytes
+
+    def get_position(self, term: bytes) -> int:
+        """
+        Returns the position of the encoded term in the sorted terms, or -1 if it is not in the dictionary.
+        """
+        buffer, offsets = self.buffer, self.offsets
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if buffer[offsets[middle]:offsets[middle + 1]] < term:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and buffer[offsets[low]:offsets[low + 1]] == term:
+            return low
+        return -1
+
+    def lookup(self, terms: list) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the term ids and document frequencies of the terms that are in the dictionary, sorted on term id and
+        without duplicates.
+        """
+        positions = {self.get_position(term.encode('utf-8')) for term in terms}
+        positions.discard(-1)
+        positions = np.fromiter(positions, dtype=np.int64, count=len(positions))
+        order = np.argsort(self.term_ids[positions])
+        return self.term_ids[positions][order], self.dfs[positions][order]
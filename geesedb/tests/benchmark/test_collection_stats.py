@@ -0,0 +1,33 @@
+from os import path
+
+import pytest
+
+from ...benchmark import CollectionStatsBenchmark
+from ...connection import close_connection
+from ...index import FullTextFromCSV
+from ...search import RobertsonBM25
+
+
+def test_collection_stats_benchmark(tmp_path) -> None:
+    resources = path.dirname(path.dirname(__file__)) + '/resources/csv/'
+    try:
+        index = FullTextFromCSV(database=':memory:',
+                                docs_file=resources + 'example_docs.csv',
+                                term_dict_file=resources + 'example_term_dict.csv',
+                                term_doc_file=resources + 'example_term_doc.csv'
+                                )
+        index.load_data()
+        topics_file = tmp_path / 'topics.txt'
+        topics_file.write_text('1:Hello\n2:Hello 0\n3:0\n')
+        report = CollectionStatsBenchmark(database=':memory:', topics_file=str(topics_file), n=10, repetitions=1).run()
+        assert report['queries'] == 3
+        assert report['docs_scan_ms'] > 0 and report['collection_stats_ms'] > 0
+        assert report['saved_ms'] == pytest.approx(report['docs_scan_ms'] - report['collection_stats_ms'])
+
+        for topic in ['Hello', 'Hello 0', '0']:
+            index.connection.execute(RobertsonBM25(n=10, use_collection_stats=False).construct_query(topic))
+            scan_hits = index.connection.fetchall()
+            index.connection.execute(RobertsonBM25(n=10, use_collection_stats=True).construct_query(topic))
+            assert index.connection.fetchall() == scan_hits
+    finally:
+        close_connection()
@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+pytest.importorskip('pycypher')
+
+from ...benchmark.graph_join_order import GraphJoinOrderBenchmark  # noqa: E402
+from ...connection import close_connection  # noqa: E402
+
+
+def test_graph_join_order_benchmark(tmp_path) -> None:
+    output = str(tmp_path / 'benchmark.json')
+    report = GraphJoinOrderBenchmark(num_docs=200, num_authors=20, num_entities=100, repetitions=2,
+                                     output=output).run()
+    assert report == json.load(open(output))
+    assert len(report['results']) == 5
+    for result in report['results']:
+        assert result['pattern_order_ms'] > 0 and result['reordered_ms'] > 0
+        assert result['speedup'] == pytest.approx(result['pattern_order_ms'] / result['reordered_ms'])
+    assert report['mean_speedup'] > 0
+    close_connection()
@@ -0,0 +1,26 @@
+from os import path
+
+import pytest
+
+from ...benchmark import ParameterizedQueryBenchmark
+from ...connection import close_connection
+from ...index import FullTextFromCSV
+
+
+def test_parameterized_query_benchmark(tmp_path) -> None:
+    resources = path.dirname(path.dirname(__file__)) + '/resources/csv/'
+    try:
+        FullTextFromCSV(database=':memory:',
+                        docs_file=resources + 'example_docs.csv',
+                        term_dict_file=resources + 'example_term_dict.csv',
+                        term_doc_file=resources + 'example_term_doc.csv'
+                        ).load_data()
+        topics_file = tmp_path / 'topics.txt'
+        topics_file.write_text("1:Hello\n2:Hello 0\n3:it's 0\n")
+        report = ParameterizedQueryBenchmark(database=':memory:', topics_file=str(topics_file), n=10,
+                                             repetitions=1).run()
+        assert report['queries'] == 3
+        assert report['literal_ms'] > 0 and report['parameterized_ms'] > 0 and report['literal_planning_ms'] > 0
+        assert report['saved_ms'] == pytest.approx(report['literal_ms'] - report['parameterized_ms'])
+    finally:
+        close_connection()
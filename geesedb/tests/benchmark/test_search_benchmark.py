@@ -0,0 +1,28 @@
+import json
+
+from ...benchmark import SearchBenchmark
+from ...connection import close_connection
+
+
+def test_search_benchmark(tmp_path) -> None:
+    output = str(tmp_path / 'benchmark.json')
+    report = SearchBenchmark(database=str(tmp_path / 'benchmark.duckdb'), topic_sets=['core17', 'backgroundlinking18'],
+                             retrieval_methods=['BM25_robertson', 'BM25_impact'], n=10, repetitions=1,
+                             num_docs=200, vocabulary_size=500, doc_length=20, output=output).run()
+    assert report == json.load(open(output))
+    assert report['indexed_docs'] == 200
+    assert [(result['topic_set'], result['retrieval_method'], result['backend']) for result in report['results']] == [
+        ('core17', 'BM25_robertson', 'duckdb'), ('backgroundlinking18', 'BM25_robertson', 'duckdb'),
+        ('core17', 'BM25_robertson', 'numpy'), ('backgroundlinking18', 'BM25_robertson', 'numpy'),
+        ('core17', 'BM25_impact', 'duckdb'), ('backgroundlinking18', 'BM25_impact', 'duckdb')
+    ]
+    for result in report['results']:
+        assert result['queries'] == 50
+        assert 0 < result['warm']['p50_ms'] <= result['warm']['p95_ms'] <= result['warm']['p99_ms']
+        assert result['warm']['qps'] > 0 and result['batch_qps'] > 0
+        assert result['peak_python_memory_bytes'] > 0
+    term_lookup = report['term_lookup']
+    assert term_lookup['terms'] > 0
+    assert 0 < term_lookup['memory_bytes'] < term_lookup['fixed_width_memory_bytes']
+    assert term_lookup['in_memory_mean_ms'] > 0 and term_lookup['sql_mean_ms'] > 0
+    close_connection()
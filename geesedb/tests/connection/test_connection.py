@@ -1,4 +1,11 @@
-from ...connection import get_connection, close_connection
+import gc
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+import pytest
+
+from ...connection import get_connection, get_database_cache, close_connection
 
 
 def test_create_connection() -> None:
@@ -7,3 +14,61 @@ def test_create_connection() -> None:
     cursor.execute("SELECT 1;")
     assert cursor.fetchone() == (1,)
     close_connection()
+
+
+def test_connections_to_multiple_databases(tmp_path) -> None:
+    first = get_connection(str(tmp_path / 'first.duckdb'))
+    second = get_connection(str(tmp_path / 'second.duckdb'))
+    first.cursor.execute("CREATE TABLE t AS SELECT 1 AS a;")
+    assert first.has_table('t')
+    assert not second.has_table('t')
+    assert get_connection(str(tmp_path / 'first.duckdb')) is first
+    close_connection()
+
+
+def test_connection_per_thread() -> None:
+    db_connection = get_connection(':memory:')
+    db_connection.cursor.execute("CREATE TABLE t AS SELECT 1 AS a;")
+    with ThreadPoolExecutor(2) as executor:
+        thread_connection = executor.submit(get_connection, ':memory:').result()
+    assert thread_connection is not db_connection
+    thread_connection.cursor.execute("SELECT a FROM t;")
+    assert thread_connection.cursor.fetchone() == (1,)
+    close_connection()
+
+
+def test_thread_connection_closed_on_thread_exit() -> None:
+    get_connection(':memory:')
+    with ThreadPoolExecutor(4) as executor:
+        thread_connections = [weakref.ref(db_connection) for db_connection in
+                              executor.map(lambda _: get_connection(':memory:'), range(4))]
+    gc.collect()
+    assert all(thread_connection() is None for thread_connection in thread_connections)
+    close_connection()
+
+
+def test_read_only_connection(tmp_path) -> None:
+    database = str(tmp_path / 'index.duckdb')
+    get_connection(database).cursor.execute("CREATE TABLE t AS SELECT 1 AS a;")
+    with pytest.raises(IOError):
+        get_connection(database, read_only=True)
+    close_connection(database)
+    db_connection = get_connection(database, read_only=True)
+    db_connection.cursor.execute("SELECT a FROM t;")
+    assert db_connection.cursor.fetchone() == (1,)
+    with pytest.raises(duckdb.Error):
+        db_connection.cursor.execute("INSERT INTO t VALUES (2);")
+    close_connection()
+
+
+def test_database_cache() -> None:
+    with pytest.raises(IOError):
+        get_database_cache(':memory:')
+    get_connection(':memory:')
+    get_database_cache(':memory:')['key'] = 'value'
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(lambda: get_database_cache(':memory:')['key']).result() == 'value'
+    close_connection()
+    get_connection(':memory:')
+    assert get_database_cache(':memory:') == {}
+    close_connection()
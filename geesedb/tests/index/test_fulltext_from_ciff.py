@@ -1,6 +1,10 @@
 from os import path
 
+import duckdb
+import pytest
+
 from ...index import FullTextFromCiff
+from ...index import fulltext_from_ciff
 from ...connection import close_connection
 
 def test_load_csv_example_files() -> None:
@@ -13,3 +17,60 @@ def test_load_csv_example_files() -> None:
     assert index.cursor.fetchone() == ('WSJ_1', 0, 6)
     assert index.cursor.fetchone() == ('TREC_DOC_1', 1, 4)
     close_connection()
+
+
+def test_load_ciff_in_small_batches() -> None:
+    index = FullTextFromCiff(database=':memory:',
+                             protobuf_file=path.dirname(path.dirname(__file__)
+                                                        ) + '/resources/ciff/toy-complete-20200309.ciff.gz',
+                             batch_size=2
+                             )
+    index.load_data()
+    index.cursor.execute("SELECT * FROM term_dict WHERE string = 'head';")
+    assert index.cursor.fetchone() == (5, 3, 'head')
+    index.cursor.execute("SELECT * FROM term_doc ORDER BY term_id, doc_id;")
+    assert index.cursor.fetchall() == [(0, 0, 1), (1, 0, 1), (2, 0, 1), (3, 0, 1), (4, 2, 1), (5, 0, 1), (5, 1, 1),
+                                       (5, 2, 1), (6, 1, 1), (6, 2, 1), (7, 0, 1), (7, 1, 1), (7, 2, 3), (8, 1, 1)]
+    index.cursor.execute("SELECT COUNT(*) FROM docs;")
+    assert index.cursor.fetchone() == (3,)
+    close_connection()
+
+
+def test_load_ciff_in_parallel_shards() -> None:
+    index = FullTextFromCiff(database=':memory:',
+                             protobuf_file=path.dirname(path.dirname(__file__)
+                                                        ) + '/resources/ciff/toy-complete-20200309.ciff.gz',
+                             workers=2,
+                             shard_size=4
+                             )
+    index.load_data()
+    index.cursor.execute("SELECT * FROM term_dict ORDER BY term_id;")
+    assert [row[2] for row in index.cursor.fetchall()] == ['01', '03', '30', 'content', 'enough', 'head', 'simpl',
+                                                           'text', 'veri']
+    index.cursor.execute("SELECT * FROM term_doc ORDER BY term_id, doc_id;")
+    assert index.cursor.fetchall() == [(0, 0, 1), (1, 0, 1), (2, 0, 1), (3, 0, 1), (4, 2, 1), (5, 0, 1), (5, 1, 1),
+                                       (5, 2, 1), (6, 1, 1), (6, 2, 1), (7, 0, 1), (7, 1, 1), (7, 2, 3), (8, 1, 1)]
+    close_connection()
+
+
+def test_failed_ciff_load_is_rolled_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(*args) -> None:
+        raise duckdb.Error('injected failure')
+
+    monkeypatch.setattr(fulltext_from_ciff, '_bump_index_version', fail)
+    index = FullTextFromCiff(database=':memory:',
+                             protobuf_file=path.dirname(path.dirname(__file__)
+                                                        ) + '/resources/ciff/toy-complete-20200309.ciff.gz',
+                             batch_size=2
+                             )
+    try:
+        with pytest.raises(duckdb.Error):
+            index.load_data()
+        for table_name in ['docs', 'term_dict', 'term_doc']:
+            index.cursor.execute(f'SELECT COUNT(*) FROM {table_name};')
+            assert index.cursor.fetchone() == (0,)
+        index.cursor.execute("SELECT COUNT(*) FROM information_schema.tables "
+                             "WHERE table_name IN ('collection_stats', 'index_version');")
+        assert index.cursor.fetchone() == (0,)
+    finally:
+        close_connection()
@@ -1,6 +1,10 @@
 from os import path
 
+import duckdb
+import pytest
+
 from ...index import FullTextFromCSV
+from ...index import fulltext_from_csv
 from ...connection import close_connection
 
 def test_load_csv_example_files() -> None:
@@ -14,6 +18,8 @@ def test_load_csv_example_files() -> None:
     index.connection.execute("SELECT * FROM docs;")
     assert index.connection.fetchone() == ('document_0', 0, 3)
     assert index.connection.fetchone() == ('document_1', 1, 4)
+    index.connection.execute("SELECT * FROM collection_stats;")
+    assert index.connection.fetchone() == ('docs', 2, 7, 3.5, 2)
     close_connection()
 
 
@@ -26,3 +32,27 @@ def test_load_csv_use_existing_database_does_not_exist() -> None:
     except IOError:
         assert True
     close_connection()
+
+
+def test_failed_csv_load_is_rolled_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(*args) -> None:
+        raise duckdb.Error('injected failure')
+
+    monkeypatch.setattr(fulltext_from_csv, '_update_collection_stats', fail)
+    resources = path.dirname(path.dirname(__file__)) + '/resources/csv/'
+    index = FullTextFromCSV(database=':memory:',
+                            docs_file=resources + 'example_docs.csv',
+                            term_dict_file=resources + 'example_term_dict.csv',
+                            term_doc_file=resources + 'example_term_doc.csv'
+                            )
+    try:
+        with pytest.raises(duckdb.Error):
+            index.load_data()
+        for table_name in ['docs', 'term_dict', 'term_doc']:
+            index.connection.execute(f'SELECT COUNT(*) FROM {table_name};')
+            assert index.connection.fetchone() == (0,)
+        index.connection.execute("SELECT COUNT(*) FROM information_schema.tables "
+                                 "WHERE table_name IN ('collection_stats', 'index_version');")
+        assert index.connection.fetchone() == (0,)
+    finally:
+        close_connection()
@@ -0,0 +1,79 @@
+from os import path
+
+import duckdb
+import pytest
+
+from ...index import FullTextFromCSV, FullTextFromParquet
+from ...index import fulltext_from_parquet
+from ...utils import ToParquet
+from ...connection import close_connection
+
+
+def test_load_parquet_files(tmp_path: str) -> None:
+    resources = path.dirname(path.dirname(__file__)) + '/resources/csv/'
+    FullTextFromCSV(database=':memory:',
+                    docs_file=resources + 'example_docs.csv',
+                    term_dict_file=resources + 'example_term_dict.csv',
+                    term_doc_file=resources + 'example_term_doc.csv'
+                    ).load_data()
+    ToParquet(database=':memory:',
+              output_docs=str(tmp_path) + 'docs.parquet',
+              output_term_dict=str(tmp_path) + 'term_dict.parquet',
+              output_term_doc=str(tmp_path) + 'term_doc.parquet'
+              )
+    close_connection()
+
+    index = FullTextFromParquet(database=':memory:',
+                                docs_file=str(tmp_path) + 'docs.parquet',
+                                term_dict_file=str(tmp_path) + 'term_dict.parquet',
+                                term_doc_file=str(tmp_path) + 'term_doc.parquet'
+                                )
+    index.load_data()
+    index.connection.execute("SELECT * FROM docs ORDER BY doc_id;")
+    assert index.connection.fetchone() == ('document_0', 0, 3)
+    assert index.connection.fetchone() == ('document_1', 1, 4)
+    index.connection.execute("SELECT * FROM term_dict ORDER BY term_id;")
+    assert index.connection.fetchall() == [(0, '0', 2), (1, 'Hello', 2)]
+    index.connection.execute("SELECT SUM(tf) FROM term_doc;")
+    assert index.connection.fetchone() == (7,)
+    index.connection.execute("SELECT * FROM collection_stats;")
+    assert index.connection.fetchall() == [('docs', 2, 7, 3.5, 2)]
+    index.connection.execute("SELECT version FROM index_version;")
+    assert index.connection.fetchone() == (1,)
+    close_connection()
+
+
+def test_failed_parquet_load_is_rolled_back(tmp_path: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    resources = path.dirname(path.dirname(__file__)) + '/resources/csv/'
+    FullTextFromCSV(database=':memory:',
+                    docs_file=resources + 'example_docs.csv',
+                    term_dict_file=resources + 'example_term_dict.csv',
+                    term_doc_file=resources + 'example_term_doc.csv'
+                    ).load_data()
+    ToParquet(database=':memory:',
+              output_docs=str(tmp_path) + 'docs.parquet',
+              output_term_dict=str(tmp_path) + 'term_dict.parquet',
+              output_term_doc=str(tmp_path) + 'term_doc.parquet'
+              )
+    close_connection()
+
+    def fail(*args) -> None:
+        raise duckdb.Error('injected failure')
+
+    monkeypatch.setattr(fulltext_from_parquet, '_update_collection_stats', fail)
+    index = FullTextFromParquet(database=':memory:',
+                                docs_file=str(tmp_path) + 'docs.parquet',
+                                term_dict_file=str(tmp_path) + 'term_dict.parquet',
+                                term_doc_file=str(tmp_path) + 'term_doc.parquet'
+                                )
+    try:
+        with pytest.raises(duckdb.Error):
+            index.load_data()
+        for table_name in ['docs', 'term_dict', 'term_doc']:
+            index.connection.execute(f'SELECT COUNT(*) FROM {table_name};')
+            assert index.connection.fetchone() == (0,)
+        index.connection.execute("SELECT COUNT(*) FROM information_schema.tables "
+                                 "WHERE table_name IN ('collection_stats', 'index_version');")
+        assert index.connection.fetchone() == (0,)
+    finally:
+        close_connection()
@@ -0,0 +1,70 @@
+from os import path
+
+import pandas as pd
+import pytest
+
+from ...index import FullTextFromCSV, FullTextUpdater
+from ...connection import close_connection
+
+
+def load_example_index() -> FullTextFromCSV:
+    resources = path.dirname(path.dirname(__file__)) + '/resources/csv/'
+    index = FullTextFromCSV(database=':memory:',
+                            docs_file=resources + 'example_docs.csv',
+                            term_dict_file=resources + 'example_term_dict.csv',
+                            term_doc_file=resources + 'example_term_doc.csv'
+                            )
+    index.load_data()
+    return index
+
+
+def test_append_documents() -> None:
+    index = load_example_index()
+    updater = FullTextUpdater(database=':memory:')
+    new_docs = updater.append_documents(
+        pd.DataFrame({'collection_id': ['document_2'], 'len': [3]}),
+        pd.DataFrame({'collection_id': ['document_2', 'document_2'], 'string': ['Hello', 'world'], 'tf': [1, 2]})
+    )
+    assert new_docs['doc_id'].tolist() == [2]
+    index.connection.execute("SELECT * FROM docs ORDER BY doc_id;")
+    assert index.connection.fetchall()[-1] == ('document_2', 2, 3)
+    index.connection.execute("SELECT * FROM term_dict ORDER BY term_id;")
+    assert index.connection.fetchall() == [(0, '0', 2), (1, 'Hello', 3), (2, 'world', 1)]
+    index.connection.execute("SELECT * FROM term_doc WHERE doc_id = 2 ORDER BY term_id;")
+    assert index.connection.fetchall() == [(1, 2, 1), (2, 2, 2)]
+    index.connection.execute("SELECT * FROM collection_stats;")
+    assert index.connection.fetchall() == [('docs', 3, 10, 10 / 3, 3)]
+    close_connection()
+
+
+def test_append_existing_document_rolls_back() -> None:
+    index = load_example_index()
+    updater = FullTextUpdater(database=':memory:')
+    with pytest.raises(IOError):
+        updater.append_documents(
+            pd.DataFrame({'collection_id': ['document_0'], 'len': [1]}),
+            pd.DataFrame({'collection_id': ['document_0'], 'string': ['new'], 'tf': [1]})
+        )
+    index.connection.execute("SELECT COUNT(*) FROM term_dict;")
+    assert index.connection.fetchone() == (2,)
+    close_connection()
+
+
+def test_delete_documents_and_compact() -> None:
+    index = load_example_index()
+    updater = FullTextUpdater(database=':memory:')
+    assert updater.delete_documents(['document_1', 'document_1']) == 1
+    assert updater.delete_documents(['document_1']) == 0
+    index.connection.execute("SELECT * FROM deleted_docs;")
+    assert index.connection.fetchall() == [(1,)]
+
+    updater.compact()
+    index.connection.execute("SELECT * FROM docs;")
+    assert index.connection.fetchall() == [('document_0', 0, 3)]
+    index.connection.execute("SELECT * FROM term_dict ORDER BY term_id;")
+    assert index.connection.fetchall() == [(0, '0', 1), (1, 'Hello', 1)]
+    index.connection.execute("SELECT * FROM term_doc ORDER BY term_id;")
+    assert index.connection.fetchall() == [(0, 0, 1), (1, 0, 2)]
+    index.connection.execute("SELECT COUNT(*) FROM deleted_docs;")
+    assert index.connection.fetchone() == (0,)
+    close_connection()
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+pytest.importorskip('pycypher')
+
+from ...connection import close_connection, get_connection, get_database_cache  # noqa: E402
+from ...interpreter import Metadata, Parser  # noqa: E402
+from ...interpreter import parser  # noqa: E402
+
+METADATA = {
+    'docs': {
+        'entities': [['entity_doc', 'collection_id', 'doc_id', 'entity', 'entity']],
+        'authors': [['doc_author', 'collection_id', 'doc', 'author', 'author']]
+    },
+    'entities': {
+        'docs': [['entity_doc', 'entity', 'entity', 'doc_id', 'collection_id']]
+    },
+    'authors': {
+        'docs': [['doc_author', 'author', 'author', 'doc', 'collection_id']]
+    }
+}
+
+
+def load_example_graph(database: str = ':memory:', metadata: dict = None) -> None:
+    """
+    Six documents, four entities and three authors. The entities link the documents in the chains d0 - e0 - d1 -
+    e1 - d2 and d3 - e2 - d4 - e3 - d5.
+    """
+    cursor = get_connection(database).cursor
+    cursor.execute("CREATE TABLE docs AS SELECT 'd' || i AS collection_id, i AS doc_id FROM range(6) AS t(i);")
+    cursor.execute("CREATE TABLE entities AS SELECT 'e' || i AS entity FROM range(4) AS t(i);")
+    cursor.execute("CREATE TABLE authors AS SELECT 'a' || i AS author FROM range(3) AS t(i);")
+    cursor.execute("CREATE TABLE entity_doc (doc_id VARCHAR, entity VARCHAR);")
+    cursor.execute("INSERT INTO entity_doc VALUES ('d0', 'e0'), ('d1', 'e0'), ('d1', 'e1'), ('d2', 'e1'), "
+                   "('d3', 'e2'), ('d4', 'e2'), ('d4', 'e3'), ('d5', 'e3');")
+    cursor.execute("CREATE TABLE doc_author (doc VARCHAR, author VARCHAR);")
+    cursor.execute("INSERT INTO doc_author VALUES ('d0', 'a0'), ('d1', 'a0'), ('d2', 'a1'), ('d3', 'a1'), "
+                   "('d4', 'a2'), ('d5', 'a2');")
+    cursor.execute("CREATE TABLE _meta (metadata VARCHAR);")
+    cursor.execute("INSERT INTO _meta VALUES (?);", [json.dumps(metadata or METADATA)])
+
+
+def translate_with_metadata(monkeypatch: pytest.MonkeyPatch) -> list:
+    """
+    Replaces the Cypher parser by a translation that returns the metadata the query is translated with, and returns
+    the list of translated queries.
+    """
+    translated = []
+
+    def process_node(self, node):
+        translated.append(node)
+        return json.dumps(Metadata(self.database).get_metadata())
+
+    monkeypatch.setattr(parser.pycypher, 'parse', lambda cypher_query: cypher_query, raising=False)
+    monkeypatch.setattr(parser._ParseCypher, 'process_node', process_node)
+    return translated
+
+
+def test_update_metadata_clears_caches(monkeypatch: pytest.MonkeyPatch) -> None:
+    load_example_graph()
+    translated = translate_with_metadata(monkeypatch)
+    query = 'MATCH (d:docs)-[]-(a:authors) RETURN a.author'
+    assert json.loads(Parser(':memory:').parse(query)) == METADATA
+    assert json.loads(Parser(':memory:').parse(query)) == METADATA
+    assert translated == [query]
+
+    metadata = Metadata(':memory:')
+    metadata.update_metadata({'docs': METADATA['docs']})
+    assert 'translations' not in get_database_cache(':memory:')
+    assert metadata.get_metadata() == {'docs': METADATA['docs']}
+    assert json.loads(Parser(':memory:').parse(query)) == {'docs': METADATA['docs']}
+    assert translated == [query, query]
+
+    get_connection(':memory:').cursor.execute('UPDATE _meta SET metadata = ?;', [json.dumps(METADATA)])
+    metadata.clear_cache()
+    assert 'metadata' not in get_database_cache(':memory:')
+    assert json.loads(Parser(':memory:').parse(query)) == METADATA
+    close_connection()
+
+
+def test_translations_per_database(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    first, second = str(tmp_path / 'first.duckdb'), str(tmp_path / 'second.duckdb')
+    load_example_graph(first)
+    load_example_graph(second, {'docs': METADATA['docs']})
+    translated = translate_with_metadata(monkeypatch)
+    query = 'MATCH (d:docs)-[]-(a:authors) RETURN a.author'
+    assert json.loads(Parser(first).parse(query)) == METADATA
+    assert json.loads(Parser(second).parse(query)) == {'docs': METADATA['docs']}
+    assert json.loads(Parser(first).parse(query)) == METADATA
+    assert translated == [query, query]
+    assert get_database_cache(first)['translations'] is not get_database_cache(second)['translations']
+    close_connection()
@@ -0,0 +1,203 @@
+import pytest
+
+pytest.importorskip('pycypher')
+
+from .test_metadata import load_example_graph  # noqa: E402
+from ...connection import close_connection, get_connection  # noqa: E402
+from ...connection.connection import DBConnection  # noqa: E402
+from ...index.utils import _bump_index_version  # noqa: E402
+from ...interpreter import Parser  # noqa: E402
+from ...interpreter import parser  # noqa: E402
+from ...interpreter.parser import _ParseSingleQuery  # noqa: E402
+
+
+def node(variable: str, label: str, **properties: str) -> dict:
+    return {'Variable': variable, 'NodeLabels': label, 'Properties': properties}
+
+
+def chain(*parts: tuple) -> list:
+    return [{'relationship': relationship, 'node': to_node} for relationship, to_node in parts]
+
+
+def translate(start_node: dict, pattern_chain: list, return_items: str, ctes: list = None,
+              reorder_joins: bool = False) -> str:
+    """
+    Translates a MATCH pattern, in the form the Cypher parser passes it to build_select_statement, and puts the
+    common table expressions in front of the query like the RegularQuery translation does.
+    """
+    ctes = [] if ctes is None else ctes
+    single_query = _ParseSingleQuery(':memory:', False, ctes, reorder_joins)
+    from_part = single_query.build_select_statement({'NodePattern': [start_node],
+                                                     'PatternElementChain': pattern_chain})
+    where = ' WHERE ' + ' AND '.join(single_query.additional_wheres) if single_query.additional_wheres else ''
+    sql_query = f'SELECT {return_items} FROM {from_part}{where}'
+    if ctes:
+        sql_query = 'WITH RECURSIVE ' + ', '.join(ctes) + ' ' + sql_query
+    return sql_query
+
+
+def execute(sql_query: str) -> list:
+    return sorted(get_connection(':memory:').cursor.execute(sql_query).fetchall())
+
+
+def test_variable_length_bounds() -> None:
+    load_example_graph()
+    start = node('d', 'docs', collection_id='"d0"')
+    for range_literal, expected in [((1, 2), [('d0', 2), ('d1', 2)]),
+                                    ((1, 4), [('d0', 2), ('d1', 2), ('d2', 4)]),
+                                    ((3, 4), [('d0', 4), ('d1', 4), ('d2', 4)]),
+                                    ((0, 2), [('d0', 0), ('d1', 2)]),
+                                    ((1, 1), [])]:
+        sql_query = translate(start, chain(({'Variable': 'r', 'RangeLiteral': range_literal,
+                                             'RelationshipTypes': ['entity_doc']}, node('d2', 'docs'))),
+                              'd2.collection_id, r.depth')
+        assert execute(sql_query) == expected
+    with pytest.raises(RuntimeError):
+        translate(start, chain(({'RangeLiteral': (1, None)}, node('e', 'entities'))), 'e.entity')
+    close_connection()
+
+
+def test_single_hop_range_matches_plain_relationship() -> None:
+    load_example_graph()
+    start = node('d', 'docs', collection_id='"d1"')
+    plain = translate(start, chain(({}, node('e', 'entities'))), 'e.entity')
+    single_hop = translate(start, chain(({'RangeLiteral': (1, 1)}, node('e', 'entities'))), 'e.entity')
+    assert 'RECURSIVE' not in plain
+    assert execute(single_hop) == execute(plain) == [('e0',), ('e1',)]
+    close_connection()
+
+
+def test_variable_length_start_node_pushdown() -> None:
+    load_example_graph()
+    ctes = []
+    translate(node('d', 'docs', collection_id='"d3"'),
+              chain(({'RangeLiteral': (1, 3)}, node('e', 'entities'))), 'e.entity', ctes)
+    paths = [cte for cte in ctes if cte.startswith('Xpaths')]
+    assert len(paths) == 1
+    assert "FROM docs AS d WHERE d.collection_id = 'd3' UNION" in paths[0]
+    close_connection()
+
+
+def get_start_keys(ctes: list) -> list:
+    paths = [cte.split('(')[0] for cte in ctes if cte.startswith('Xpaths')][-1]
+    return execute(f'WITH RECURSIVE {", ".join(ctes)} SELECT DISTINCT start_key FROM {paths}')
+
+
+def test_anchored_variable_length_walk_only_expands_matching_start_nodes() -> None:
+    load_example_graph()
+    ctes = []
+    sql_query = translate(node('a', 'authors', author='"a2"'),
+                          chain(({}, node('d', 'docs')),
+                                ({'RangeLiteral': (1, 2), 'RelationshipTypes': ['entity_doc']}, node('e', 'entities'))),
+                          'DISTINCT e.entity', ctes)
+    assert get_start_keys(ctes) == [('d4',), ('d5',)]
+    assert execute(sql_query) == [('e2',), ('e3',)]
+
+    ctes = []
+    single_query = _ParseSingleQuery(':memory:', False, ctes)
+    from_part = single_query.build_select_statement({
+        'NodePattern': [node('d', 'docs')],
+        'PatternElementChain': chain(({'Variable': 'r', 'RangeLiteral': (1, 3)}, node('e', 'entities')))
+    })
+    assert get_start_keys(ctes) == [(f'd{i}',) for i in range(6)]
+    single_query.where_conjuncts = ["d.collection_id = 'd3'", "e.entity <> 'e.f'", "d.doc_id < 5 OR r.depth = 1"]
+    single_query.push_down_where()
+    assert get_start_keys(ctes) == [('d3',)]
+    sql_query = f'WITH RECURSIVE {", ".join(ctes)} SELECT e.entity, r.depth FROM {from_part} ' \
+                f"WHERE d.collection_id = 'd3' AND e.entity <> 'e.f'"
+    assert execute(sql_query) == [('e2', 1), ('e3', 3)]
+    close_connection()
+
+
+def test_where_conjuncts() -> None:
+    def tree(name: str, *children: dict) -> dict:
+        return {'name': name, 'result': [{'node': {'text': ''}, 'children': child} for child in children]}
+
+    def text(value: str) -> dict:
+        leaf = {'text': value}
+        return {'node': leaf, 'children': leaf}
+
+    def symbol(value: str) -> dict:
+        return {'name': 'SymbolicName', 'result': [text(value)]}
+
+    single_query = _ParseSingleQuery(':memory:')
+    conjunction = tree('AndExpression', symbol("d.collection_id = 'd3'"), symbol('e.entity IS NOT NULL'))
+    conjunction['result'].insert(1, text(' AND '))
+    assert single_query.get_conjuncts(tree('Expression', tree('OrExpression', tree('XorExpression', conjunction)))) \
+        == ["d.collection_id = 'd3'", 'e.entity IS NOT NULL']
+    disjunction = tree('OrExpression', symbol('d.doc_id = 1'), symbol('d.doc_id = 2'))
+    assert single_query.get_conjuncts(tree('Expression', disjunction)) == ['d.doc_id = 1 OR d.doc_id = 2']
+    close_connection()
+
+
+def test_variable_length_ctes_are_hoisted() -> None:
+    load_example_graph()
+    ctes = []
+    sql_query = translate(node('d', 'docs', collection_id='"d3"'),
+                          chain(({'RangeLiteral': (1, 1)}, node('e', 'entities')),
+                                ({'RangeLiteral': (1, 3)}, node('d2', 'docs'))),
+                          'DISTINCT d2.collection_id', ctes)
+    assert [cte.split(' ')[0].split('(')[0] for cte in ctes] == \
+           ['Xhops0X', 'Xpaths0X', 'Xends0X', 'Xhops3X', 'Xpaths3X', 'Xends3X']
+    assert sql_query.count('WITH RECURSIVE') == 1
+    assert execute(sql_query) == [('d3',), ('d4',), ('d5',)]
+
+    # the single queries of a UNION share the common table expressions of the whole query
+    union = translate(node('d', 'docs', collection_id='"d0"'),
+                      chain(({'RangeLiteral': (2, 2), 'RelationshipTypes': ['entity_doc']}, node('d2', 'docs'))),
+                      'd2.collection_id', ctes)
+    assert len({cte.split(' ')[0].split('(')[0] for cte in ctes}) == 9
+    assert execute(union) == [('d0',), ('d1',)]
+    close_connection()
+
+
+def test_reordered_joins_return_the_same_rows() -> None:
+    load_example_graph()
+    patterns = [
+        (node('d', 'docs'), chain(({}, node('e', 'entities', entity='"e1"'))), 'd.collection_id, e.entity'),
+        (node('a', 'authors'), chain(({}, node('x', 'docs')), ({}, node('b', 'authors', author='"a1"'))),
+         'a.author, x.collection_id'),
+        (node('d', 'docs', collection_id='"d4"'), chain(({}, node('x', 'entities')), ({}, node('d2', 'docs')),
+                                                        ({}, node('a', 'authors'))),
+         'd2.collection_id, x.entity, a.author'),
+        (node('e', 'entities'), chain(({'Variable': 'r'}, node('x', 'docs')), ({}, node('a', 'authors'))),
+         'e.entity, r.doc_id, a.author')
+    ]
+    for start_node, pattern_chain, return_items in patterns:
+        pattern_order = translate(start_node, pattern_chain, return_items)
+        reordered = translate(start_node, pattern_chain, return_items, reorder_joins=True)
+        assert pattern_order != reordered
+        assert execute(reordered) == execute(pattern_order)
+        assert len(execute(pattern_order)) > 0
+    close_connection()
+
+
+def test_translations_are_cached_per_index_version(monkeypatch: pytest.MonkeyPatch) -> None:
+    load_example_graph()
+    translated = []
+    monkeypatch.setattr(parser.pycypher, 'parse', lambda cypher_query: cypher_query, raising=False)
+    monkeypatch.setattr(parser._ParseCypher, 'process_node', lambda self, node: translated.append(node) or node)
+    query = 'MATCH (d:docs)-[]-(e:entities) RETURN e.entity'
+    Parser(':memory:', reorder_joins=True).parse(query)
+    Parser(':memory:', reorder_joins=True).parse(query)
+    assert len(translated) == 1
+    _bump_index_version(get_connection(':memory:').cursor)
+    Parser(':memory:', reorder_joins=True).parse(query)
+    assert len(translated) == 2
+    assert Parser(':memory:').reorder_joins is False
+    close_connection()
+
+
+def test_translations_in_pattern_order_do_not_read_the_index_version(monkeypatch: pytest.MonkeyPatch) -> None:
+    load_example_graph()
+    translated = []
+    monkeypatch.setattr(parser.pycypher, 'parse', lambda cypher_query: cypher_query, raising=False)
+    monkeypatch.setattr(parser._ParseCypher, 'process_node', lambda self, node: translated.append(node) or node)
+    query = 'MATCH (d:docs)-[]-(e:entities) RETURN e.entity'
+    Parser(':memory:').parse(query)
+    monkeypatch.setattr(DBConnection, 'get_index_version', lambda self: pytest.fail('the index version was read'))
+    Parser(':memory:').parse(query)
+    _bump_index_version(get_connection(':memory:').cursor)
+    Parser(':memory:').parse(query)
+    assert len(translated) == 1
+    close_connection()
@@ -0,0 +1,61 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pycypher')
+
+from .test_metadata import load_example_graph  # noqa: E402
+from ...connection import close_connection, get_connection  # noqa: E402
+from ...interpreter import Parser, PreparedQuery  # noqa: E402
+from ...interpreter import parser  # noqa: E402
+
+
+def test_parameter_names() -> None:
+    assert PreparedQuery.get_parameter_names(
+        "SELECT * FROM docs WHERE collection_id = $id OR collection_id = '$not_a_parameter' OR doc_id = $n "
+        "OR collection_id = 'it''s $quoted' OR doc_id > $n") == ['id', 'n']
+
+
+def test_to_literal() -> None:
+    assert PreparedQuery.to_literal("O'Brien") == "'O''Brien'"
+    assert PreparedQuery.to_literal(None) == 'NULL'
+    assert PreparedQuery.to_literal(True) == 'TRUE'
+    assert PreparedQuery.to_literal(np.int64(3)) == '3'
+    assert PreparedQuery.to_literal(np.float64(0.5)) == '0.5'
+    assert PreparedQuery.to_literal(Decimal('1.50')) == '1.50'
+    assert PreparedQuery.to_literal(date(2021, 1, 2)) == "DATE '2021-01-02'"
+    assert PreparedQuery.to_literal(['a', 1]) == "['a', 1]"
+    with pytest.raises(TypeError):
+        PreparedQuery.to_literal(object())
+
+
+def test_execute_prepared_query() -> None:
+    load_example_graph()
+    cursor = get_connection(':memory:').cursor
+    cursor.execute("INSERT INTO authors VALUES ('O''Brien');")
+    query = PreparedQuery('SELECT author FROM authors WHERE author = $name OR author = $other ORDER BY author',
+                          cursor)
+    assert query.parameters == ['name', 'other']
+    assert query.execute({'name': 'a1'}, other="O'Brien").fetchall() == [('O\'Brien',), ('a1',)]
+    assert query.execute(name='a2', other=np.str_('a0')).fetchall() == [('a0',), ('a2',)]
+    with pytest.raises(RuntimeError):
+        query.execute(name='a1')
+    with pytest.raises(RuntimeError):
+        query.execute(name='a1', other='a2', author='a0')
+    query.close()
+    close_connection()
+
+
+def test_parser_prepare(monkeypatch: pytest.MonkeyPatch) -> None:
+    load_example_graph()
+    monkeypatch.setattr(parser.pycypher, 'parse', lambda cypher_query: cypher_query, raising=False)
+    monkeypatch.setattr(parser._ParseCypher, 'process_node',
+                        lambda self, node: 'SELECT a.author FROM doc_author AS a WHERE a.doc = $doc')
+    query = Parser(':memory:').prepare('MATCH (d:docs {collection_id: $doc})-[]-(a:authors) RETURN a.author')
+    assert query.parameters == ['doc']
+    assert query.execute(doc='d2').fetchall() == [('a1',)]
+    assert query.execute(doc='d5').fetchall() == [('a2',)]
+    query.close()
+    close_connection()
@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+import pytest
+
+from ...connection import get_connection, close_connection
+from ...index import AdjacencyFromMeta
+from ...search import Adjacency
+
+
+def load_example_graph() -> None:
+    cursor = get_connection(':memory:').cursor
+    cursor.execute("CREATE TABLE doc_author (doc VARCHAR, author VARCHAR);")
+    cursor.execute("INSERT INTO doc_author VALUES ('d1', 'a1'), ('d1', 'a2'), ('d2', 'a2'), ('d3', 'a3'), "
+                   "('d3', 'a1'), ('d4', 'a2');")
+    cursor.execute("CREATE TABLE _meta (metadata VARCHAR);")
+    cursor.execute("INSERT INTO _meta VALUES (?);", [json.dumps({
+        'docs': {'authors': [['doc_author', 'collection_id', 'doc', 'author', 'author']]},
+        'authors': {'docs': [['doc_author', 'author', 'author', 'doc', 'collection_id']]}
+    })])
+
+
+def test_adjacency(tmp_path) -> None:
+    for storage in ['duckdb', 'numpy']:
+        load_example_graph()
+        AdjacencyFromMeta(database=':memory:', storage=storage, directory=str(tmp_path)).create_adjacency()
+        adjacency = Adjacency(get_connection(':memory:'), 'doc_author')
+        assert adjacency.columns == ['author', 'doc']
+        assert adjacency.expand('doc', ['d1']).tolist() == ['a1', 'a2']
+        assert adjacency.expand('author', ['a2', 'a3', 'unknown']).tolist() == ['d1', 'd2', 'd3', 'd4']
+        assert adjacency.expand('author', ['a1', 'a2'], unique=False).tolist() == ['d1', 'd3', 'd1', 'd2', 'd4']
+        assert adjacency.get_degrees('doc').tolist() == [2, 1, 2, 1]
+        assert isinstance(adjacency.neighbors['doc'], np.memmap) == (storage == 'numpy')
+        close_connection()
+
+
+def test_outdated_adjacency() -> None:
+    load_example_graph()
+    with pytest.raises(IOError):
+        Adjacency(get_connection(':memory:'), 'doc_author')
+    AdjacencyFromMeta(database=':memory:').create_adjacency()
+    get_connection(':memory:').cursor.execute('CREATE TABLE index_version AS SELECT 1 AS version;')
+    with pytest.raises(IOError):
+        Adjacency(get_connection(':memory:'), 'doc_author')
+    close_connection()
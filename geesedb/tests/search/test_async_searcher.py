@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+import pytest
+
+from .test_searcher import load_example_index
+from ...search import AsyncSearcher, Searcher
+from ...connection import close_connection
+
+
+def test_search_many() -> None:
+    load_example_index()
+    topics = ['Hello', '0', 'Hello 0']
+    searcher = Searcher(database=':memory:', n=10, return_type='list')
+
+    async def search_many():
+        async with AsyncSearcher(database=':memory:', n=10, return_type='list', workers=2) as async_searcher:
+            return await async_searcher.search_many(topics), await async_searcher.search('Hello')
+
+    hits, hello_hits = asyncio.run(search_many())
+    assert hits == [searcher.search_topic(topic) for topic in topics]
+    assert hello_hits == searcher.search_topic('Hello')
+    close_connection()
+
+
+def test_search_timeout_interrupts_query() -> None:
+    load_example_index()
+
+    async def search_with_timeout():
+        async with AsyncSearcher(database=':memory:', n=10, return_type='list', workers=1) as async_searcher:
+            execute_topic = async_searcher.searcher.execute_topic
+            async_searcher.searcher.execute_topic = \
+                lambda cursor, topic: cursor.execute('SELECT COUNT(*) FROM range(1000000000000);')
+            start = time.time()
+            with pytest.raises(asyncio.TimeoutError):
+                await async_searcher.search('Hello', timeout=0.2)
+            elapsed = time.time() - start
+            async_searcher.searcher.execute_topic = execute_topic
+            return elapsed, await async_searcher.search('Hello')
+
+    elapsed, hits = asyncio.run(search_with_timeout())
+    assert elapsed < 5
+    assert hits == Searcher(database=':memory:', n=10, return_type='list').search_topic('Hello')
+    close_connection()
@@ -0,0 +1,84 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from .test_searcher import load_example_index
+from ...index import FullTextUpdater
+from ...search import AsyncSearcher, Searcher
+from ...search.result_cache import ResultCache
+from ...connection import close_connection
+
+
+def test_result_cache_eviction() -> None:
+    cache = ResultCache(max_entries=2)
+    for topic in ['a', 'b', 'c']:
+        cache.put(cache.get_key(topic), 0, np.array([topic], dtype=object), np.array([1.0]))
+    assert cache.get(cache.get_key('a'), 0) is None
+    assert cache.get(cache.get_key('b'), 0) is not None
+    cache.put(cache.get_key('d'), 0, np.array(['d'], dtype=object), np.array([1.0]))
+    assert cache.get(cache.get_key('c'), 0) is None
+    assert cache.get(cache.get_key('b'), 0) is not None
+    assert cache.get(cache.get_key('b'), 1) is None
+    assert cache.get_metrics()['hits'] == 2
+    assert cache.get_metrics()['misses'] == 3
+
+    entry_size = ResultCache.get_entry_size(np.array(['a'], dtype=object), np.array([1.0]))
+    cache = ResultCache(max_bytes=2 * entry_size)
+    for topic in ['a', 'b', 'c']:
+        cache.put(cache.get_key(topic), 0, np.array([topic], dtype=object), np.array([1.0]))
+    assert cache.get_metrics()['entries'] == 2
+    assert cache.get_metrics()['bytes'] == 2 * entry_size
+
+
+def test_result_cache_persistence(tmp_path) -> None:
+    cache = ResultCache(file=str(tmp_path / 'cache.pickle'))
+    cache.put(cache.get_key('Hello world'), 3, np.array(['document_0'], dtype=object), np.array([0.5]))
+    cache.save()
+    collection_ids, scores = ResultCache(file=str(tmp_path / 'cache.pickle')).get(cache.get_key('world Hello'), 3)
+    assert collection_ids.tolist() == ['document_0']
+    assert scores.tolist() == [0.5]
+
+
+def test_searcher_result_cache() -> None:
+    load_example_index()
+    searcher = Searcher(database=':memory:', n=10, return_type='list', cache_size=10, index_check_interval=0)
+    hits = Searcher(database=':memory:', n=10, return_type='list').search_topic('Hello 0')
+    assert searcher.search_topic('Hello 0') == hits
+    assert searcher.search_topic('0 Hello Hello') == hits
+    assert searcher.result_cache.get_metrics()['hits'] == 1
+
+    FullTextUpdater(database=':memory:').delete_documents(['document_0'])
+    assert [collection_id for collection_id, _ in searcher.search_topic('Hello 0')] == ['document_1']
+    FullTextUpdater(database=':memory:').append_documents(
+        pd.DataFrame({'collection_id': ['document_2'], 'len': [1]}),
+        pd.DataFrame({'collection_id': ['document_2'], 'string': ['Hello'], 'tf': [1]})
+    )
+    assert [collection_id for collection_id, _ in searcher.search_topic('Hello 0')][0] == 'document_2'
+    assert searcher.result_cache.get_metrics()['misses'] == 3
+    close_connection()
+
+
+def test_parallel_and_async_searches_use_result_cache() -> None:
+    load_example_index()
+    topics = ['Hello 0', '0 Hello', 'Hello']
+    searcher = Searcher(database=':memory:', n=10, return_type='list', cache_size=10)
+    hits = searcher.search_topics_parallel(topics, workers=1)
+    assert searcher.result_cache.get_metrics()['misses'] == 2
+    assert hits == [searcher.search_topic(topic) for topic in topics]
+    assert searcher.result_cache.get_metrics()['hits'] == 4
+
+    FullTextUpdater(database=':memory:').delete_documents(['document_0'])
+    hits = searcher.search_topics_parallel(topics, workers=2)
+    assert all('document_0' not in [collection_id for collection_id, _ in topic_hits] for topic_hits in hits)
+
+    async def search_many():
+        async with AsyncSearcher(database=':memory:', n=10, return_type='list', workers=2, cache_size=10,
+                                 index_check_interval=0) as async_searcher:
+            FullTextUpdater(database=':memory:').delete_documents(['document_1'])
+            return await async_searcher.search_many(topics), async_searcher.searcher.result_cache.get_metrics()
+
+    hits, metrics = asyncio.run(search_many())
+    assert hits == [[], [], []]
+    assert metrics['hits'] + metrics['misses'] == 3
+    close_connection()
@@ -0,0 +1,196 @@
+from os import path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from ...index import FullTextFromCSV, FullTextUpdater
+from ...search import Searcher
+from ...connection import close_connection
+from ...connection.connection import DBConnection
+
+
+def load_example_index() -> None:
+    resources = path.dirname(path.dirname(__file__)) + '/resources/csv/'
+    FullTextFromCSV(database=':memory:',
+                    docs_file=resources + 'example_docs.csv',
+                    term_dict_file=resources + 'example_term_dict.csv',
+                    term_doc_file=resources + 'example_term_doc.csv'
+                    ).load_data()
+
+
+def test_search_topic() -> None:
+    load_example_index()
+    searcher = Searcher(database=':memory:', n=10, return_type='list')
+    hits = searcher.search_topic('Hello 0')
+    assert [collection_id for collection_id, _ in hits] == ['document_0', 'document_1']
+    close_connection()
+
+
+def test_search_topic_excludes_deleted_documents() -> None:
+    load_example_index()
+    FullTextUpdater(database=':memory:').delete_documents(['document_0'])
+    searcher = Searcher(database=':memory:', n=10, return_type='list')
+    hits = searcher.search_topic('Hello 0')
+    assert [collection_id for collection_id, _ in hits] == ['document_1']
+    close_connection()
+
+
+def test_search_topic_excludes_documents_deleted_after_construction() -> None:
+    for backend in ['duckdb', 'numpy']:
+        load_example_index()
+        searcher = Searcher(database=':memory:', n=10, return_type='list', backend=backend, index_check_interval=0)
+        hits = searcher.search_topic('Hello 0')
+        assert [collection_id for collection_id, _ in hits] == ['document_0', 'document_1']
+        FullTextUpdater(database=':memory:').delete_documents(['document_0'])
+        hits = searcher.search_topic('Hello 0')
+        assert [collection_id for collection_id, _ in hits] == ['document_1']
+        hits = searcher.search_topics([['1', 'Hello 0']])
+        assert [collection_id for _, collection_id, _ in hits] == ['document_1']
+        close_connection()
+
+
+def test_index_version_is_checked_once_per_interval(monkeypatch: pytest.MonkeyPatch) -> None:
+    load_example_index()
+    searcher = Searcher(database=':memory:', n=10, return_type='list', index_check_interval=60)
+    FullTextUpdater(database=':memory:').delete_documents(['document_0'])
+    checks = []
+    get_index_version = DBConnection.get_index_version
+    monkeypatch.setattr(DBConnection, 'get_index_version', lambda self: checks.append(1) or get_index_version(self))
+    hits = searcher.search_topic('Hello 0')
+    assert [collection_id for collection_id, _ in hits] == ['document_0', 'document_1']
+    assert checks == []
+    hits = searcher.search_topics([['1', 'Hello 0'], ['2', 'Hello']])
+    assert 'document_0' not in [collection_id for _, collection_id, _ in hits]
+    assert len(checks) == 2
+    hits = searcher.search_topic('Hello 0')
+    assert [collection_id for collection_id, _ in hits] == ['document_1']
+    assert len(checks) == 2
+    close_connection()
+
+
+def test_search_topic_with_impacts() -> None:
+    load_example_index()
+    bm25_hits = Searcher(database=':memory:', n=10, return_type='list').search_topic('Hello 0')
+    searcher = Searcher(database=':memory:', n=10, return_type='list', retrieval_method='BM25_impact')
+    impact_hits = searcher.search_topic('Hello 0')
+    assert [collection_id for collection_id, _ in impact_hits] == [collection_id for collection_id, _ in bm25_hits]
+    assert all(abs(a[1] - b[1]) < 1e-6 for a, b in zip(impact_hits, bm25_hits))
+
+    searcher.set_k1(1.2)
+    searcher.db_connection.cursor.execute('SELECT k1 FROM term_doc_impact_meta;')
+    assert searcher.db_connection.cursor.fetchone() == (1.2,)
+    close_connection()
+
+
+def test_search_topic_with_impacts_after_append() -> None:
+    load_example_index()
+    searcher = Searcher(database=':memory:', n=10, return_type='list', retrieval_method='BM25_impact',
+                        index_check_interval=0)
+    FullTextUpdater(database=':memory:').append_documents(
+        pd.DataFrame({'collection_id': ['document_2'], 'len': [3]}),
+        pd.DataFrame({'collection_id': ['document_2', 'document_2'], 'string': ['Hello', 'world'], 'tf': [1, 2]})
+    )
+    bm25_hits = Searcher(database=':memory:', n=10, return_type='list').search_topic('Hello world')
+    assert 'document_2' in [collection_id for collection_id, _ in bm25_hits]
+    impact_hits = searcher.search_topic('Hello world')
+    assert [collection_id for collection_id, _ in impact_hits] == [collection_id for collection_id, _ in bm25_hits]
+    assert all(abs(a[1] - b[1]) < 1e-6 for a, b in zip(impact_hits, bm25_hits))
+    close_connection()
+
+
+def test_search_topic_with_numpy_backend() -> None:
+    load_example_index()
+    FullTextUpdater(database=':memory:').append_documents(
+        pd.DataFrame({'collection_id': ['document_2', 'document_3'], 'len': [3, 5]}),
+        pd.DataFrame({'collection_id': ['document_2', 'document_2', 'document_3'],
+                      'string': ['Hello', 'world', 'world'],
+                      'tf': [1, 2, 5]})
+    )
+    FullTextUpdater(database=':memory:').delete_documents(['document_1'])
+    sql_hits = Searcher(database=':memory:', n=10, return_type='list').search_topic('Hello 0 world')
+    numpy_hits = Searcher(database=':memory:', n=10, return_type='list', backend='numpy').search_topic('Hello 0 world')
+    assert [collection_id for collection_id, _ in numpy_hits] == [collection_id for collection_id, _ in sql_hits]
+    assert all(abs(a[1] - b[1]) < 1e-9 for a, b in zip(numpy_hits, sql_hits))
+    close_connection()
+
+
+def test_search_topics() -> None:
+    load_example_index()
+    topics = [['2', 'world'], ['1', 'Hello 0'], ['3', '0']]
+    for retrieval_method in ['BM25_robertson', 'BM25_impact']:
+        searcher = Searcher(database=':memory:', n=1, retrieval_method=retrieval_method)
+        hits = searcher.search_topics(topics)
+        assert hits['qid'].tolist() == ['1', '3']
+        for qid, topic in topics:
+            topic_hits = searcher.search_topic(topic)
+            assert hits[hits['qid'] == qid]['collection_id'].tolist() == topic_hits['collection_id'].tolist()
+    close_connection()
+
+
+def test_search_topics_parallel() -> None:
+    load_example_index()
+    topics = ['Hello', '0', 'Hello 0', 'world']
+    for backend in ['duckdb', 'numpy']:
+        searcher = Searcher(database=':memory:', n=10, return_type='list', backend=backend)
+        hits = searcher.search_topics_parallel(topics, workers=3, threads=1)
+        assert hits == [searcher.search_topic(topic) for topic in topics]
+    searcher.db_connection.cursor.execute("SELECT current_setting('threads');")
+    threads = searcher.db_connection.cursor.fetchone()[0]
+    Searcher(database=':memory:').search_topics_parallel(topics, workers=2, threads=threads + 1)
+    searcher.db_connection.cursor.execute("SELECT current_setting('threads');")
+    assert searcher.db_connection.cursor.fetchone()[0] == threads
+    close_connection()
+
+
+def test_search_topic_with_apostrophe() -> None:
+    load_example_index()
+    searcher = Searcher(database=':memory:', n=10, return_type='list')
+    hits = searcher.search_topic("Hello it's")
+    assert hits == searcher.search_topic('Hello')
+    searcher.db_connection.cursor.execute(searcher.ranking_method.construct_query("Hello it's"))
+    assert searcher.db_connection.cursor.fetchall() == hits
+    close_connection()
+
+
+def test_search_topic_with_numpy_parameters() -> None:
+    load_example_index()
+    searcher = Searcher(database=':memory:', n=np.int64(10), k1=np.float64(1.2), b=np.float32(0.5),
+                        return_type='list')
+    query = searcher.ranking_method.construct_query('Hello 0')
+    assert 'np.' not in query
+    searcher.db_connection.cursor.execute(query)
+    assert searcher.db_connection.cursor.fetchall() == searcher.search_topic('Hello 0')
+    with pytest.raises(TypeError):
+        searcher.ranking_method.to_literal(object())
+    close_connection()
+
+
+def test_search_topic_with_arrow_return_type() -> None:
+    load_example_index()
+    topics = [['1', 'Hello'], ['2', 'Hello 0'], ['3', 'world']]
+    for backend in ['duckdb', 'numpy']:
+        searcher = Searcher(database=':memory:', n=10, return_type='arrow', backend=backend)
+        expected = Searcher(database=':memory:', n=10, return_type='list', backend=backend)
+        hits = searcher.search_topic('Hello 0')
+        assert hits.column_names == ['collection_id', 'score']
+        assert list(zip(*hits.to_pydict().values())) == expected.search_topic('Hello 0')
+        hits = searcher.search_topics(topics)
+        assert hits.column_names == ['qid', 'collection_id', 'score']
+        assert list(zip(*hits.to_pydict().values())) == expected.search_topics(topics)
+    close_connection()
+
+
+def test_search_topic_batches() -> None:
+    load_example_index()
+    topics = [['1', 'Hello'], ['2', 'Hello 0'], ['3', 'world']]
+    for backend in ['duckdb', 'numpy']:
+        searcher = Searcher(database=':memory:', n=10, return_type='list', backend=backend)
+        batches = list(searcher.search_topic_batches('Hello 0', batch_size=1))
+        assert all(batch.num_rows <= 1 for batch in batches)
+        hits = pa.Table.from_batches(batches)
+        assert list(zip(*hits.to_pydict().values())) == searcher.search_topic('Hello 0')
+        hits = pa.Table.from_batches(list(searcher.search_topics_batches(topics, batch_size=2)))
+        assert list(zip(*hits.to_pydict().values())) == searcher.search_topics(topics)
+    close_connection()
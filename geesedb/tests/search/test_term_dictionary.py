@@ -0,0 +1,29 @@
+from .test_searcher import load_example_index
+from ...connection import get_connection, close_connection
+from ...search import Searcher
+from ...search.term_dictionary import TermDictionary
+
+
+def test_lookup() -> None:
+    load_example_index()
+    term_dictionary = TermDictionary(get_connection(':memory:'))
+    assert len(term_dictionary) == 2
+    assert term_dictionary.get_memory_usage() > 0
+    term_ids, dfs = term_dictionary.lookup(['Hello', 'zzz', '0', 'Hello', 'Héllo', ''])
+    assert term_ids.tolist() == [0, 1]
+    assert dfs.tolist() == [2, 2]
+    term_ids, dfs = term_dictionary.lookup(['unknown'])
+    assert term_ids.tolist() == []
+    close_connection()
+
+
+def test_search_topic_with_in_memory_term_dict() -> None:
+    load_example_index()
+    for retrieval_method in ['BM25_robertson', 'BM25_impact']:
+        hits = Searcher(database=':memory:', n=10, return_type='list',
+                        retrieval_method=retrieval_method).search_topic("Hello 0 it's")
+        searcher = Searcher(database=':memory:', n=10, return_type='list', retrieval_method=retrieval_method,
+                            in_memory_term_dict=True)
+        assert searcher.search_topic("Hello 0 it's") == hits
+        assert searcher.search_topic('unknown') == []
+    close_connection()
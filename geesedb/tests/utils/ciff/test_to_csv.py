@@ -1,5 +1,9 @@
+import tracemalloc
 from os import path
 
+from ciff_toolkit.ciff_pb2 import Header, Posting, PostingsList, DocRecord
+from ciff_toolkit.write import CiffWriter
+
 from ....utils.ciff.to_csv import ToCSV
 
 
@@ -16,3 +20,47 @@ def test_create_csv_from_ciff(tmp_path: str) -> None:
         assert f.readline().strip() == '0|01|1'
     with open(str(tmp_path) + 'term_doc.csv') as f:
         assert f.readline().strip() == '0|0|1'
+
+
+def test_create_csv_from_large_ciff_in_constant_memory(tmp_path: str) -> None:
+    n_terms, n_docs = 1000, 300
+    with CiffWriter(str(tmp_path) + 'large.ciff.gz') as writer:
+        writer.write_header(Header(version=1, num_postings_lists=n_terms, num_docs=n_docs,
+                                   total_postings_lists=n_terms, total_docs=n_docs))
+        writer.write_postings_lists(
+            PostingsList(term=f'term{i}', df=n_docs, cf=n_docs,
+                         postings=[Posting(docid=0 if j == 0 else 1, tf=1) for j in range(n_docs)])
+            for i in range(n_terms)
+        )
+        writer.write_documents(DocRecord(docid=i, collection_docid=f'doc{i}', doclength=n_terms)
+                               for i in range(n_docs))
+
+    tracemalloc.start()
+    ToCSV(
+        protobuf_file=str(tmp_path) + 'large.ciff.gz',
+        output_docs=str(tmp_path) + 'docs.csv',
+        output_term_dict=str(tmp_path) + 'term_dict.csv',
+        output_term_doc=str(tmp_path) + 'term_doc.csv'
+    )
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # The uncompressed CIFF is over 1MB, reading only one message at a time stays far below that.
+    assert peak < 256 * 1024
+    with open(str(tmp_path) + 'term_doc.csv') as f:
+        assert sum(1 for _ in f) == n_terms * n_docs
+
+
+def test_create_csv_from_ciff_in_parallel_shards(tmp_path: str) -> None:
+    for workers in [1, 2]:
+        ToCSV(
+            protobuf_file=path.dirname(path.dirname(path.dirname(__file__))) + '/resources/ciff/toy-complete-20200309.ciff.gz',
+            output_docs=str(tmp_path) + f'docs_{workers}.csv',
+            output_term_dict=str(tmp_path) + f'term_dict_{workers}.csv',
+            output_term_doc=str(tmp_path) + f'term_doc_{workers}.csv',
+            workers=workers,
+            shard_size=2
+        )
+    for table in ['docs', 'term_dict', 'term_doc']:
+        with open(str(tmp_path) + f'{table}_1.csv') as sequential, open(str(tmp_path) + f'{table}_2.csv') as sharded:
+            assert sequential.read() == sharded.read()
@@ -0,0 +1,30 @@
+from os import path
+
+import pyarrow.parquet as pq
+
+from ....index import FullTextFromCSV
+from ....utils import ToParquet
+from ....connection import close_connection
+
+
+def test_create_parquet_from_database(tmp_path: str) -> None:
+    resources = path.dirname(path.dirname(path.dirname(__file__))) + '/resources/csv/'
+    FullTextFromCSV(database=':memory:',
+                    docs_file=resources + 'example_docs.csv',
+                    term_dict_file=resources + 'example_term_dict.csv',
+                    term_doc_file=resources + 'example_term_doc.csv'
+                    ).load_data()
+    ToParquet(database=':memory:',
+              output_docs=str(tmp_path) + 'docs.parquet',
+              output_term_dict=str(tmp_path) + 'term_dict.parquet',
+              output_term_doc=str(tmp_path) + 'term_doc.parquet'
+              )
+    close_connection()
+
+    docs = pq.read_table(str(tmp_path) + 'docs.parquet')
+    assert str(docs.schema.field('doc_id').type) == 'int32'
+    assert docs.column('collection_id').to_pylist() == ['document_0', 'document_1']
+    term_doc = pq.read_table(str(tmp_path) + 'term_doc.parquet')
+    assert list(zip(*[term_doc.column(c).to_pylist() for c in ['term_id', 'doc_id', 'tf']])) == \
+           [(0, 0, 1), (0, 1, 1), (1, 0, 2), (1, 1, 3)]
+    assert pq.ParquetFile(str(tmp_path) + 'term_doc.parquet').metadata.row_group(0).column(0).compression == 'ZSTD'
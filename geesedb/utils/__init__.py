@@ -1,4 +1,5 @@
 from .ciff.to_csv import ToCSV
 from .ciff.to_ciff import ToCiff
+from .parquet.to_parquet import ToParquet
 
-__all__ = ['ToCSV', 'ToCiff']
\ No newline at end of file
+__all__ = ['ToCSV', 'ToCiff', 'ToParquet']
\ No newline at end of file
@@ -0,0 +1,87 @@
+import gzip
+from typing import Any, Callable, Iterator, List, Tuple, TypeVar
+
+from ciff_toolkit.ciff_pb2 import Header, PostingsList, DocRecord
+from google.protobuf.message import Message
+
+MessageType = TypeVar('MessageType', bound=Message)
+
+
+class CiffStreamReader:
+    """
+    Class for reading a CIFF strictly from front to back:
+    - https://arxiv.org/abs/2003.08276
+
+    Only the message that is currently decoded is kept in memory, so memory usage does not depend on the size
+    of the CIFF. Unlike the ciff_toolkit reader it never seeks, seeking backwards in a gzipped file makes Python
+    decompress the file again from the start.
+    """
+
+    def __init__(self, protobuf_file: str) -> None:
+        if protobuf_file.endswith('.gz'):
+            self.fp = gzip.open(protobuf_file, 'rb')
+        else:
+            self.fp = open(protobuf_file, 'rb')
+        self.header = self.read_message(Header)
+        self.postings_lists_read = False
+
+    def read_varint(self) -> int:
+        result = 0
+        shift = 0
+        while True:
+            b = self.fp.read(1)
+            if not b:
+                raise IOError('Unexpected end of file when decoding.')
+            result |= ((b[0] & 0x7f) << shift)
+            if not (b[0] & 0x80):
+                return result & ((1 << 32) - 1)
+            shift += 7
+            if shift >= 64:
+                raise IOError('Too many bytes when decoding.')
+
+    def read_serialized(self) -> bytes:
+        message_size = self.read_varint()
+        serialized_message = self.fp.read(message_size)
+        if len(serialized_message) != message_size:
+            raise IOError('Unexpected end of file when reading a message.')
+        return serialized_message
+
+    def read_message(self, message_type: Callable[[], MessageType]) -> MessageType:
+        message = message_type()
+        message.ParseFromString(self.read_serialized())
+        return message
+
+    def read_postings_lists(self) -> Iterator[PostingsList]:
+        if self.postings_lists_read:
+            raise IOError('The postings lists can only be read once.')
+        self.postings_lists_read = True
+        for _ in range(self.header.num_postings_lists):
+            yield self.read_message(PostingsList)
+
+    def read_postings_lists_shards(self, shard_size: int) -> Iterator[Tuple[int, List[bytes]]]:
+        """
+        Yields the first term id of each shard together with the undecoded postings lists of the shard.
+        """
+        if self.postings_lists_read:
+            raise IOError('The postings lists can only be read once.')
+        self.postings_lists_read = True
+        for first_term_id in range(0, self.header.num_postings_lists, shard_size):
+            n = min(shard_size, self.header.num_postings_lists - first_term_id)
+            yield first_term_id, [self.read_serialized() for _ in range(n)]
+
+    def read_documents(self) -> Iterator[DocRecord]:
+        if not self.postings_lists_read:
+            self.postings_lists_read = True
+            for _ in range(self.header.num_postings_lists):
+                self.read_serialized()
+        for _ in range(self.header.num_docs):
+            yield self.read_message(DocRecord)
+
+    def close(self) -> None:
+        self.fp.close()
+
+    def __enter__(self) -> 'CiffStreamReader':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
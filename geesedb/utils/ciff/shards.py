@@ -0,0 +1,32 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List
+
+from ciff_toolkit.ciff_pb2 import PostingsList
+
+from .reader import CiffStreamReader
+
+
+def map_postings_lists_shards(reader: CiffStreamReader, worker: Callable[..., Any], workers: int, shard_size: int,
+                              *args: Any) -> Iterator[Any]:
+    """
+    Splits the postings lists in shards of shard_size consecutive terms that are decoded by worker in a process
+    pool. The worker is called as worker(shard_id, first_term_id, serialized_postings_lists, *args), and has to be
+    picklable. Results are yielded in term order, and at most two shards per process are in flight so memory stays
+    bounded.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for shard_id, (first_term_id, serialized) in enumerate(reader.read_postings_lists_shards(shard_size)):
+            pending.append(executor.submit(worker, shard_id, first_term_id, serialized, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def parse_postings_lists(serialized: List[bytes]) -> Iterator[PostingsList]:
+    for message in serialized:
+        postings_list = PostingsList()
+        postings_list.ParseFromString(message)
+        yield postings_list
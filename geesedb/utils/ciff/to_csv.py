@@ -1,10 +1,14 @@
 #! /usr/bin/env python3
 
 import argparse
-import gzip
-from typing import Union, Any, Tuple
+import os
+import shutil
+from typing import Union, Any, Iterable, TextIO, Tuple
 
-from ciff_toolkit.read import CiffReader
+from ciff_toolkit.ciff_pb2 import PostingsList
+
+from .reader import CiffStreamReader
+from .shards import map_postings_lists_shards, parse_postings_lists
 
 
 class ToCSV:
@@ -25,7 +29,9 @@ class ToCSV:
             'protobuf_file': None,
             'output_docs': 'docs.csv',
             'output_term_dict': 'term_dict.csv',
-            'output_term_doc': 'term_docs.csv'
+            'output_term_doc': 'term_docs.csv',
+            'workers': 1,
+            'shard_size': 10000
         }
         for key, item in arguments.items():
             if kwargs.get(key) is not None:
@@ -50,28 +56,54 @@ class ToCSV:
                 raise IOError('Too many bytes when decoding.')
 
     def create_csv_files(self) -> None:
-        if self.arguments['protobuf_file'].endswith('.gz'):
-            with gzip.open(self.arguments['protobuf_file'], 'rb') as f:
-                data = f.read()
-        else:
-            with open(self.arguments['protobuf_file'], 'rb') as f:
-                data = f.read()
-        next_pos, pos = 0, 0
-
-        with CiffReader(self.arguments['protobuf_file']) as reader:
+        with CiffStreamReader(self.arguments['protobuf_file']) as reader:
             with open(self.arguments['output_term_dict'], 'w') as term_dict_writer, \
                     open(self.arguments['output_term_doc'], 'w') as term_doc_writer:
-                for term_id, postings_list in enumerate(reader.read_postings_lists()):
-                    term_dict_writer.write(f'{term_id}|{postings_list.term}|{postings_list.df}\n')
-                    docid = 0
-                    for posting in postings_list.postings:
-                        docid += posting.docid
-                        term_doc_writer.write(f'{term_id}|{docid}|{posting.tf}\n')
+                if self.arguments['workers'] > 1:
+                    self.write_postings_lists_parallel(reader, term_dict_writer, term_doc_writer)
+                else:
+                    self.write_postings_lists(enumerate(reader.read_postings_lists()), term_dict_writer,
+                                              term_doc_writer)
 
             with open(self.arguments['output_docs'], 'w') as docs_writer:
                 for doc_record in reader.read_documents():
                     docs_writer.write(f'{doc_record.collection_docid}|{doc_record.docid}|{doc_record.doclength}\n')
 
+    def write_postings_lists_parallel(self, reader: CiffStreamReader, term_dict_writer: TextIO,
+                                      term_doc_writer: TextIO) -> None:
+        """
+        Every shard of terms is written to its own part files by a worker process, the part files are appended
+        to the output files in term order.
+        """
+        shards = map_postings_lists_shards(reader, _write_csv_shard, self.arguments['workers'],
+                                           self.arguments['shard_size'], self.arguments['output_term_dict'],
+                                           self.arguments['output_term_doc'])
+        for term_dict_part, term_doc_part in shards:
+            for part, writer in ((term_dict_part, term_dict_writer), (term_doc_part, term_doc_writer)):
+                with open(part) as f:
+                    shutil.copyfileobj(f, writer)
+                os.remove(part)
+
+    @staticmethod
+    def write_postings_lists(postings_lists: Iterable[Tuple[int, PostingsList]], term_dict_writer: TextIO,
+                             term_doc_writer: TextIO) -> None:
+        for term_id, postings_list in postings_lists:
+            term_dict_writer.write(f'{term_id}|{postings_list.term}|{postings_list.df}\n')
+            docid = 0
+            for posting in postings_list.postings:
+                docid += posting.docid
+                term_doc_writer.write(f'{term_id}|{docid}|{posting.tf}\n')
+
+
+def _write_csv_shard(shard_id: int, first_term_id: int, serialized: list, term_dict_file: str,
+                     term_doc_file: str) -> Tuple[str, str]:
+    term_dict_part = f'{term_dict_file}.{shard_id}'
+    term_doc_part = f'{term_doc_file}.{shard_id}'
+    with open(term_dict_part, 'w') as term_dict_writer, open(term_doc_part, 'w') as term_doc_writer:
+        ToCSV.write_postings_lists(enumerate(parse_postings_lists(serialized), first_term_id), term_dict_writer,
+                                   term_doc_writer)
+    return term_dict_part, term_doc_part
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
@@ -93,4 +125,14 @@ if __name__ == '__main__':
                         '--output_term_doc',
                         metavar='[file]',
                         help='Output csv file for the term doc mapper table.')
+    parser.add_argument('-w',
+                        '--workers',
+                        type=int,
+                        metavar='[int]',
+                        help='Number of processes that decode the postings lists in parallel.')
+    parser.add_argument('-s',
+                        '--shard_size',
+                        type=int,
+                        metavar='[int]',
+                        help='Number of consecutive terms that are decoded by a worker at once.')
     ToCSV(**vars(parser.parse_args()))
@@ -0,0 +1,95 @@
+#! /usr/bin/env python3
+
+import argparse
+from typing import Any
+
+from ...connection import get_connection
+
+
+class ToParquet:
+    """
+    Class for exporting the tables of the old dog paper to Parquet files:
+    - https://dl.acm.org/doi/10.1145/2600428.2609460
+
+    The column types of the tables are kept, the files are compressed and the rows are sorted on the ids, so the
+    row group statistics can be used to skip row groups when the files are queried directly.
+    """
+    _SORT_KEYS = {
+        'docs': ['doc_id'],
+        'term_dict': ['term_id'],
+        'term_doc': ['term_id', 'doc_id']
+    }
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.arguments = self.get_arguments(kwargs)
+        db_connection = get_connection(self.arguments['database'])
+        self.cursor = db_connection.cursor
+        self.create_parquet_files()
+
+    @staticmethod
+    def get_arguments(kwargs: Any) -> dict:
+        arguments = {
+            'database': None,
+            'docs': 'docs',
+            'term_dict': 'term_dict',
+            'term_doc': 'term_doc',
+            'output_docs': 'docs.parquet',
+            'output_term_dict': 'term_dict.parquet',
+            'output_term_doc': 'term_doc.parquet',
+            'compression': 'zstd',
+            'row_group_size': 122880
+        }
+        for key, item in arguments.items():
+            if kwargs.get(key) is not None:
+                arguments[key] = kwargs.get(key)
+        if arguments['database'] is None:
+            raise IOError('database path needs to be provided')
+        return arguments
+
+    def create_parquet_files(self) -> None:
+        for table in ['docs', 'term_dict', 'term_doc']:
+            self.cursor.execute(f"COPY (SELECT * FROM {self.arguments[table]} "
+                                f"ORDER BY {', '.join(self._SORT_KEYS[table])}) "
+                                f"TO '{self.arguments['output_' + table]}' "
+                                f"(FORMAT PARQUET, COMPRESSION {self.arguments['compression']}, "
+                                f"ROW_GROUP_SIZE {self.arguments['row_group_size']});")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d',
+                        '--database',
+                        required=True,
+                        metavar='[file]',
+                        help='Location of the database.')
+    parser.add_argument('--docs',
+                        metavar='[string]',
+                        help='Name of the docs table.')
+    parser.add_argument('--term_dict',
+                        metavar='[string]',
+                        help='Name of the term dictionary table.')
+    parser.add_argument('--term_doc',
+                        metavar='[string]',
+                        help='Name of the term doc mapper table.')
+    parser.add_argument('-o',
+                        '--output_docs',
+                        metavar='[file]',
+                        help='Output parquet file for the docs table.')
+    parser.add_argument('-t',
+                        '--output_term_dict',
+                        metavar='[file]',
+                        help='Output parquet file for the term dictionary table.')
+    parser.add_argument('-e',
+                        '--output_term_doc',
+                        metavar='[file]',
+                        help='Output parquet file for the term doc mapper table.')
+    parser.add_argument('-c',
+                        '--compression',
+                        choices=['zstd', 'snappy', 'gzip', 'uncompressed'],
+                        help='Compression codec of the parquet files.')
+    parser.add_argument('-r',
+                        '--row_group_size',
+                        type=int,
+                        metavar='[int]',
+                        help='Number of rows per row group.')
+    ToParquet(**vars(parser.parse_args()))